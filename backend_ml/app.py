@@ -1,9 +1,10 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, WebSocket, WebSocketDisconnect, Form
+from fastapi import FastAPI, UploadFile, File, HTTPException, WebSocket, WebSocketDisconnect, Form, Header
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import shutil
 import os
+import io
 import urllib.request
 import logging
 import json
@@ -12,8 +13,6 @@ import cv2
 import numpy as np
 from typing import Optional, List
 import base64
-from io import BytesIO
-from PIL import Image
 from datetime import datetime, date
 import re
 import pandas as pd
@@ -26,9 +25,22 @@ except Exception:
     APSCHED_AVAILABLE = False
 
 # project utilities (you already have these modules)
-from model_utils import detect_emotion, save_labelled_face, recognize_face, initialize_emotion_model  # type: ignore
-from speech_utils import audio_to_text, speak  # type: ignore
-from logger_utils import log_emotion, get_emotion_summary  # type: ignore
+from model_utils import detect_emotion, detect_emotions, emotion_cache, save_labelled_face, recognize_face, recognize_faces, detect_face_boxes, recognize_face_boxes, decode_image, initialize_emotion_model, get_embedding_engine, get_gallery, get_face_detector  # type: ignore
+from speech_utils import speak  # type: ignore
+from tts_utils import speech_worker  # type: ignore
+from logger_utils import log_emotion, get_emotion_summary, query_emotion_logs, emotion_log, add_log_listener, check_caregiver_alert  # type: ignore
+from batching_utils import MicroBatcher  # type: ignore
+from executor_utils import inference_pool, asr_pool, asr_fallback_pool, executor_stats, shutdown_executors  # type: ignore
+from face_worker_utils import FaceWorkerPool, FACE_WORKERS  # type: ignore
+from feed_utils import SnapshotFeed  # type: ignore
+from connection_utils import ConnectionManager  # type: ignore
+from protocol_utils import decode_frame, frame_image, frame_wav, CONTENT_PCM16  # type: ignore
+from speech_stream_utils import SpeechStream  # type: ignore
+from vad_utils import AUDIO_SAMPLE_RATE  # type: ignore
+from realtime_utils import RealTimeFaceTracker  # type: ignore
+from video_utils import VIDEO_SAMPLE_INTERVAL_S  # type: ignore
+from video_face_utils import recognize_video_faces, probe_video, plan_segments, merge_segments  # type: ignore
+from asr_utils import ASRError, ASRTimeout, ASRRouter, ASR_ENGINE, ASR_FALLBACK_ENGINE, ASR_COMMAND_TIMEOUT_S, get_asr_engine  # type: ignore
 
 # configure simple logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -41,6 +53,28 @@ except Exception as e:
     logging.error(f"Failed to initialize emotion detection model: {e}")
     logging.warning("Emotion detection endpoints will not work until model is initialized")
 
+# Load the face embedding model and gallery once, so requests never pay the model lookup
+try:
+    get_embedding_engine()
+    get_gallery()
+    logging.info("Face embedding engine initialized successfully")
+except Exception as e:
+    logging.error(f"Failed to initialize face embedding engine: {e}")
+
+# Load the speech recognition engines once; local engines keep their model warm
+for asr_engine_name in filter(None, (ASR_ENGINE, ASR_FALLBACK_ENGINE)):
+    try:
+        get_asr_engine(asr_engine_name)
+        logging.info(f"ASR engine '{asr_engine_name}' initialized successfully")
+    except Exception as e:
+        logging.error(f"Failed to initialize ASR engine '{asr_engine_name}': {e}")
+
+# Rebuild the running emotion statistics from the log once, instead of on every summary
+try:
+    get_emotion_summary()
+except Exception as e:
+    logging.error(f"Failed to load emotion statistics: {e}")
+
 app = FastAPI(title="Echo Backend - Universal ML / Face / Speech / Video - Real-time")
 
 app.add_middleware(
@@ -52,35 +86,35 @@ app.add_middleware(
 
 # -------------------- WebSocket Connection Manager --------------------
 
-class ConnectionManager:
-    def _init_(self):
-        self.active_connections: List[WebSocket] = []
+manager = ConnectionManager()
 
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
-        logging.info(f"WebSocket connected. Total connections: {len(self.active_connections)}")
+# Concurrent /ws/emotion messages share one vectorized detect_emotions call
+emotion_batcher = MicroBatcher(detect_emotions, executor=inference_pool)
 
-    def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-        logging.info(f"WebSocket disconnected. Total connections: {len(self.active_connections)}")
+# Speech recognition with deadlines, per-engine circuit breakers and an optional hedged fallback
+asr_router = ASRRouter(asr_pool, fallback_executor=asr_fallback_pool)
 
-    async def send_personal_message(self, message: str, websocket: WebSocket):
-        await websocket.send_text(message)
+# /stream-emotion-feed: one summary per logged change, fanned out to every subscriber
+emotion_feed = SnapshotFeed(get_emotion_summary)
+add_log_listener(emotion_feed.notify)
 
-    async def broadcast(self, message: str):
-        dead = []
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message)
-            except:
-                dead.append(connection)
-        for d in dead:
-            if d in self.active_connections:
-                self.active_connections.remove(d)
+_caregiver_alert_active = False
 
-manager = ConnectionManager()
+def caregiver_alert_listener(row: list):
+    """Push an alert to "alerts" subscribers when the recent distress count crosses the threshold."""
+    global _caregiver_alert_active
+    alert = check_caregiver_alert()
+    if alert["should_alert"] and not _caregiver_alert_active:
+        manager.broadcast_threadsafe(json.dumps({
+            "type": "alert",
+            "title": "Caregiver Alert",
+            "message": f"{alert['distress_count']} of the last emotions show distress",
+            "recent_emotions": alert["recent_emotions"],
+            "timestamp": row[0]
+        }), topic="alerts")
+    _caregiver_alert_active = alert["should_alert"]
+
+add_log_listener(caregiver_alert_listener)
 
 # -------------------- Helper: ensure face-detector models --------------------
 
@@ -110,6 +144,10 @@ def ensure_face_detector_files(dest_dir: str = "."):
 # Ensure model files at startup (best effort)
 ensure_face_detector_files()
 
+# Load the SSD detector that gates face recognition (falls back to DeepFace detection)
+if get_face_detector() is not None:
+    logging.info("SSD face detector loaded")
+
 # -------------------- User Preferences & Roles --------------------
 
 PREFS_FILE = "user_prefs.json"
@@ -165,9 +203,50 @@ def set_label_role(label: str, role: str):
     roles[label] = role
     save_roles(roles)
 
+def describe_faces(faces: List[dict]):
+    """Attach roles to recognized faces; returns (faces, best_label) where best_label has the top score."""
+    roles = load_roles()
+    for face in faces:
+        face["role"] = roles.get(face["label"], "friend") if face["label"] else None
+    recognized = [face for face in faces if face["label"]]
+    best = max(recognized, key=lambda f: f["score"])["label"] if recognized else None
+    return faces, best
+
 # Load prefs on startup
 load_prefs()
 
+# -------------------- Spoken Phrases --------------------
+
+NOT_RECOGNIZED_MESSAGE = "Sorry, I do not recognize this person."
+NEED_IMAGE_MESSAGE = "I need an image to answer who this is."
+NOT_UNDERSTOOD_MESSAGE = "Sorry, I could not understand the audio."
+
+def who_is_this_message(label: str, role: Optional[str]) -> str:
+    return f"This is {label}, your {role}." if role else f"This is {label}."
+
+def recognized_message(label: str, role: Optional[str]) -> str:
+    return f"According to your label, this is {label} ({role})."
+
+def sleep_message(username: str) -> str:
+    return f"Hey {username}, it’s time to sleep."
+
+def label_phrases(label: str, role: Optional[str]) -> List[str]:
+    return [who_is_this_message(label, role), recognized_message(label, role)]
+
+def recurring_phrases() -> List[str]:
+    """Everything said over and over, so the speech worker can render it before it is needed."""
+    username = USER_PREFS.get("username", "mate")
+    phrases = [NOT_RECOGNIZED_MESSAGE, NEED_IMAGE_MESSAGE, NOT_UNDERSTOOD_MESSAGE,
+               sleep_message(username), f"Your name is {username}."]
+    roles = load_roles()
+    try:
+        labels = set(roles) | set(get_gallery().labels.tolist())
+    except Exception:
+        labels = set(roles)
+    for label in sorted(labels):
+        phrases += label_phrases(label, roles.get(label, "friend"))
+    return phrases
+
 # -------------------- Scheduler for Time-based Nudges --------------------
 
 scheduler: Optional["BackgroundScheduler"] = None
@@ -184,11 +263,8 @@ def sleep_reminder_job():
             # send once per day
             if _last_sleep_nudge_date != now.date():
                 username = USER_PREFS.get("username", "mate")
-                msg = f"Hey {username}, it’s time to sleep."
-                try:
-                    speak(msg)
-                except Exception as e:
-                    logging.warning(f"Speak failed in scheduler: {e}")
+                msg = sleep_message(username)
+                speak(msg)
                 # Broadcast to WS listeners as well
                 payload = json.dumps({
                     "type": "nudge",
@@ -196,13 +272,7 @@ def sleep_reminder_job():
                     "message": msg,
                     "timestamp": now.isoformat()
                 })
-                try:
-                    loop = asyncio.get_event_loop()
-                    if loop.is_running():
-                        asyncio.run_coroutine_threadsafe(manager.broadcast(payload), loop)
-                except Exception:
-                    # If no loop running (e.g., in tests), ignore
-                    pass
+                manager.broadcast_threadsafe(payload, topic="nudges")
                 _last_sleep_nudge_date = now.date()
     except Exception as e:
         logging.warning(f"sleep_reminder_job error: {e}")
@@ -230,6 +300,44 @@ def stop_scheduler():
         except Exception:
             pass
 
+# Optional process pool for face inference (FACE_WORKERS > 0)
+face_workers: Optional[FaceWorkerPool] = None
+
+@app.on_event("startup")
+def start_face_workers():
+    global face_workers
+    if FACE_WORKERS > 0:
+        try:
+            face_workers = FaceWorkerPool(workers=FACE_WORKERS)
+            logging.info(f"Face worker pool started ({FACE_WORKERS} processes).")
+        except Exception as e:
+            logging.warning(f"Failed to start face worker pool, using in-process inference: {e}")
+
+@app.on_event("shutdown")
+def stop_face_workers():
+    global face_workers
+    if face_workers:
+        face_workers.close()
+        face_workers = None
+
+@app.on_event("startup")
+def prerender_phrases():
+    # Render recurring phrases in the background so they play without synthesis delay
+    speech_worker.prerender(recurring_phrases())
+
+@app.on_event("shutdown")
+def stop_speech_worker():
+    speech_worker.close(timeout=2.0)
+
+@app.on_event("shutdown")
+async def stop_batchers():
+    await emotion_batcher.close()
+    await emotion_feed.close()
+    await manager.close()
+    shutdown_executors()
+    # Write out queued emotion log rows before the process exits
+    emotion_log.close()
+
 # -------------------- Pydantic models --------------------
 
 class EmotionRequest(BaseModel):
@@ -251,18 +359,32 @@ class FaceRoleRequest(BaseModel):
     label: str
     role: str
 
+class BatchEmotionRequest(BaseModel):
+    texts: List[str]
+    log: Optional[bool] = True
+
+# Supportive reply for each detected emotion
+RESPONSE_MAP = {
+    "anxious": "You sound anxious. It's okay, you're safe and not alone.",
+    "frustrated": "You seem frustrated. Take your time, I'm here to help.",
+    "calm": "That's good to hear. Let me know if you need anything.",
+    "exhausted": "You might need rest. You're doing okay.",
+    "disoriented": "It looks like you're unsure where you are. Let me remind you, you're at home and you're safe.",
+    "neutral": "I'm with you. Everything is okay."
+}
+
 # -------------------- WebSocket Endpoints --------------------
 
 @app.websocket("/ws/emotion")
 async def websocket_emotion(websocket: WebSocket):
     """Real-time emotion detection via WebSocket"""
-    await manager.connect(websocket)
+    if not await manager.connect(websocket, topics=("emotion", "nudges", "alerts")):
+        return
     try:
         while True:
-            data = await websocket.receive_text()
-            request = json.loads(data)
+            request = await manager.receive_json(websocket)
             try:
-                emotion, confidence = detect_emotion(request.get("text", ""))
+                emotion, confidence = await emotion_batcher.submit(request.get("text", ""))
                 log_emotion(request.get("text", ""), emotion, confidence)
                 response = {
                     "type": "emotion_result",
@@ -279,77 +401,146 @@ async def websocket_emotion(websocket: WebSocket):
                 }
                 await manager.send_personal_message(json.dumps(error_response), websocket)
     except WebSocketDisconnect:
+        pass
+    finally:
         manager.disconnect(websocket)
 
 @app.websocket("/ws/face-recognition")
 async def websocket_face_recognition(websocket: WebSocket):
-    """Real-time face recognition via WebSocket"""
-    await manager.connect(websocket)
+    """
+    Real-time face recognition via WebSocket. Connect with ?track=1 when sending
+    consecutive camera frames: faces then keep a stable face_id from frame to
+    frame and are only embedded when they first appear or their identity is stale.
+    With FACE_WORKERS > 0, detection and embedding run in the face worker processes.
+    """
+    if not await manager.connect(websocket, topics=("face", "nudges", "alerts")):
+        return
+    face_tracker = None
+    if websocket.query_params.get("track", "").lower() in ("1", "true", "yes"):
+        if face_workers is not None:
+            face_tracker = RealTimeFaceTracker(detect=face_workers.detect_face_boxes,
+                                               recognize=face_workers.recognize_face_boxes)
+        else:
+            face_tracker = RealTimeFaceTracker(detect=detect_face_boxes, recognize=recognize_face_boxes)
+
+    def track_faces(image, timestamp: float) -> List[dict]:
+        frame = image if isinstance(image, np.ndarray) else decode_image(image)
+        faces = face_tracker.process_frames([frame], [timestamp])[0]  # type: ignore
+        return [RealTimeFaceTracker.describe(track, box, timestamp) for track, box in faces]
+
     try:
         while True:
-            data = await websocket.receive_text()
-            request = json.loads(data)
+            request = await manager.receive(websocket)
+            request_id = None
             try:
-                image_data = base64.b64decode(request.get("image", ""))
-                image = Image.open(BytesIO(image_data))
-                temp_path = f"temp_ws_{asyncio.get_event_loop().time()}.jpg"
-                image.save(temp_path)
-                label = recognize_face(temp_path)
+                # Binary frames carry the image as raw bytes; JSON frames as base64
+                if isinstance(request, bytes):
+                    frame = decode_frame(request)
+                    request_id = frame.request_id
+                    image_data = frame_image(frame)
+                else:
+                    request_id = request.get("request_id")
+                    image_data = base64.b64decode(request.get("image", ""))
+                if face_tracker is not None:
+                    found = await inference_pool.run(track_faces, image_data, asyncio.get_event_loop().time())
+                elif face_workers is not None:
+                    if not isinstance(image_data, np.ndarray):
+                        image_data = await inference_pool.run(decode_image, image_data)
+                    found = await face_workers.recognize(image_data)
+                else:
+                    found = await inference_pool.run(recognize_faces, image_data)
+                faces, label = describe_faces(found)
                 role = get_label_role(label) if label else None
                 response = {
                     "type": "face_recognition_result",
                     "recognized": label if label else None,
                     "role": role,
+                    "faces": faces,
                     "message": f"Recognized as {label} ({role})" if label else "Person not recognized",
+                    "request_id": request_id,
                     "timestamp": asyncio.get_event_loop().time()
                 }
                 await manager.send_personal_message(json.dumps(response), websocket)
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
             except Exception as e:
                 error_response = {
                     "type": "error",
                     "message": str(e),
+                    "request_id": request_id,
                     "timestamp": asyncio.get_event_loop().time()
                 }
                 await manager.send_personal_message(json.dumps(error_response), websocket)
     except WebSocketDisconnect:
+        pass
+    finally:
         manager.disconnect(websocket)
 
 @app.websocket("/ws/audio-stream")
 async def websocket_audio_stream(websocket: WebSocket):
-    """Real-time audio streaming and processing via WebSocket"""
-    await manager.connect(websocket)
+    """
+    Real-time audio streaming and processing via WebSocket.
+    Raw PCM chunks (binary PCM16 frames or {"type": "audio_chunk"}) are segmented
+    at silence and each utterance is transcribed once; a WAV file (binary WAV frame
+    or {"audio": base64}) is still transcribed as a whole.
+    """
+    if not await manager.connect(websocket, topics=("audio", "nudges", "alerts")):
+        return
+
+    async def send(message: dict):
+        message["timestamp"] = asyncio.get_event_loop().time()
+        await manager.send_personal_message(json.dumps(message), websocket)
+
+    async def transcribe(pcm: bytes, sample_rate: int) -> str:
+        return await asr_router.transcribe(pcm, sample_rate)
+
+    async def analyze(text: str) -> dict:
+        if not text:
+            return {"emotion": None, "confidence": 0.0}  # nothing intelligible was said
+        emotion, confidence = await inference_pool.run(detect_emotion, text)
+        log_emotion(text, emotion, confidence)
+        return {"emotion": emotion, "confidence": confidence}
+
+    stream = SpeechStream(send, transcribe, analyze)
     try:
         while True:
-            data = await websocket.receive_text()
-            request = json.loads(data)
+            request = await manager.receive(websocket)
+            request_id = None
             try:
-                audio_data = base64.b64decode(request.get("audio", ""))
-                temp_path = f"temp_audio_{asyncio.get_event_loop().time()}.wav"
-                with open(temp_path, "wb") as f:
-                    f.write(audio_data)
-                text = audio_to_text(temp_path)
-                emotion, confidence = detect_emotion(text)
-                log_emotion(text, emotion, confidence)
-                response = {
+                if isinstance(request, bytes):
+                    frame = decode_frame(request)
+                    request_id = frame.request_id
+                    if frame.content_type == CONTENT_PCM16:
+                        await stream.feed(frame.payload, frame.sample_rate or AUDIO_SAMPLE_RATE, request_id)
+                        continue
+                    audio_data = frame_wav(frame)
+                else:
+                    request_id = request.get("request_id")
+                    kind = request.get("type")
+                    if kind == "audio_chunk":
+                        pcm = base64.b64decode(request.get("pcm", ""))
+                        await stream.feed(pcm, int(request.get("sample_rate") or AUDIO_SAMPLE_RATE), request_id)
+                        continue
+                    if kind == "end_of_speech":
+                        await stream.flush(acknowledge=True)
+                        continue
+                    audio_data = base64.b64decode(request.get("audio", ""))
+                text = await asr_router.transcribe_file(io.BytesIO(audio_data))
+                result = await analyze(text)
+                await send({
                     "type": "audio_processing_result",
                     "text": text,
-                    "emotion": emotion,
-                    "confidence": confidence,
-                    "timestamp": asyncio.get_event_loop().time()
-                }
-                await manager.send_personal_message(json.dumps(response), websocket)
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
+                    **result,
+                    "request_id": request_id
+                })
             except Exception as e:
-                error_response = {
+                await send({
                     "type": "error",
                     "message": str(e),
-                    "timestamp": asyncio.get_event_loop().time()
-                }
-                await manager.send_personal_message(json.dumps(error_response), websocket)
+                    "request_id": request_id
+                })
     except WebSocketDisconnect:
+        pass
+    finally:
+        await stream.close()
         manager.disconnect(websocket)
 
 # -------------------- Voice Command Endpoint --------------------
@@ -374,37 +565,29 @@ async def voice_command(
         with open(audio_path, "wb") as buffer:
             shutil.copyfileobj(audio.file, buffer)
 
-        cmd_text = audio_to_text(audio_path).lower().strip()
+        cmd_text = (await asr_router.transcribe_file(audio_path, ASR_COMMAND_TIMEOUT_S)).lower().strip()
+        if not cmd_text:
+            msg = NOT_UNDERSTOOD_MESSAGE
+            if speak_response:
+                speak(msg)
+            return {"intent": "not_understood", "transcript": "", "message": msg}
 
         # Basic NLP by keyword matching
         if "who is this" in cmd_text or "who's this" in cmd_text or "who am i looking at" in cmd_text:
             if not image:
-                msg = "I need an image to answer who this is."
+                msg = NEED_IMAGE_MESSAGE
                 if speak_response:
-                    try: speak(msg)
-                    except Exception: pass
+                    speak(msg)
                 return {"intent": "who_is_this", "need_image": True, "message": msg}
 
-            # Save image and recognize
-            img_path = os.path.join(tmp_dir, image.filename) # type: ignore
-            with open(img_path, "wb") as buffer:
-                shutil.copyfileobj(image.file, buffer)
-
-            label = recognize_face(img_path)
+            # Recognize straight from the uploaded bytes
+            label = await inference_pool.run(recognize_face, await image.read())
             role = get_label_role(label) if label else None
 
-            if label:
-                msg = f"This is {label}"
-                if role:
-                    msg += f", your {role}."
-                else:
-                    msg += "."
-            else:
-                msg = "Sorry, I do not recognize this person."
+            msg = who_is_this_message(label, role) if label else NOT_RECOGNIZED_MESSAGE
 
             if speak_response:
-                try: speak(msg)
-                except Exception as e: logging.warning(f"Speak failed: {e}")
+                speak(msg)
 
             return {
                 "intent": "who_is_this",
@@ -417,20 +600,18 @@ async def voice_command(
             now_str = datetime.now().strftime("%I:%M %p")
             msg = f"It’s {now_str}."
             if speak_response:
-                try: speak(msg)
-                except Exception: pass
+                speak(msg)
             return {"intent": "time_query", "message": msg, "time": now_str}
 
         if "what's my name" in cmd_text or "what is my name" in cmd_text:
             name = USER_PREFS.get("username", "mate")
             msg = f"Your name is {name}."
             if speak_response:
-                try: speak(msg)
-                except Exception: pass
+                speak(msg)
             return {"intent": "name_query", "message": msg, "username": name}
 
         # Unknown command -> Try emotion on the text anyway
-        emotion, confidence = detect_emotion(cmd_text)
+        emotion, confidence = await inference_pool.run(detect_emotion, cmd_text)
         log_emotion(cmd_text, emotion, confidence)
         fallback_msg = f"I heard: '{cmd_text}'. Emotion: {emotion} ({confidence})."
         return {
@@ -441,6 +622,10 @@ async def voice_command(
             "message": fallback_msg
         }
 
+    except ASRTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except ASRError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logging.exception("Voice command failed")
         raise HTTPException(status_code=500, detail=str(e))
@@ -454,6 +639,56 @@ async def voice_command(
 
 # -------------------- Real-time Video Processing Endpoints --------------------
 
+def recognize_video(file_path: str, interval_s: float = VIDEO_SAMPLE_INTERVAL_S):
+    """One sequential pass over a video in this process (blocking; run in the inference pool)."""
+    return merge_segments([recognize_video_faces(file_path, interval_s)])
+
+async def analyze_video_faces(file_path: str, interval_s: float = VIDEO_SAMPLE_INTERVAL_S):
+    """
+    Recognize faces in a video file (see video_face_utils.recognize_video_faces).
+    With face worker processes the video is decoded and analyzed in a worker
+    (tracking included); a long one is split into time segments that the
+    workers handle in parallel, each seeking to its own start, and the partial
+    results are merged into one timeline. Returns (recognitions, video summary).
+    """
+    if face_workers is not None:
+        info = await inference_pool.run(probe_video, file_path)
+        segments = plan_segments(info, face_workers.workers, interval_s)
+        parts = await asyncio.gather(*(
+            asyncio.wrap_future(face_workers.recognize_video_segment(file_path, interval_s, start, end))  # type: ignore
+            for start, end in segments
+        ))
+        recognitions, video = merge_segments(list(parts))
+    else:
+        recognitions, video = await inference_pool.run(recognize_video, file_path, interval_s)
+    roles = load_roles()
+    for recognition in recognitions:
+        recognition["role"] = roles.get(recognition["person"], "friend")
+    return recognitions, video
+
+def detect_video_emotions(file_path: str) -> List[dict]:
+    """Per-frame placeholder emotion pass over a video (blocking; run in the inference pool)."""
+    cap = cv2.VideoCapture(file_path)
+    emotions = []
+    while cap.isOpened():
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frame_text = f"Frame at {len(emotions)} seconds"
+        try:
+            emotion, confidence = detect_emotion(frame_text)
+            emotions.append({
+                "frame": len(emotions),
+                "emotion": emotion,
+                "confidence": confidence,
+                "timestamp": len(emotions)
+            })
+        except:
+            pass
+
+    cap.release()
+    return emotions
+
 @app.post("/video-stream/emotion")
 async def video_stream_emotion(file: UploadFile = File(...)):
     """Process video stream for real-time emotion detection (placeholder demo)."""
@@ -465,25 +700,7 @@ async def video_stream_emotion(file: UploadFile = File(...)):
         with open(file_path, "wb") as buffer:
             shutil.copyfileobj(file.file, buffer)
 
-        cap = cv2.VideoCapture(file_path)
-        emotions = []
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-            frame_text = f"Frame at {len(emotions)} seconds"
-            try:
-                emotion, confidence = detect_emotion(frame_text)
-                emotions.append({
-                    "frame": len(emotions),
-                    "emotion": emotion,
-                    "confidence": confidence,
-                    "timestamp": len(emotions)
-                })
-            except:
-                pass
-
-        cap.release()
+        emotions = await inference_pool.run(detect_video_emotions, file_path)
         if os.path.exists(file_path):
             os.remove(file_path)
 
@@ -497,8 +714,10 @@ async def video_stream_emotion(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/video-stream/face-recognition")
-async def video_stream_face_recognition(file: UploadFile = File(...)):
-    """Process video stream for real-time face recognition"""
+async def video_stream_face_recognition(file: UploadFile = File(...), interval_s: Optional[float] = None):
+    """Process video stream for real-time face recognition, one frame per interval_s seconds"""
+    if interval_s is not None and interval_s <= 0:
+        raise HTTPException(status_code=400, detail="interval_s must be positive")
     try:
         tmp_dir = "temp_video"
         os.makedirs(tmp_dir, exist_ok=True)
@@ -507,38 +726,16 @@ async def video_stream_face_recognition(file: UploadFile = File(...)):
         with open(file_path, "wb") as buffer:
             shutil.copyfileobj(file.file, buffer)
 
-        cap = cv2.VideoCapture(file_path)
-        recognitions = []
-        frame_count = 0
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-            if frame_count % 10 == 0:
-                temp_frame_path = f"temp_frame_{frame_count}.jpg"
-                cv2.imwrite(temp_frame_path, frame)
-                try:
-                    label = recognize_face(temp_frame_path)
-                    if label:
-                        recognitions.append({
-                            "frame": frame_count,
-                            "person": label,
-                            "role": get_label_role(label),
-                            "timestamp": frame_count / 30.0
-                        })
-                except:
-                    pass
-                if os.path.exists(temp_frame_path):
-                    os.remove(temp_frame_path)
-            frame_count += 1
-
-        cap.release()
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        try:
+            recognitions, video = await analyze_video_faces(
+                file_path, interval_s if interval_s is not None else VIDEO_SAMPLE_INTERVAL_S)
+        finally:
+            if os.path.exists(file_path):
+                os.remove(file_path)
 
         return {
             "recognitions": recognitions,
-            "total_frames": frame_count,
+            **video,
             "unique_persons": list({r["person"] for r in recognitions})
         }
     except Exception as e:
@@ -550,7 +747,7 @@ async def video_stream_face_recognition(file: UploadFile = File(...)):
 @app.post("/stream-emotion")
 async def stream_emotion(request: StreamingEmotionRequest):
     try:
-        emotion, confidence = detect_emotion(request.text)
+        emotion, confidence = await inference_pool.run(detect_emotion, request.text)
         log_emotion(request.text, emotion, confidence)
         return {
             "emotion": emotion,
@@ -563,13 +760,27 @@ async def stream_emotion(request: StreamingEmotionRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/stream-emotion-feed")
-async def stream_emotion_feed():
-    async def generate():
-        while True:
-            summary = get_emotion_summary()
-            yield f"data: {json.dumps(summary)}\n\n"
-            await asyncio.sleep(1)
-    return StreamingResponse(generate(), media_type="text/plain")
+async def stream_emotion_feed(last_event_id: Optional[str] = Header(None)):
+    """Server-Sent Events: the emotion summary, pushed whenever an emotion is logged."""
+    return StreamingResponse(
+        emotion_feed.stream(last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/ws-stats")
+async def ws_stats():
+    """WebSocket connections per topic, send queue depth and dropped/evicted consumers."""
+    return manager.stats()
+
+@app.get("/emotion-feed-stats")
+async def emotion_feed_stats():
+    return emotion_feed.stats()
+
+@app.get("/asr-stats")
+async def asr_stats():
+    """Speech recognition wins per engine, hedges, fallbacks, timeouts and circuit breaker states."""
+    return asr_router.stats()
 
 # -------------------- Real-time Camera Endpoints --------------------
 
@@ -616,7 +827,7 @@ async def upload_universal(file: UploadFile = File(...)):
         # Image
         if file_extension in image_extensions or 'image' in mime_type:
             try:
-                label = recognize_face(file_path)
+                label = await inference_pool.run(recognize_face, file_path)
                 if label:
                     role = get_label_role(label)
                     return {
@@ -665,9 +876,11 @@ async def upload_universal(file: UploadFile = File(...)):
         # Audio
         if file_extension in audio_extensions or 'audio' in mime_type:
             try:
-                text = audio_to_text(file_path)
-                emotion, confidence = detect_emotion(text)
-                log_emotion(text, emotion, confidence)
+                text = await asr_router.transcribe_file(file_path)
+                emotion, confidence = None, 0.0
+                if text:
+                    emotion, confidence = await inference_pool.run(detect_emotion, text)
+                    log_emotion(text, emotion, confidence)
                 return {
                     "content_type": "audio",
                     "processing": "audio_to_text_and_emotion",
@@ -700,39 +913,15 @@ async def upload_universal(file: UploadFile = File(...)):
         # Video
         if file_extension in video_extensions or 'video' in mime_type:
             try:
-                cap = cv2.VideoCapture(file_path)
-                recognitions = []
-                frame_count = 0
-                while cap.isOpened():
-                    ret, frame = cap.read()
-                    if not ret:
-                        break
-                    if frame_count % 10 == 0:
-                        temp_frame_path = f"temp_frame_{frame_count}.jpg"
-                        cv2.imwrite(temp_frame_path, frame)
-                        try:
-                            label = recognize_face(temp_frame_path)
-                            if label:
-                                recognitions.append({
-                                    "frame": frame_count,
-                                    "person": label,
-                                    "role": get_label_role(label),
-                                    "timestamp": frame_count / 30.0
-                                })
-                        except:
-                            pass
-                        if os.path.exists(temp_frame_path):
-                            os.remove(temp_frame_path)
-                    frame_count += 1
-                cap.release()
+                recognitions, video = await analyze_video_faces(file_path)
                 return {
                     "content_type": "video",
                     "processing": "video_analysis",
                     "result": {
-                        "total_frames": frame_count,
+                        **video,
                         "recognitions": recognitions,
                         "unique_persons": list({r["person"] for r in recognitions}),
-                        "message": f"Video processed: {frame_count} frames analyzed"
+                        "message": f"Video processed: {video['sampled_frames']} of {video['total_frames']} frames analyzed"
                     },
                     "file_info": {
                         "filename": file.filename,
@@ -760,7 +949,7 @@ async def upload_universal(file: UploadFile = File(...)):
             try:
                 with open(file_path, 'r', encoding='utf-8') as f:
                     text_content = f.read()
-                emotion, confidence = detect_emotion(text_content)
+                emotion, confidence = await inference_pool.run(detect_emotion, text_content)
                 log_emotion(text_content, emotion, confidence)
                 return {
                     "content_type": "text",
@@ -822,23 +1011,15 @@ async def upload_universal(file: UploadFile = File(...)):
 @app.post("/analyze-text")
 async def analyze_text(request: EmotionRequest):
     try:
-        emotion, confidence = detect_emotion(request.text)
+        emotion, confidence = await inference_pool.run(detect_emotion, request.text)
         log_emotion(request.text, emotion, confidence)
-        response_map = {
-            "anxious": "You sound anxious. It's okay, you're safe and not alone.",
-            "frustrated": "You seem frustrated. Take your time, I'm here to help.",
-            "calm": "That's good to hear. Let me know if you need anything.",
-            "exhausted": "You might need rest. You're doing okay.",
-            "disoriented": "It looks like you're unsure where you are. Let me remind you, you're at home and you're safe.",
-            "neutral": "I'm with you. Everything is okay."
-        }
         return {
             "content_type": "text_input",
             "processing": "text_emotion_analysis",
             "result": {
                 "emotion": emotion,
                 "confidence": confidence,
-                "response": response_map.get(emotion, "I'm here with you."),
+                "response": RESPONSE_MAP.get(emotion, "I'm here with you."),
                 "text_length": len(request.text)
             },
             "input": {
@@ -854,23 +1035,38 @@ async def analyze_text(request: EmotionRequest):
 @app.post("/detect-emotion")
 async def detect_emotion_api(req: EmotionRequest):
     try:
-        emotion, confidence = detect_emotion(req.text)
+        emotion, confidence = await inference_pool.run(detect_emotion, req.text)
     except Exception as e:
         logging.exception("Emotion detection failed")
         raise HTTPException(status_code=500, detail=str(e))
     log_emotion(req.text, emotion, confidence)
-    response_map = {
-        "anxious": "You sound anxious. It's okay, you're safe and not alone.",
-        "frustrated": "You seem frustrated. Take your time, I'm here to help.",
-        "calm": "That's good to hear. Let me know if you need anything.",
-        "exhausted": "You might need rest. You're doing okay.",
-        "disoriented": "It looks like you're unsure where you are. Let me remind you, you're at home and you're safe.",
-        "neutral": "I'm with you. Everything is okay."
-    }
     return {
         "emotion": emotion,
         "confidence": confidence,
-        "response": response_map.get(emotion, "I'm here with you.")
+        "response": RESPONSE_MAP.get(emotion, "I'm here with you.")
+    }
+
+@app.post("/detect-emotion/batch")
+async def detect_emotion_batch_api(req: BatchEmotionRequest):
+    """Classify a whole list of texts (e.g. a replayed transcript) in one vectorized pass."""
+    try:
+        results = await inference_pool.run(detect_emotions, req.texts)
+    except Exception as e:
+        logging.exception("Batch emotion detection failed")
+        raise HTTPException(status_code=500, detail=str(e))
+    if req.log:
+        for text, (emotion, confidence) in zip(req.texts, results):
+            log_emotion(text, emotion, confidence)
+    return {
+        "count": len(results),
+        "results": [
+            {
+                "emotion": emotion,
+                "confidence": confidence,
+                "response": RESPONSE_MAP.get(emotion, "I'm here with you.")
+            }
+            for emotion, confidence in results
+        ]
     }
 
 @app.post("/detect-emotion-from-audio")
@@ -881,14 +1077,20 @@ async def detect_emotion_from_audio(file: UploadFile = File(...)):
     try:
         with open(file_path, "wb") as buffer:
             shutil.copyfileobj(file.file, buffer)
-        text = audio_to_text(file_path)
-        emotion, confidence = detect_emotion(text)
+        text = await asr_router.transcribe_file(file_path)
+        if not text:
+            return {"original_text": "", "emotion": None, "confidence": 0.0}
+        emotion, confidence = await inference_pool.run(detect_emotion, text)
         log_emotion(text, emotion, confidence)
         return {
             "original_text": text,
             "emotion": emotion,
             "confidence": confidence
         }
+    except ASRTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except ASRError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logging.exception("Audio emotion detection failed")
         raise HTTPException(status_code=500, detail=str(e))
@@ -903,6 +1105,33 @@ async def detect_emotion_from_audio(file: UploadFile = File(...)):
 async def emotion_stats():
     return get_emotion_summary()
 
+@app.get("/emotion-logs")
+async def emotion_logs(start: Optional[str] = None, end: Optional[str] = None, emotion: Optional[str] = None,
+                       limit: int = 100, offset: int = 0, newest_first: bool = True):
+    """Logged emotion events in [start, end) (ISO dates/datetimes), optionally one emotion, paginated."""
+    try:
+        return await inference_pool.run(query_emotion_logs, start, end, emotion, limit, offset, newest_first)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid time range: {e}")
+
+@app.get("/emotion-cache-stats")
+async def emotion_cache_stats():
+    return emotion_cache.stats()
+
+@app.get("/emotion-batcher-stats")
+async def emotion_batcher_stats():
+    return emotion_batcher.stats()
+
+@app.get("/executor-stats")
+async def executor_stats_api():
+    """Running/queued work per execution pool (inference, asr, asr fallback, face workers, emotion log writer, speech worker)."""
+    stats = executor_stats()
+    if face_workers is not None:
+        stats["face_workers"] = face_workers.stats()
+    stats["emotion_log"] = emotion_log.stats()
+    stats["tts_worker"] = speech_worker.stats()
+    return stats
+
 # -------------------- Face Recognition Routes --------------------
 
 @app.post("/upload-face/")
@@ -921,11 +1150,12 @@ async def upload_face(
         with open(file_path, "wb") as buffer:
             shutil.copyfileobj(file.file, buffer)
 
-        save_labelled_face(file_path, label)
+        await inference_pool.run(save_labelled_face, file_path, label)
         if role:
             set_label_role(label, role)
 
         logging.info(f"Saved labeled face: {label} -> {file_path} (role={role})")
+        speech_worker.prerender(label_phrases(label, get_label_role(label)))
         return {"status": "success", "label": label, "role": role}
     except ValueError as e:
         logging.warning(f"No face detected while uploading {file.filename}: {e}")
@@ -936,37 +1166,21 @@ async def upload_face(
 
 @app.post("/recognize-face/")
 async def recognize_face_api(file: UploadFile = File(...), speak_response: Optional[bool] = True):
-    tmp_dir = "temp"
-    os.makedirs(tmp_dir, exist_ok=True)
-    file_path = os.path.join(tmp_dir, file.filename) # type: ignore
-
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-
-        label = recognize_face(file_path)
+        faces, label = describe_faces(await inference_pool.run(recognize_faces, await file.read()))
         if label:
             role = get_label_role(label)
-            message = f"According to your label, this is {label} ({role})."
+            message = recognized_message(label, role)
         else:
-            message = "Sorry, I do not recognize this person."
+            message = NOT_RECOGNIZED_MESSAGE
 
         if speak_response:
-            try:
-                speak(message)
-            except Exception as e:
-                logging.warning(f"Speak failed: {e}")
+            speak(message)
 
-        return {"recognized": label if label else None, "role": get_label_role(label) if label else None, "message": message}
+        return {"recognized": label if label else None, "role": get_label_role(label) if label else None, "faces": faces, "message": message}
     except Exception as e:
         logging.exception("Face recognition failed")
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-        except Exception:
-            pass
 
 # -------------------- Preferences & Roles Management --------------------
 
@@ -984,6 +1198,8 @@ async def set_prefs(prefs: PrefsRequest):
     if prefs.sleep_enabled is not None:
         USER_PREFS["sleep_enabled"] = bool(prefs.sleep_enabled)
     save_prefs()
+    username = USER_PREFS.get("username", "mate")
+    speech_worker.prerender([sleep_message(username), f"Your name is {username}."])
     return {"status": "ok", "prefs": USER_PREFS}
 
 @app.get("/get-prefs")
@@ -993,6 +1209,7 @@ async def get_prefs():
 @app.post("/set-face-role")
 async def set_face_role(req: FaceRoleRequest):
     set_label_role(req.label, req.role)
+    speech_worker.prerender(label_phrases(req.label, req.role))
     return {"status": "ok", "label": req.label, "role": req.role}
 
 @app.get("/get-face-role")
@@ -0,0 +1,357 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor
+from typing import BinaryIO, Dict, Optional, Union
+import numpy as np
+import speech_recognition as sr
+
+logger = logging.getLogger(__name__)
+
+# ---------------- CONFIG ---------------- #
+
+# "google" (network), "vosk" or "whisper" (local CPU models, loaded once)
+ASR_ENGINE = os.environ.get("ASR_ENGINE", "google").lower()
+ASR_LANGUAGE = os.environ.get("ASR_LANGUAGE", "en-US")
+# Vosk: path to an unpacked model, e.g. https://alphacephei.com/vosk/models/vosk-model-small-en-us-0.15.zip
+VOSK_MODEL_PATH = os.environ.get("VOSK_MODEL_PATH", "models/vosk-model-small-en-us-0.15")
+# faster-whisper: model size or local path ("tiny.en", "base.en", ...), int8 on CPU
+WHISPER_MODEL = os.environ.get("WHISPER_MODEL", "tiny.en")
+WHISPER_COMPUTE_TYPE = os.environ.get("WHISPER_COMPUTE_TYPE", "int8")
+WHISPER_CPU_THREADS = int(os.environ.get("WHISPER_CPU_THREADS", 0))  # 0 = library default
+WHISPER_NUM_WORKERS = int(os.environ.get("WHISPER_NUM_WORKERS", 1))  # concurrent transcriptions
+WHISPER_BEAM_SIZE = int(os.environ.get("WHISPER_BEAM_SIZE", 1))
+
+# Deadline for one transcription, queueing included; voice commands get a tighter one
+ASR_TIMEOUT_S = float(os.environ.get("ASR_TIMEOUT_S", 10))
+ASR_COMMAND_TIMEOUT_S = float(os.environ.get("ASR_COMMAND_TIMEOUT_S", 4))
+# Engine tried when the primary fails, times out or has its circuit open ("" = none)
+ASR_FALLBACK_ENGINE = os.environ.get("ASR_FALLBACK_ENGINE", "").lower()
+# Time before the deadline kept for the fallback: a primary still silent by then gets the fallback
+# alongside it, so a stalled primary cannot use up the whole deadline (0 = fallback only on failure)
+ASR_FALLBACK_BUDGET_S = float(os.environ.get("ASR_FALLBACK_BUDGET_S", 1.5))
+# Start the fallback alongside the primary if it has not answered after this long (0 = off)
+ASR_HEDGE_MS = float(os.environ.get("ASR_HEDGE_MS", 0))
+# Consecutive failures that open an engine's circuit, and how long it stays open before a trial call
+ASR_BREAKER_FAILURES = int(os.environ.get("ASR_BREAKER_FAILURES", 3))
+ASR_BREAKER_RESET_S = float(os.environ.get("ASR_BREAKER_RESET_S", 30))
+
+WHISPER_SAMPLE_RATE = 16000
+
+# ---------------- ENGINES ---------------- #
+
+class ASRError(RuntimeError):
+    """The engine could not produce a transcript (service down, model missing, ...)."""
+
+class ASRTimeout(ASRError):
+    """No engine answered before the request's deadline."""
+
+def read_audio_file(audio_path: Union[str, BinaryIO]) -> tuple:
+    """(mono 16-bit PCM, sample rate) of a WAV/AIFF/FLAC file, given as a path or an in-memory file object."""
+    with sr.AudioFile(audio_path) as source:
+        audio = sr.Recognizer().record(source)
+    return audio.get_raw_data(convert_width=2), audio.sample_rate
+
+class ASREngine(ABC):
+    """
+    Speech-to-text over raw mono 16-bit PCM. transcribe() returns "" when
+    nothing intelligible was said and raises ASRError when the engine itself
+    failed, so failures are never mistaken for speech.
+    """
+    name = "base"
+
+    def load(self):
+        """Load models up front so the first request does not pay for it."""
+
+    @abstractmethod
+    def transcribe(self, pcm: bytes, sample_rate: int) -> str:
+        ...
+
+class GoogleASREngine(ASREngine):
+    """The Google Web Speech API via SpeechRecognition; one network round trip per call."""
+    name = "google"
+
+    def __init__(self, language: str = ASR_LANGUAGE):
+        self.language = language
+
+    def transcribe(self, pcm: bytes, sample_rate: int) -> str:
+        try:
+            recognizer = sr.Recognizer()
+            # Bounds the socket even when the caller has stopped waiting, so abandoned threads finish
+            recognizer.operation_timeout = ASR_TIMEOUT_S
+            audio = sr.AudioData(pcm, sample_rate, 2)
+            return recognizer.recognize_google(audio, language=self.language)  # type: ignore
+        except sr.UnknownValueError:
+            return ""
+        except sr.RequestError as e:
+            raise ASRError(f"Speech recognition service is unavailable: {e}") from e
+
+class VoskASREngine(ASREngine):
+    """Offline Kaldi recognizer; the model is shared, each call gets its own cheap recognizer."""
+    name = "vosk"
+
+    def __init__(self, model_path: str = VOSK_MODEL_PATH):
+        self.model_path = model_path
+        self.model = None
+
+    def load(self):
+        try:
+            import vosk
+        except ImportError as e:
+            raise ASRError("ASR_ENGINE=vosk needs the vosk package (pip install vosk)") from e
+        if not os.path.isdir(self.model_path):
+            raise ASRError(f"Vosk model not found at {self.model_path} (set VOSK_MODEL_PATH)")
+        vosk.SetLogLevel(-1)
+        self.model = vosk.Model(self.model_path)
+
+    def transcribe(self, pcm: bytes, sample_rate: int) -> str:
+        import vosk
+        recognizer = vosk.KaldiRecognizer(self.model, sample_rate)
+        recognizer.AcceptWaveform(pcm)
+        return json.loads(recognizer.FinalResult()).get("text", "").strip()
+
+class WhisperASREngine(ASREngine):
+    """faster-whisper (CTranslate2) on CPU; audio is resampled to 16 kHz float32 in memory."""
+    name = "whisper"
+
+    def __init__(self, model: str = WHISPER_MODEL, compute_type: str = WHISPER_COMPUTE_TYPE,
+                 cpu_threads: int = WHISPER_CPU_THREADS, num_workers: int = WHISPER_NUM_WORKERS,
+                 beam_size: int = WHISPER_BEAM_SIZE, language: str = ASR_LANGUAGE):
+        self.model_name = model
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads
+        self.num_workers = num_workers
+        self.beam_size = beam_size
+        self.language = language.split("-")[0].lower()
+        self.model = None
+
+    def load(self):
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError as e:
+            raise ASRError("ASR_ENGINE=whisper needs the faster-whisper package (pip install faster-whisper)") from e
+        self.model = WhisperModel(self.model_name, device="cpu", compute_type=self.compute_type,
+                                  cpu_threads=self.cpu_threads, num_workers=self.num_workers)
+
+    def transcribe(self, pcm: bytes, sample_rate: int) -> str:
+        audio = np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0
+        if sample_rate != WHISPER_SAMPLE_RATE and audio.size:
+            length = int(round(audio.size * WHISPER_SAMPLE_RATE / sample_rate))
+            audio = np.interp(np.linspace(0, audio.size - 1, length), np.arange(audio.size), audio).astype(np.float32)
+        segments, _ = self.model.transcribe(audio, language=self.language, beam_size=self.beam_size,  # type: ignore
+                                            vad_filter=False, condition_on_previous_text=False)
+        return " ".join(segment.text.strip() for segment in segments).strip()
+
+ENGINES = {
+    GoogleASREngine.name: GoogleASREngine,
+    VoskASREngine.name: VoskASREngine,
+    WhisperASREngine.name: WhisperASREngine
+}
+
+_engines: Dict[str, ASREngine] = {}
+_engines_lock = threading.Lock()
+
+def get_asr_engine(name: Optional[str] = None) -> ASREngine:
+    """The warm engine for name (default ASR_ENGINE), created and loaded on first use."""
+    name = (name or ASR_ENGINE).lower()
+    engine = _engines.get(name)
+    if engine is not None:
+        return engine
+    with _engines_lock:
+        if name not in _engines:
+            if name not in ENGINES:
+                raise ASRError(f"Unknown ASR engine '{name}', expected one of {sorted(ENGINES)}")
+            engine = ENGINES[name]()
+            start = time.perf_counter()
+            engine.load()
+            logger.info(f"ASR engine '{name}' ready in {time.perf_counter() - start:.2f}s")
+            _engines[name] = engine
+        return _engines[name]
+
+# ---------------- ROUTING ---------------- #
+
+class CircuitBreaker:
+    """
+    Opens after `failures` consecutive failures and rejects calls for reset_s;
+    then lets a single trial call through, which closes it again on success.
+    Used from the event loop only.
+    """
+
+    def __init__(self, failures: int = ASR_BREAKER_FAILURES, reset_s: float = ASR_BREAKER_RESET_S):
+        self.failures = max(1, failures)
+        self.reset_s = reset_s
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self._trial = False
+
+    def allow(self) -> bool:
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_s:
+            self.state = "half_open"
+        if self.state == "half_open":
+            if self._trial:
+                return False
+            self._trial = True
+        return self.state != "open"
+
+    def release(self):
+        """A call was abandoned without an outcome (e.g. lost a hedge race)."""
+        self._trial = False
+
+    def record_success(self):
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self._trial = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self._trial = False
+        if self.state == "half_open" or self.consecutive_failures >= self.failures:
+            if self.state != "open":
+                self.trips += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        return {"state": self.state, "consecutive_failures": self.consecutive_failures, "trips": self.trips}
+
+class ASRRouter:
+    """
+    Deadline-bounded transcription over a primary engine and an optional
+    fallback, each behind its own circuit breaker. Primary calls run on
+    executor; fallback calls and file decoding run on fallback_executor, so
+    that primary threads still stuck in abandoned calls cannot hold them up.
+    The fallback starts when the primary fails, is short-circuited, or has not
+    answered once only fallback_budget_s of the deadline is left (or, with
+    hedging, after hedge_ms if that comes first), and the first transcript wins.
+    A call that misses its deadline raises ASRTimeout and counts as a
+    failure; its thread is abandoned, not interrupted.
+    """
+
+    def __init__(self, executor: Executor, primary: str = ASR_ENGINE, fallback: Optional[str] = ASR_FALLBACK_ENGINE,
+                 timeout_s: float = ASR_TIMEOUT_S, hedge_ms: float = ASR_HEDGE_MS,
+                 breaker_failures: int = ASR_BREAKER_FAILURES, breaker_reset_s: float = ASR_BREAKER_RESET_S,
+                 fallback_executor: Optional[Executor] = None, fallback_budget_s: float = ASR_FALLBACK_BUDGET_S):
+        self.executor = executor
+        self.fallback_executor = fallback_executor or executor
+        self.primary = primary.lower()
+        self.fallback = fallback.lower() if fallback and fallback.lower() != self.primary else None
+        self.timeout_s = timeout_s
+        self.hedge_s = max(0.0, hedge_ms) / 1000.0
+        self.fallback_budget_s = max(0.0, fallback_budget_s)
+        engines = [self.primary] + ([self.fallback] if self.fallback else [])
+        self.breakers = {name: CircuitBreaker(breaker_failures, breaker_reset_s) for name in engines}
+        self.wins = {name: 0 for name in engines}
+        self.calls = 0
+        self.hedges = 0
+        self.fallbacks = 0
+        self.short_circuits = 0
+        self.timeouts = 0
+        self.errors = 0
+
+    async def _attempt(self, name: str, pcm: bytes, sample_rate: int) -> str:
+        breaker = self.breakers[name]
+        executor = self.executor if name == self.primary else self.fallback_executor
+        try:
+            text = await executor.run(lambda: get_asr_engine(name).transcribe(pcm, sample_rate))  # type: ignore
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+        breaker.record_success()
+        return text
+
+    async def transcribe(self, pcm: bytes, sample_rate: int, timeout: Optional[float] = None) -> str:
+        """Transcript of raw mono 16-bit PCM within timeout seconds (default timeout_s)."""
+        loop = asyncio.get_running_loop()
+        timeout = self.timeout_s if timeout is None else timeout
+        started = loop.time()
+        deadline = started + timeout
+        self.calls += 1
+        if timeout <= 0:
+            # Nothing can answer in time; not the engines' fault, so no breaker is charged
+            self.timeouts += 1
+            raise ASRTimeout("No time left for speech recognition.")
+        tasks: Dict[asyncio.Task, str] = {}
+        backups = [self.fallback] if self.fallback else []
+        # When a still-running primary gets the fallback alongside it
+        hedge_at = deadline - self.fallback_budget_s if self.fallback_budget_s else deadline
+        if self.hedge_s:
+            hedge_at = min(hedge_at, started + self.hedge_s)
+        hedge_at = max(started, hedge_at)
+        last_error: Optional[BaseException] = None
+
+        def start(name: str):
+            if self.breakers[name].allow():
+                tasks[loop.create_task(self._attempt(name, pcm, sample_rate))] = name
+            else:
+                self.short_circuits += 1
+
+        start(self.primary)
+        try:
+            while True:
+                if not tasks and backups:
+                    self.fallbacks += 1
+                    start(backups.pop())
+                    continue
+                if not tasks:
+                    self.errors += 1
+                    raise last_error or ASRError("Speech recognition is unavailable (circuit open).")
+                now = loop.time()
+                if now >= deadline:
+                    break
+                wait_until = deadline
+                if backups and hedge_at < deadline:
+                    wait_until = min(wait_until, hedge_at)
+                done, _ = await asyncio.wait(list(tasks), timeout=max(0.0, wait_until - now),
+                                             return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = tasks.pop(task)
+                    try:
+                        text = task.result()
+                    except Exception as e:
+                        last_error = e
+                        continue
+                    self.wins[name] += 1
+                    return text
+                if tasks and backups and hedge_at < deadline and loop.time() >= hedge_at:
+                    self.hedges += 1
+                    start(backups.pop())
+            self.timeouts += 1
+            for name in tasks.values():
+                self.breakers[name].record_failure()
+            raise ASRTimeout(f"Speech recognition did not answer within {timeout:g}s.")
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def transcribe_file(self, audio: Union[str, BinaryIO], timeout: Optional[float] = None) -> str:
+        """transcribe() for an audio file; decoding counts against the same deadline."""
+        timeout = self.timeout_s if timeout is None else timeout
+        start = time.monotonic()
+        pcm, sample_rate = await self.fallback_executor.run(read_audio_file, audio)  # type: ignore
+        return await self.transcribe(pcm, sample_rate, max(0.0, timeout - (time.monotonic() - start)))
+
+    def stats(self) -> dict:
+        return {
+            "primary": self.primary,
+            "fallback": self.fallback,
+            "timeout_s": self.timeout_s,
+            "hedge_ms": self.hedge_s * 1000.0,
+            "fallback_budget_s": self.fallback_budget_s,
+            "calls": self.calls,
+            "wins": dict(self.wins),
+            "hedges": self.hedges,
+            "fallbacks": self.fallbacks,
+            "short_circuits": self.short_circuits,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "breakers": {name: breaker.stats() for name, breaker in self.breakers.items()}
+        }
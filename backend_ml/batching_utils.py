@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import os
+from concurrent.futures import Executor
+from typing import Any, Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# ---------------- CONFIG ---------------- #
+
+EMOTION_BATCH_MAX_SIZE = int(os.environ.get("EMOTION_BATCH_MAX_SIZE", 32))
+EMOTION_BATCH_MAX_WAIT_MS = float(os.environ.get("EMOTION_BATCH_MAX_WAIT_MS", 5))
+
+# ---------------- MICRO-BATCHER ---------------- #
+
+class MicroBatcher:
+    """
+    Collects concurrent submissions and runs them through a batch function
+    (list of items -> list of results) once max_batch_size items are waiting or
+    max_wait_ms has passed since the first one, whichever comes first.
+    Each caller awaits only its own result.
+    """
+
+    def __init__(self, batch_fn: Callable[[List[Any]], List[Any]], max_batch_size: int = EMOTION_BATCH_MAX_SIZE,
+                 max_wait_ms: float = EMOTION_BATCH_MAX_WAIT_MS, executor: Optional[Executor] = None):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.executor = executor
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.items = 0
+
+    def _ensure_started(self):
+        if self._worker is None or self._worker.done():
+            if self._worker is not None:
+                # The worker died; its queued callers would otherwise wait forever
+                self._fail_queued(RuntimeError("Micro-batch worker stopped before running this item."))
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    def _fail_queued(self, error: BaseException):
+        while self._queue is not None and not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(error)
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its result."""
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))  # type: ignore
+        return await future
+
+    async def _collect(self) -> List[Tuple[Any, asyncio.Future]]:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]  # type: ignore
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())  # type: ignore
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))  # type: ignore
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            items = [item for item, _ in batch]
+            try:
+                if self.executor is not None:
+                    results = await loop.run_in_executor(self.executor, self.batch_fn, items)
+                else:
+                    results = self.batch_fn(items)
+                results = list(results)
+                if len(results) != len(batch):
+                    logger.warning(f"Micro-batch of {len(items)} returned {len(results)} results")
+                for (_, future), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+                for _, future in batch[len(results):]:
+                    if not future.done():
+                        future.set_exception(RuntimeError(
+                            f"Batch function returned {len(results)} results for {len(items)} items."))
+            except asyncio.CancelledError:
+                for _, future in batch:
+                    future.cancel()
+                raise
+            except Exception as e:
+                logger.warning(f"Micro-batch of {len(items)} failed: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            self.batches += 1
+            self.items += len(items)
+
+    def stats(self) -> dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else None
+        }
+
+    async def close(self):
+        """Stop the worker task; pending callers are cancelled."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        while self._queue is not None and not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            future.cancel()
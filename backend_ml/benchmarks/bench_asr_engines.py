@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark: speech recognition latency per ASR engine on the same WAV set,
+e.g. the Google Web Speech API (network) against local Vosk / faster-whisper
+models. Model load time is reported separately, since the server pays it
+once at startup; every file is transcribed --repeat times per engine.
+
+Engines that are not installed or configured (VOSK_MODEL_PATH,
+WHISPER_MODEL, network access) are reported and skipped.
+
+Run from backend_ml/:
+    python benchmarks/bench_asr_engines.py --wav-dir samples/ --engines google vosk whisper
+"""
+
+import argparse
+import glob
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from asr_utils import ENGINES, ASRError  # noqa: E402
+from speech_utils import read_audio_file  # noqa: E402
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--wav-dir", required=True, help="directory of WAV files")
+    parser.add_argument("--engines", nargs="+", default=sorted(ENGINES), choices=sorted(ENGINES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--show", action="store_true", help="print each engine's transcripts")
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.wav_dir, "*.wav")))
+    if not paths:
+        parser.error(f"no .wav files in {args.wav_dir}")
+    clips = [(os.path.basename(p), *read_audio_file(p)) for p in paths]
+    audio_s = sum(len(pcm) / 2 / rate for _, pcm, rate in clips)
+    print(f"{len(clips)} files, {audio_s:.1f}s of audio, {args.repeat} runs each")
+    print(f"{'engine':>8} {'load (s)':>9} {'p50 (ms)':>9} {'p95 (ms)':>9} {'mean (ms)':>10} {'x realtime':>11} {'errors':>7}")
+
+    for name in args.engines:
+        engine = ENGINES[name]()
+        start = time.perf_counter()
+        try:
+            engine.load()
+        except ASRError as e:
+            print(f"{name:>8} skipped: {e}")
+            continue
+        load_s = time.perf_counter() - start
+
+        latencies, errors, transcripts = [], 0, {}
+        busy = 0.0
+        for _ in range(args.repeat):
+            for clip, pcm, rate in clips:
+                start = time.perf_counter()
+                try:
+                    transcripts[clip] = engine.transcribe(pcm, rate)
+                except ASRError:
+                    errors += 1
+                    continue
+                elapsed = time.perf_counter() - start
+                latencies.append(elapsed * 1000.0)
+                busy += elapsed
+        if not latencies:
+            print(f"{name:>8} {load_s:>9.2f} {'-':>9} {'-':>9} {'-':>10} {'-':>11} {errors:>7}")
+            continue
+        speed = audio_s * args.repeat / busy if busy else float("inf")
+        print(f"{name:>8} {load_s:>9.2f} {percentile(latencies, 0.5):>9.0f} {percentile(latencies, 0.95):>9.0f} "
+              f"{statistics.mean(latencies):>10.0f} {speed:>10.1f}x {errors:>7}")
+        if args.show:
+            for clip, text in transcripts.items():
+                print(f"{'':>8} {clip}: {text}")
+
+if __name__ == "__main__":
+    main()
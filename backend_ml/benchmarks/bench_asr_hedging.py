@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark: voice-command tail latency when the network ASR engine is slow.
+Simulated engines stand in for the real ones: the primary answers in
+~300 ms but with a heavy tail (--slow-rate of calls take 3-20 s) and the
+local fallback takes a steady ~400 ms. Both run on pools of the server's
+sizes (ASR_WORKERS, ASR_FALLBACK_WORKERS), so calls abandoned at the
+deadline keep their primary threads busy as they would in production.
+
+Compared: the old unbounded call, a deadline only, fallback on failure only
+(deadline + circuit breaker), the default fallback budget (fallback started
+once --fallback-budget seconds of the deadline are left), and hedging
+(fallback started after --hedge-ms). Reports p50 / p95 / p99 / max latency
+and failed requests.
+
+Run from backend_ml/:
+    python benchmarks/bench_asr_hedging.py --requests 300 --slow-rate 0.05 --hedge-ms 800
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asr_utils  # noqa: E402
+from asr_utils import ASR_FALLBACK_BUDGET_S, ASREngine, ASRError, ASRRouter  # noqa: E402
+from executor_utils import (ASR_FALLBACK_MAX_QUEUE, ASR_FALLBACK_WORKERS, ASR_MAX_QUEUE,  # noqa: E402
+                            ASR_WORKERS, BoundedExecutor)
+
+class SimulatedEngine(ASREngine):
+    def __init__(self, name: str, typical_s: float, slow_rate: float, seed: int):
+        self.name = name
+        self.typical_s = typical_s
+        self.slow_rate = slow_rate
+        self.rng = random.Random(seed)
+
+    def transcribe(self, pcm: bytes, sample_rate: int) -> str:
+        if self.rng.random() < self.slow_rate:
+            time.sleep(self.rng.uniform(3.0, 20.0))
+        else:
+            time.sleep(self.rng.uniform(0.7, 1.3) * self.typical_s)
+        return "what time is it"
+
+async def run(router: ASRRouter, requests: int, concurrency: int):
+    latencies, failed = [], 0
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one():
+        nonlocal failed
+        async with slots:
+            start = time.perf_counter()
+            try:
+                await router.transcribe(b"", 16000)
+            except ASRError:
+                failed += 1
+            latencies.append((time.perf_counter() - start) * 1000.0)
+
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return sorted(latencies), failed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--slow-rate", type=float, default=0.05, help="share of primary calls that stall")
+    parser.add_argument("--timeout", type=float, default=4.0, help="per-request deadline (s)")
+    parser.add_argument("--hedge-ms", type=float, default=800.0)
+    parser.add_argument("--fallback-budget", type=float, default=ASR_FALLBACK_BUDGET_S,
+                        help="seconds of the deadline kept for the fallback")
+    parser.add_argument("--workers", type=int, default=ASR_WORKERS, help="primary pool threads")
+    parser.add_argument("--fallback-workers", type=int, default=ASR_FALLBACK_WORKERS)
+    args = parser.parse_args()
+
+    modes = [
+        ("unbounded", dict(fallback=None, timeout_s=3600.0)),
+        ("deadline", dict(fallback=None, timeout_s=args.timeout)),
+        ("on failure", dict(fallback="local", timeout_s=args.timeout, fallback_budget_s=0.0)),
+        ("budget", dict(fallback="local", timeout_s=args.timeout, fallback_budget_s=args.fallback_budget)),
+        ("hedged", dict(fallback="local", timeout_s=args.timeout, hedge_ms=args.hedge_ms,
+                        fallback_budget_s=args.fallback_budget))
+    ]
+    print(f"{args.requests} requests, {args.concurrency} concurrent, {args.slow_rate:.0%} of primary calls stall 3-20 s, "
+          f"{args.workers} primary / {args.fallback_workers} fallback threads")
+    print(f"{'mode':>10} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} {'max (ms)':>9} {'failed':>7} {'fallback wins':>14}")
+    for name, options in modes:
+        asr_utils._engines["remote"] = SimulatedEngine("remote", 0.3, args.slow_rate, seed=1)
+        asr_utils._engines["local"] = SimulatedEngine("local", 0.4, 0.0, seed=2)
+        pool = BoundedExecutor("asr", args.workers, ASR_MAX_QUEUE)
+        fallback_pool = BoundedExecutor("asr_fallback", args.fallback_workers, ASR_FALLBACK_MAX_QUEUE)
+        router = ASRRouter(pool, primary="remote", fallback_executor=fallback_pool, **options)
+        latencies, failed = asyncio.run(run(router, args.requests, args.concurrency))
+        pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))]  # noqa: E731
+        print(f"{name:>10} {pick(0.5):>9.0f} {pick(0.95):>9.0f} {pick(0.99):>9.0f} {latencies[-1]:>9.0f} "
+              f"{failed:>7} {router.wins.get('local', 0):>14}")
+        pool.shutdown(wait=False, cancel_futures=True)
+        fallback_pool.shutdown(wait=False, cancel_futures=True)
+
+if __name__ == "__main__":
+    main()
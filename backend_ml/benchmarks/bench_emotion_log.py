@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark: emotion log rows/sec with the old open-append-close per row writer
+versus the buffered EmotionLogWriter on the CSV and SQLite stores (with and
+without fsync).
+
+"caller" is the time log_emotion takes in the request path; "end to end"
+includes flushing every row to disk. Files go to a temporary directory.
+
+Run from backend_ml/:
+    python benchmarks/bench_emotion_log.py --rows 20000
+"""
+
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logger_utils import EmotionLogWriter  # noqa: E402
+from store_utils import CsvEmotionStore, SqliteEmotionStore, LOG_HEADER  # noqa: E402
+
+def legacy_log_emotion(path: str, text: str, emotion: str, confidence: float):
+    # The per-row writer log_emotion used before buffering
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    file_exists = os.path.isfile(path)
+    with open(path, "a", newline="", encoding="utf-8") as csvfile:
+        writer = csv.writer(csvfile)
+        if not file_exists:
+            writer.writerow(LOG_HEADER)
+        writer.writerow([datetime.now().isoformat(), text, emotion, round(confidence, 2)])
+
+def measure(log, finish, rows: int):
+    latencies = np.empty(rows)
+    start = time.perf_counter()
+    for i in range(rows):
+        t = time.perf_counter()
+        log(f"message number {i}", "happy", 0.87)
+        latencies[i] = time.perf_counter() - t
+    caller = time.perf_counter() - start
+    finish()
+    total = time.perf_counter() - start
+    return rows / caller, rows / total, np.percentile(latencies * 1e6, 50), np.percentile(latencies * 1e6, 99)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{args.rows} rows")
+    print(f"{'writer':>16} {'caller rows/s':>14} {'end to end rows/s':>18} {'p50 (us)':>9} {'p99 (us)':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "legacy", "emotion_logs.csv")
+        result = measure(lambda *row: legacy_log_emotion(path, *row), lambda: None, args.rows)
+        print(f"{'per-row open':>16} {result[0]:>14.0f} {result[1]:>18.0f} {result[2]:>9.1f} {result[3]:>9.1f}")
+
+        stores = (
+            ("csv", lambda path, fsync: CsvEmotionStore(path + ".csv", fsync=fsync)),
+            ("sqlite", lambda path, fsync: SqliteEmotionStore(path + ".db", fsync=fsync, migrate_from=None))
+        )
+        for name, make_store in stores:
+            for fsync in (False, True):
+                store = make_store(os.path.join(tmp, f"{name}-{fsync}", "emotion_logs"), fsync)
+                writer = EmotionLogWriter(store, fsync=fsync)
+                result = measure(writer.write, writer.close, args.rows)
+                label = f"{name}{'+fsync' if fsync else ''}"
+                print(f"{label:>16} {result[0]:>14.0f} {result[1]:>18.0f} {result[2]:>9.1f} {result[3]:>9.1f}")
+                assert store.count() == args.rows, "buffered writer lost rows"
+
+if __name__ == "__main__":
+    main()
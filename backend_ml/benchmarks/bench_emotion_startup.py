@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Benchmark: initialize_emotion_model startup time with a cold artifact cache
+(fit + dump) versus a warm one (hash + load), as the dataset grows.
+
+Larger datasets are synthesized from ml_data.csv by appending random filler
+words to each sentence.
+
+Run from backend_ml/:
+    python benchmarks/bench_emotion_startup.py
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import model_utils  # noqa: E402
+
+SIZES = [36, 1_000, 10_000, 100_000]
+FILLER = ("today really just now again please home family doctor morning night "
+          "tired help feel think want need room door phone lunch walk").split()
+
+def synthesize(base: pd.DataFrame, rows: int, rng: random.Random) -> pd.DataFrame:
+    sampled = base.sample(n=rows, replace=rows > len(base), random_state=rng.randint(0, 1 << 30))
+    texts = [f"{t} {' '.join(rng.choices(FILLER, k=rng.randint(0, 6)))}".strip() for t in sampled["text"]]
+    return pd.DataFrame({"text": texts, "emotion": sampled["emotion"].values})
+
+def timed_init() -> float:
+    start = time.perf_counter()
+    model_utils.initialize_emotion_model()
+    return time.perf_counter() - start
+
+def main():
+    base = pd.read_csv(model_utils.ML_DATA_FILE)
+    rng = random.Random(0)
+    workdir = tempfile.mkdtemp(prefix="emotion_bench_")
+    try:
+        model_utils.EMOTION_MODEL_CACHE_DIR = os.path.join(workdir, "cache")
+        results = []
+        for rows in SIZES:
+            data_file = os.path.join(workdir, f"ml_data_{rows}.csv")
+            data = base if rows == len(base) else synthesize(base, rows, rng)
+            data.to_csv(data_file, index=False)
+            model_utils.ML_DATA_FILE = data_file
+            cold = timed_init()
+            warm = timed_init()
+            results.append((rows, cold, warm))
+
+        print(f"{'rows':>8} {'retrain (s)':>12} {'cached (s)':>11} {'speedup':>8}")
+        for rows, cold, warm in results:
+            print(f"{rows:>8} {cold:>12.3f} {warm:>11.3f} {cold / warm:>7.1f}x")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark: emotion log read paths on the CSV store versus the SQLite store
+as history grows (default 500k rows, months of heavy use).
+
+Measures a one-day window page, a per-emotion page, a filtered count, the
+tail used to seed the streak checks, the aggregate used to seed the summary
+and the CSV -> SQLite migration. Files go to a temporary directory.
+
+Run from backend_ml/:
+    python benchmarks/bench_emotion_store.py --rows 500000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from store_utils import CsvEmotionStore, SqliteEmotionStore  # noqa: E402
+
+EMOTIONS = ["happy", "sad", "anxious", "calm", "frustrated", "disoriented", "neutral"]
+
+def timed(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000.0
+
+def comparable(result):
+    # Confidence sums differ only in float summation order
+    if isinstance(result, dict):
+        return {**result, "confidence_sum": round(result["confidence_sum"], 6)}
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--days", type=int, default=90)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    first = datetime(2024, 1, 1)
+    step = timedelta(days=args.days) / args.rows
+    rows = [[(first + step * i).isoformat(), f"message {i}", rng.choice(EMOTIONS), round(rng.random(), 2)]
+            for i in range(args.rows)]
+    day_start = (first + timedelta(days=args.days // 2)).isoformat()
+    day_end = (first + timedelta(days=args.days // 2 + 1)).isoformat()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_store = CsvEmotionStore(os.path.join(tmp, "emotion_logs.csv"))
+        csv_store.append(rows)
+        csv_store.close()
+        sqlite_store = SqliteEmotionStore(os.path.join(tmp, "emotion_logs.db"), migrate_from=None)
+        start = time.perf_counter()
+        sqlite_store.import_csv(csv_store.path)
+        migrate_ms = (time.perf_counter() - start) * 1000.0
+
+        cases = [
+            ("day window, page 2", lambda s: s.query(day_start, day_end, limit=50, offset=50)),
+            ("emotion filter page", lambda s: s.query(emotion="anxious", limit=50, offset=500)),
+            ("day + emotion count", lambda s: s.count(day_start, day_end, "sad")),
+            ("tail 50", lambda s: s.tail(50)),
+            ("aggregate (startup)", lambda s: s.aggregate())
+        ]
+        print(f"{args.rows} rows over {args.days} days; CSV -> SQLite migration {migrate_ms:.0f} ms")
+        print(f"{'query':>22} {'csv (ms)':>10} {'sqlite (ms)':>12} {'speedup':>8}")
+        for name, case in cases:
+            assert comparable(case(csv_store)) == comparable(case(sqlite_store)), f"stores disagree on {name}"
+            csv_ms = timed(lambda: case(csv_store), repeat=2)
+            sqlite_ms = timed(lambda: case(sqlite_store))
+            print(f"{name:>22} {csv_ms:>10.2f} {sqlite_ms:>12.3f} {csv_ms / sqlite_ms:>7.0f}x")
+        sqlite_store.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Benchmark: face embedding throughput (frames/sec), one forward pass per crop
+versus batched forward passes through FaceEmbeddingEngine.embed_crops.
+
+Crops are random 160x160 images, so detection is not part of the measurement.
+Pass --image to also time the end-to-end recognize_face / recognize_faces_batch
+path on copies of a real photo.
+
+Run from backend_ml/:
+    python benchmarks/bench_face_batch.py --frames 128 --batch-sizes 1 8 16 32
+"""
+
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model_utils import get_embedding_engine, recognize_face, recognize_faces_batch, decode_image  # noqa: E402
+
+def fps(fn, frames: int) -> float:
+    start = time.perf_counter()
+    fn()
+    return frames / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=128)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--image", help="optional photo with a face for an end-to-end run")
+    args = parser.parse_args()
+
+    engine = get_embedding_engine()
+    rng = np.random.default_rng(0)
+    crops = [rng.random((160, 160, 3), dtype=np.float32) for _ in range(args.frames)]
+
+    single = fps(lambda: [engine.embed_crops([crop]) for crop in crops], args.frames)
+    print(f"{'mode':>14} {'frames/s':>10} {'speedup':>8}")
+    print(f"{'single':>14} {single:>10.1f} {1.0:>7.1f}x")
+    for batch_size in args.batch_sizes:
+        batched = fps(lambda: [engine.embed_crops(crops[i:i + batch_size])
+                               for i in range(0, len(crops), batch_size)], args.frames)
+        print(f"{f'batch={batch_size}':>14} {batched:>10.1f} {batched / single:>7.1f}x")
+
+    if args.image:
+        with open(args.image, "rb") as f:
+            frame = decode_image(f.read())
+        frames = [frame.copy() for _ in range(args.frames)]
+        e2e_single = fps(lambda: [recognize_face(f) for f in frames], args.frames)
+        e2e_batch = fps(lambda: recognize_faces_batch(frames), args.frames)
+        print(f"\nend-to-end (detection + embedding + match) on {args.image}:")
+        print(f"{'recognize_face':>24} {e2e_single:>10.1f} frames/s")
+        print(f"{'recognize_faces_batch':>24} {e2e_batch:>10.1f} frames/s ({e2e_batch / e2e_single:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-query latency of the resident FaceGallery versus the old
+per-embedding Python loop, for galleries of 10, 1k and 100k embeddings.
+
+Run from backend_ml/:
+    python benchmarks/bench_face_gallery.py
+"""
+
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gallery_utils import FaceGallery  # noqa: E402
+
+DIM = 128
+SIZES = [10, 1_000, 100_000]
+
+def legacy_match(query, embeddings, labels):
+    """The original recognize_face loop: two norm() calls per stored embedding."""
+    best_match, best_score = None, 0.0
+    for stored, label in zip(embeddings, labels):
+        norm_a, norm_b = np.linalg.norm(query), np.linalg.norm(stored)
+        if norm_a == 0 or norm_b == 0:
+            continue
+        score = np.dot(query, stored) / (norm_a * norm_b)
+        if score > best_score:
+            best_score, best_match = score, label
+    return best_match if best_score > 0.75 else None
+
+def time_per_call(fn, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1000.0
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'gallery':>10} {'legacy loop (ms)':>18} {'gallery (ms)':>14} {'speedup':>9}")
+    for size in SIZES:
+        embeddings = [list(v) for v in rng.standard_normal((size, DIM))]
+        labels = [f"person_{i}" for i in range(size)]
+        query = np.asarray(embeddings[size // 2]) + rng.normal(0, 0.05, DIM)
+
+        gallery = FaceGallery.from_encodings({"embeddings": embeddings, "labels": labels})
+        assert gallery.match(query)[0] == legacy_match(query, embeddings, labels)
+
+        legacy_repeats = max(1, 2000 // size)
+        legacy_ms = time_per_call(lambda: legacy_match(query, embeddings, labels), legacy_repeats)
+        gallery_ms = time_per_call(lambda: gallery.match(query, top_k=5), 200)
+        print(f"{size:>10} {legacy_ms:>18.3f} {gallery_ms:>14.3f} {legacy_ms / gallery_ms:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark: recall and latency of the IVF gallery index versus exact search.
+
+Synthetic galleries mimic enrollment: each identity contributes a few noisy
+embeddings around its own centre. Recall@1 is the fraction of queries where
+IVF returns the same best row as the exact scan.
+
+Run from backend_ml/:
+    python benchmarks/bench_face_index.py
+"""
+
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gallery_utils  # noqa: E402
+from gallery_utils import FaceGallery, IVFIndex  # noqa: E402
+
+DIM = 128
+SIZES = [1_000, 10_000, 100_000]
+PROBES = [1, 4, 8, 16, 32]
+QUERIES = 200
+SAMPLES_PER_IDENTITY = 5
+
+def synthetic_gallery(size: int, rng):
+    identities = size // SAMPLES_PER_IDENTITY
+    centres = rng.standard_normal((identities, DIM))
+    owners = np.repeat(np.arange(identities), SAMPLES_PER_IDENTITY)
+    embeddings = centres[owners] + rng.normal(0, 0.3, (size, DIM))
+    return embeddings, [f"person_{i}" for i in owners], centres
+
+def run_queries(gallery: FaceGallery, queries) -> tuple:
+    start = time.perf_counter()
+    results = [gallery.match(q, top_k=1)[1][0][0] for q in queries]
+    elapsed = (time.perf_counter() - start) / len(queries) * 1000.0
+    return results, elapsed
+
+def main():
+    rng = np.random.default_rng(0)
+    # Always let the index answer, regardless of the production size cut-over
+    gallery_utils.IVF_MIN_SIZE = 0
+
+    print(f"{'gallery':>8} {'mode':>10} {'recall@1':>9} {'ms/query':>9} {'speedup':>8}")
+    for size in SIZES:
+        embeddings, labels, centres = synthetic_gallery(size, rng)
+        owners = rng.integers(0, len(centres), QUERIES)
+        queries = centres[owners] + rng.normal(0, 0.3, (QUERIES, DIM))
+
+        gallery = FaceGallery.from_encodings({"embeddings": embeddings, "labels": labels})
+        exact, exact_ms = run_queries(gallery, queries)
+        print(f"{size:>8} {'exact':>10} {1.0:>9.3f} {exact_ms:>9.3f} {1.0:>7.1f}x")
+
+        build_start = time.perf_counter()
+        gallery.attach_index(IVFIndex())
+        build_s = time.perf_counter() - build_start
+        for n_probe in PROBES:
+            gallery.index.n_probe = n_probe
+            approx, ivf_ms = run_queries(gallery, queries)
+            recall = np.mean([a == e for a, e in zip(approx, exact)])
+            print(f"{size:>8} {f'ivf/{n_probe}':>10} {recall:>9.3f} {ivf_ms:>9.3f} {exact_ms / ivf_ms:>7.1f}x")
+        print(f"{'':>8} index build: {build_s:.2f}s, {len(gallery.index.centroids)} lists")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Benchmark: face embeddings per minute, recognizing every detected face on every
+frame vs track-then-recognize (RealTimeFaceTracker + FaceTracker).
+
+A synthetic scene stands in for the detector: people walk around the frame,
+come and go, their boxes jitter and the detector misses some of them, or
+raises for a whole frame (--detect-fail-rate; such frames count as empty). The
+recognizer is simulated too (it returns the true person, and sometimes
+nothing), so only the bookkeeping is measured: embeddings requested, tracks
+created against people actually seen, labels reported that differ from the
+truth, and tracker time per frame.
+
+Run from backend_ml/:
+    python benchmarks/bench_face_tracking.py --minutes 10 --fps 2 5 15 --people 3
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from realtime_utils import RealTimeFaceTracker  # noqa: E402
+
+WIDTH, HEIGHT = 1280, 720
+
+class Person:
+    def __init__(self, name: str, rng: random.Random):
+        self.name = name
+        self.rng = rng
+        self.size = rng.uniform(90, 200)
+        self.x = rng.uniform(0, WIDTH - self.size)
+        self.y = rng.uniform(0, HEIGHT - self.size)
+        self.vx = rng.uniform(-60, 60)  # pixels per second
+        self.vy = rng.uniform(-20, 20)
+        self.visible = True
+
+    def step(self, dt: float):
+        if self.rng.random() < dt / 40:  # leaves or comes back about every 40 s
+            self.visible = not self.visible
+        if self.rng.random() < dt / 3:
+            self.vx = self.rng.uniform(-60, 60)
+            self.vy = self.rng.uniform(-20, 20)
+        self.x = min(max(0.0, self.x + self.vx * dt), WIDTH - self.size)
+        self.y = min(max(0.0, self.y + self.vy * dt), HEIGHT - self.size)
+
+    def box(self, jitter: float) -> dict:
+        j = lambda: self.rng.gauss(0, jitter * self.size)  # noqa: E731
+        return {"x": int(self.x + j()), "y": int(self.y + j()), "w": int(self.size + j()),
+                "h": int(self.size + j()), "confidence": 0.9, "person": self.name}
+
+def run(fps: float, minutes: float, people: int, miss_rate: float, jitter: float, seed: int,
+        detect_fail_rate: float = 0.0):
+    rng = random.Random(seed)
+    crowd = [Person(f"person_{i}", rng) for i in range(people)]
+    frame = np.zeros((1, 1, 3), dtype=np.uint8)
+    counts = {"per_frame": 0, "tracked": 0, "wrong": 0, "faces": 0, "appearances": 0, "detect_errors": 0}
+    visible_before = {p.name: False for p in crowd}
+
+    recognizer_rng = random.Random(seed + 1)  # keeps the scene identical whatever gets recognized
+    detector_rng = random.Random(seed + 2)
+    current = []  # boxes the simulated detector returns for the frame being processed
+
+    def detect(frames):
+        if detector_rng.random() < detect_fail_rate:
+            counts["detect_errors"] += 1
+            raise RuntimeError("simulated detector failure")
+        return [current]
+
+    def recognize(faces):
+        counts["tracked"] += len(faces)
+        return [(box["person"], 0.85) if recognizer_rng.random() > 0.1 else (None, 0.0) for _, box in faces]
+
+    tracker = RealTimeFaceTracker(detect=detect, recognize=recognize)
+    dt = 1.0 / fps
+    tracker_s = 0.0
+    for step in range(int(minutes * 60 * fps)):
+        timestamp = step * dt
+        boxes = []
+        for person in crowd:
+            person.step(dt)
+            if person.visible and not visible_before[person.name]:
+                counts["appearances"] += 1
+            visible_before[person.name] = person.visible
+            if person.visible and rng.random() > miss_rate:
+                boxes.append(person.box(jitter))
+        counts["per_frame"] += len(boxes)
+        current = boxes
+        start = time.perf_counter()
+        faces = tracker.process_frames([frame], [timestamp])[0]
+        tracker_s += time.perf_counter() - start
+        for track, box in faces:
+            counts["faces"] += 1
+            label = RealTimeFaceTracker.describe(track, box, timestamp)["label"]
+            if label is not None and label != box["person"]:
+                counts["wrong"] += 1
+    stats = tracker.tracker.stats()
+    return counts, stats, tracker_s * 1000.0 / max(1, int(minutes * 60 * fps))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=10)
+    parser.add_argument("--fps", type=float, nargs="+", default=[2, 5, 15])
+    parser.add_argument("--people", type=int, default=3)
+    parser.add_argument("--miss-rate", type=float, default=0.1, help="chance the detector misses a visible face")
+    parser.add_argument("--jitter", type=float, default=0.04, help="box noise as a fraction of face size")
+    parser.add_argument("--detect-fail-rate", type=float, default=0.0,
+                        help="chance the detector raises instead of returning a frame's boxes")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    logging.getLogger("realtime_utils").setLevel(logging.ERROR)  # simulated detector failures are expected
+
+    print(f"{args.people} people, {args.minutes:g} min, miss rate {args.miss_rate:.0%}, jitter {args.jitter:.0%}, "
+          f"detector failures {args.detect_fail_rate:.0%}")
+    print(f"{'fps':>5} {'emb/min every frame':>20} {'emb/min tracked':>16} {'reduction':>10} "
+          f"{'tracks':>7} {'appearances':>12} {'wrong labels':>13} {'ms/frame':>9} {'detect errors':>14}")
+    for fps in args.fps:
+        counts, stats, ms_per_frame = run(fps, args.minutes, args.people, args.miss_rate, args.jitter, args.seed,
+                                          args.detect_fail_rate)
+        per_frame = counts["per_frame"] / args.minutes
+        tracked = counts["tracked"] / args.minutes
+        wrong = counts["wrong"] / max(1, counts["faces"])
+        print(f"{fps:>5g} {per_frame:>20.0f} {tracked:>16.1f} {per_frame / max(tracked, 1e-9):>9.1f}x "
+              f"{stats['tracks_created']:>7} {counts['appearances']:>12} {wrong:>12.2%} {ms_per_frame:>9.3f} "
+              f"{counts['detect_errors']:>14}")
+
+if __name__ == "__main__":
+    main()
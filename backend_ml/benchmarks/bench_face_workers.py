@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Benchmark: face recognition frames/sec in the API process versus the
+FaceWorkerPool with 1, 2, 4, ... worker processes.
+
+Frames are copies of --image (a photo with at least one face) so every
+frame exercises detection, embedding and matching. Worker start-up (model
+warm-up) is excluded from the timings.
+
+Run from backend_ml/:
+    python benchmarks/bench_face_workers.py --image faces/alice.jpg --frames 200 --workers 1 2 4
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import model_utils  # noqa: E402
+from face_worker_utils import FaceWorkerPool  # noqa: E402
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image", required=True, help="photo containing a face")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    with open(args.image, "rb") as f:
+        frame = model_utils.decode_image(f.read())
+    frames = [frame.copy() for _ in range(args.frames)]
+
+    model_utils.recognize_faces(frame)  # warm the in-process path
+    start = time.perf_counter()
+    for f in frames:
+        model_utils.recognize_faces(f)
+    baseline = args.frames / (time.perf_counter() - start)
+
+    print(f"{os.cpu_count()} CPUs, {args.frames} frames of {frame.shape[1]}x{frame.shape[0]}")
+    print(f"{'mode':>14} {'frames/s':>10} {'speedup':>8} {'per worker':>11}")
+    print(f"{'in-process':>14} {baseline:>10.1f} {1.0:>7.2f}x {'':>11}")
+    for workers in args.workers:
+        pool = FaceWorkerPool(workers=workers)
+        try:
+            # Warm every worker before timing
+            pool.recognize_many(frames[:workers * 2])
+            start = time.perf_counter()
+            pool.recognize_many(frames)
+            fps = args.frames / (time.perf_counter() - start)
+        finally:
+            pool.close()
+        print(f"{f'{workers} workers':>14} {fps:>10.1f} {fps / baseline:>7.2f}x {fps / baseline / workers:>10.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark: what a spoken reply costs before audio can start, per phrase.
+
+  per-call engine   pyttsx3.init() + synthesis on every call (the old speak())
+  warm engine       synthesis with the worker's long-lived engine
+  disk cache        phrase rendered in an earlier run, read from TTS_CACHE_DIR
+  memory cache      phrase rendered earlier in this process
+
+plus the time speak() now blocks its caller. Audio is rendered to files in a
+temporary directory, nothing is played. Needs pyttsx3 (or gTTS with
+--backend gtts, which includes a network round trip per synthesis).
+
+Run from backend_ml/:
+    python benchmarks/bench_tts_cache.py --repeat 3
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tts_utils import SpeechWorker  # noqa: E402
+
+PHRASES = [
+    "Sorry, I do not recognize this person.",
+    "This is Alice, your daughter.",
+    "According to your label, this is Bob (caregiver).",
+    "Hey mate, it’s time to sleep.",
+    "You sound anxious. It's okay, you're safe and not alone."
+]
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000.0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", default="pyttsx3", choices=["pyttsx3", "gtts"])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {"per-call engine": [], "warm engine": [], "disk cache": [], "memory cache": [], "speak() caller": []}
+        for run in range(args.repeat):
+            cache_dir = os.path.join(tmp, f"run{run}")
+            for text in PHRASES:
+                # Old path: a fresh engine for every phrase
+                results["per-call engine"].append(timed(lambda: SpeechWorker(args.backend, cache_dir=os.path.join(
+                    cache_dir, "cold"), memory_items=0)._clip(text)))
+            warm = SpeechWorker(args.backend, cache_dir=cache_dir)
+            warm._load_engine()
+            for text in PHRASES:
+                results["warm engine"].append(timed(lambda: warm._clip(text)))
+            for text in PHRASES:
+                results["memory cache"].append(timed(lambda: warm._clip(text)))
+            restarted = SpeechWorker(args.backend, cache_dir=cache_dir)
+            restarted._load_engine()
+            for text in PHRASES:
+                results["disk cache"].append(timed(lambda: restarted._clip(text)))
+            queued = SpeechWorker(args.backend, cache_dir=cache_dir, player="true")
+            for text in PHRASES:
+                results["speak() caller"].append(timed(lambda: queued.speak(text)))
+            queued.close()
+            for worker in (warm, restarted):
+                worker._stop_engine()
+
+        print(f"{len(PHRASES)} phrases x {args.repeat} runs, backend {args.backend}")
+        print(f"{'path':>16} {'mean (ms)':>10} {'max (ms)':>9}")
+        for name, values in results.items():
+            print(f"{name:>16} {statistics.mean(values):>10.2f} {max(values):>9.2f}")
+
+if __name__ == "__main__":
+    main()
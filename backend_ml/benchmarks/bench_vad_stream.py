@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark: /ws/audio-stream work for a minute of conversation sent in small
+chunks. The old protocol made every chunk its own temp file and ASR call;
+the streaming pipeline segments at silence and calls ASR once per utterance.
+
+Reports ASR calls and audio per call for both, plus how much faster than
+real time the VAD segmenter runs. Speech is synthesized (voiced tones with
+pauses over background noise), so no model or network is needed.
+
+Run from backend_ml/:
+    python benchmarks/bench_vad_stream.py --seconds 60 --chunk-ms 100
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vad_utils import Utterance, UtteranceSegmenter  # noqa: E402
+
+def conversation(seconds: float, sample_rate: int, seed: int = 0):
+    """Alternating 0.5-4 s utterances and 0.8-2 s pauses; returns PCM and the utterance count."""
+    rng = np.random.default_rng(seed)
+    parts, utterances, total = [], 0, 0.0
+    while total < seconds:
+        pause = rng.uniform(0.8, 2.0)
+        parts.append(rng.normal(0, 40, int(pause * sample_rate)))
+        speech = rng.uniform(0.5, 4.0)
+        t = np.arange(int(speech * sample_rate)) / sample_rate
+        pitch = rng.uniform(100, 250)
+        # Syllable-rate amplitude modulation so the level dips inside words
+        envelope = 0.55 + 0.45 * np.sin(2 * np.pi * 4 * t)
+        parts.append(6000 * envelope * np.sin(2 * np.pi * pitch * t) + rng.normal(0, 40, t.size))
+        utterances += 1
+        total += pause + speech
+    audio = np.clip(np.concatenate(parts), -32768, 32767).astype("<i2")
+    return audio.tobytes(), utterances
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--chunk-ms", type=int, default=100)
+    parser.add_argument("--sample-rate", type=int, default=16000)
+    args = parser.parse_args()
+
+    pcm, spoken = conversation(args.seconds, args.sample_rate)
+    chunk_bytes = args.sample_rate * args.chunk_ms // 1000 * 2
+    chunks = [pcm[i:i + chunk_bytes] for i in range(0, len(pcm), chunk_bytes)]
+    duration = len(pcm) / 2 / args.sample_rate
+
+    segmenter = UtteranceSegmenter(args.sample_rate)
+    utterances = []
+    start = time.process_time()
+    for chunk in chunks:
+        utterances += [e for e in segmenter.feed(chunk) if isinstance(e, Utterance)]
+    last = segmenter.flush()
+    if last is not None:
+        utterances.append(last)
+    cpu = time.process_time() - start
+
+    speech_s = sum(len(u.pcm) for u in utterances) / 2 / args.sample_rate
+    print(f"{duration:.0f}s of audio in {len(chunks)} chunks of {args.chunk_ms} ms, {spoken} spoken utterances")
+    print(f"{'mode':>16} {'asr calls':>10} {'audio/call (s)':>15} {'audio sent to asr (s)':>22}")
+    print(f"{'chunk per call':>16} {len(chunks):>10} {args.chunk_ms / 1000:>15.2f} {duration:>22.1f}")
+    print(f"{'vad utterances':>16} {len(utterances):>10} {speech_s / max(1, len(utterances)):>15.2f} "
+          f"{speech_s:>22.1f}")
+    print(f"segmenter cpu {cpu * 1000:.0f} ms ({duration / max(cpu, 1e-9):.0f}x real time)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark: wall-clock time to recognize faces in a long video, one sequential
+pass in this process vs time segments spread over 1/2/4/... face worker
+processes (FaceWorkerPool.recognize_video_segment + merge_segments), as
+/video-stream/face-recognition does when FACE_WORKERS > 0.
+
+By default a synthetic clip of --minutes is written to a temporary directory:
+a textured background with a few moving face-sized blobs, so the detector and
+the decoder both do real work. Pass --video to use a real recording. Workers
+are warmed up (models loaded) before timing. Needs the face models, like the
+server.
+
+Run from backend_ml/:
+    python benchmarks/bench_video_parallel.py --minutes 30 --workers 1 2 4 --interval 0.5
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import wait
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from face_worker_utils import FaceWorkerPool  # noqa: E402
+from video_face_utils import merge_segments, plan_segments, probe_video, recognize_video_faces  # noqa: E402
+
+def write_video(path: str, minutes: float, fps: float, width: int, height: int):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    rng = np.random.default_rng(0)
+    background = cv2.GaussianBlur(rng.integers(0, 255, (height, width, 3), dtype=np.uint8), (9, 9), 0)
+    for i in range(int(minutes * 60 * fps)):
+        frame = background.copy()
+        for k in range(3):
+            x = int((width - 120) * (0.5 + 0.45 * np.sin(i / (fps * (7 + 3 * k)) + k)))
+            y = int((height - 150) * (0.5 + 0.4 * np.cos(i / (fps * (11 + k)) + 2 * k)))
+            cv2.ellipse(frame, (x + 60, y + 75), (50, 65), 0, 0, 360, (140, 170, 210), -1)
+            cv2.circle(frame, (x + 40, y + 60), 7, (40, 40, 40), -1)
+            cv2.circle(frame, (x + 80, y + 60), 7, (40, 40, 40), -1)
+        writer.write(frame)
+    writer.release()
+
+def run_parallel(pool: FaceWorkerPool, path: str, interval: float) -> tuple:
+    segments = plan_segments(probe_video(path), pool.workers, interval, min_duration_s=0)
+    futures = [pool.recognize_video_segment(path, interval, start, end) for start, end in segments]
+    return merge_segments([future.result() for future in futures])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--video", help="existing video file (default: synthetic clip)")
+    parser.add_argument("--minutes", type=float, default=10)
+    parser.add_argument("--fps", type=float, default=30)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=360)
+    parser.add_argument("--interval", type=float, default=0.5, help="seconds between analysed frames")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = args.video
+        if path is None:
+            path = os.path.join(tmp_dir, "long.mp4")
+            print(f"Writing {args.minutes:g} min synthetic clip at {args.fps:g} fps, {args.width}x{args.height}...")
+            write_video(path, args.minutes, args.fps, args.width, args.height)
+        path = os.path.abspath(path)
+
+        recognize_video_faces(path, args.interval, 0.0, args.interval * 2)  # load models before timing
+        start = time.perf_counter()
+        recognitions, summary = merge_segments([recognize_video_faces(path, args.interval)])
+        sequential = time.perf_counter() - start
+        print(f"{summary['sampled_frames']} sampled frames of {summary['total_frames']}, "
+              f"{os.cpu_count()} CPUs")
+        print(f"{'mode':>12} {'segments':>9} {'time (s)':>9} {'speedup':>8} {'recognitions':>13} {'faces':>6}")
+        print(f"{'sequential':>12} {1:>9} {sequential:>9.2f} {1.0:>7.2f}x {len(recognitions):>13} "
+              f"{summary.get('tracking', {}).get('tracks_created', '-'):>6}")
+
+        for workers in args.workers:
+            pool = FaceWorkerPool(workers=workers)
+            try:
+                # Start and warm every worker process before timing
+                wait([pool.recognize_video_segment(path, args.interval, 0.0, args.interval * 2)
+                      for _ in range(workers)])
+                start = time.perf_counter()
+                recognitions, summary = run_parallel(pool, path, args.interval)
+                elapsed = time.perf_counter() - start
+            finally:
+                pool.close()
+            print(f"{f'{workers} workers':>12} {summary.get('segments', 1):>9} {elapsed:>9.2f} "
+                  f"{sequential / elapsed:>7.2f}x {len(recognitions):>13} "
+                  f"{summary.get('tracking', {}).get('tracks_created', '-'):>6}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark: time to pull analysis frames out of a video file.
+
+  read every 10th   cap.read() on every frame, keep every 10th (the old loop)
+  grab skip         VideoSampler with seeking disabled: grab() between samples
+  grab + seek       VideoSampler as the endpoints use it
+
+for each sampling interval. Only frame extraction is timed, no inference. By
+default a synthetic MPEG-4 clip is written to a temporary directory; pass
+--video to measure a real recording instead.
+
+Run from backend_ml/:
+    python benchmarks/bench_video_sampling.py --seconds 300 --fps 30 --intervals 0.5 2 10
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from video_utils import VideoSampler  # noqa: E402
+
+def write_video(path: str, seconds: float, fps: float, width: int, height: int):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    for i in range(int(seconds * fps)):
+        frame = np.roll(background, i * 4, axis=1)
+        cv2.putText(frame, str(i), (40, height // 2), cv2.FONT_HERSHEY_SIMPLEX, 3, (255, 255, 255), 6)
+        writer.write(frame)
+    writer.release()
+
+def read_every_nth(path: str, every_n: int = 10) -> int:
+    cap = cv2.VideoCapture(path)
+    count = kept = 0
+    while cap.isOpened():
+        ret, _ = cap.read()
+        if not ret:
+            break
+        if count % every_n == 0:
+            kept += 1
+        count += 1
+    cap.release()
+    return kept
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--video", help="existing video file (default: synthetic clip)")
+    parser.add_argument("--seconds", type=float, default=300)
+    parser.add_argument("--fps", type=float, default=30)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=360)
+    parser.add_argument("--intervals", type=float, nargs="+", default=[0.5, 2.0, 10.0])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = args.video
+        if path is None:
+            path = os.path.join(tmp_dir, "clip.mp4")
+            print(f"Writing {args.seconds:.0f}s synthetic clip at {args.fps:g} fps, {args.width}x{args.height}...")
+            write_video(path, args.seconds, args.fps, args.width, args.height)
+
+        start = time.perf_counter()
+        kept = read_every_nth(path)
+        baseline = time.perf_counter() - start
+        print(f"{'method':>16} {'interval':>9} {'samples':>8} {'grabbed':>8} {'seeks':>6} {'time (s)':>9} {'speedup':>8}")
+        print(f"{'read every 10th':>16} {'-':>9} {kept:>8} {'-':>8} {'-':>6} {baseline:>9.2f} {1.0:>7.1f}x")
+
+        for interval in args.intervals:
+            for name, seek_frames in (("grab skip", 0), ("grab + seek", None)):
+                kwargs = {"seek_frames": seek_frames} if seek_frames is not None else {}
+                sampler = VideoSampler(path, interval_s=interval, **kwargs)
+                start = time.perf_counter()
+                for _ in sampler:
+                    pass
+                elapsed = time.perf_counter() - start
+                print(f"{name:>16} {interval:>9g} {sampler.sampled:>8} {sampler.grabbed:>8} {sampler.seeks:>6} "
+                      f"{elapsed:>9.2f} {baseline / elapsed:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
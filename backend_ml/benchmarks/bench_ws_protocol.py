@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark: WebSocket payloads as base64 inside JSON text frames versus the
+binary frame protocol (16-byte header + raw bytes) for a camera frame and an
+audio clip.
+
+Reports bytes on the wire and the CPU time to build a message on the client
+and to turn it back into an image / WAV bytes on the server.
+
+Run from backend_ml/:
+    python benchmarks/bench_ws_protocol.py --width 1280 --height 720 --seconds 5
+"""
+
+import argparse
+import base64
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from protocol_utils import (  # noqa: E402
+    CONTENT_IMAGE, CONTENT_PCM16, CONTENT_WAV, decode_frame, encode_bgr_frame, encode_frame,
+    frame_image, frame_wav
+)
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000.0
+
+def camera_frame(width: int, height: int) -> np.ndarray:
+    # Smooth gradients plus noise compress roughly like a real camera image
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    frame = np.stack([x + 0 * y, y + 0 * x, (x + y) / 2], axis=-1)
+    frame += rng.normal(0, 8, frame.shape)
+    return np.clip(frame, 0, 255).astype(np.uint8)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--seconds", type=float, default=5.0, help="audio clip length")
+    parser.add_argument("--sample-rate", type=int, default=16000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    frame = camera_frame(args.width, args.height)
+    jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+    pcm = (np.random.default_rng(1).normal(0, 3000, int(args.seconds * args.sample_rate))
+           .astype("<i2").tobytes())
+    wav = frame_wav(decode_frame(encode_frame(CONTENT_PCM16, pcm, sample_rate=args.sample_rate)))
+
+    # Each case: (encode on the client, decode on the server), decode yields what the endpoint hands on
+    cases = [
+        ("jpeg, json+base64",
+         lambda: json.dumps({"image": base64.b64encode(jpeg).decode()}),
+         lambda m: base64.b64decode(json.loads(m)["image"])),
+        ("jpeg, binary",
+         lambda: encode_frame(CONTENT_IMAGE, jpeg, 1),
+         lambda m: frame_image(decode_frame(m))),
+        ("raw bgr, binary",
+         lambda: encode_bgr_frame(frame, 1),
+         lambda m: frame_image(decode_frame(m))),
+        ("wav, json+base64",
+         lambda: json.dumps({"audio": base64.b64encode(wav).decode()}),
+         lambda m: base64.b64decode(json.loads(m)["audio"])),
+        ("wav, binary",
+         lambda: encode_frame(CONTENT_WAV, wav, 1),
+         lambda m: frame_wav(decode_frame(m))),
+        ("pcm16, binary",
+         lambda: encode_frame(CONTENT_PCM16, pcm, 1, sample_rate=args.sample_rate),
+         lambda m: frame_wav(decode_frame(m)))
+    ]
+    print(f"{args.width}x{args.height} frame (jpeg {len(jpeg)} bytes), "
+          f"{args.seconds:g}s of {args.sample_rate} Hz audio ({len(pcm)} bytes)")
+    print(f"{'payload':>24} {'wire bytes':>11} {'encode (ms)':>12} {'decode (ms)':>12}")
+    for name, encode, decode in cases:
+        message = encode()
+        decode(message)
+        encode_ms = timed(encode, args.repeat)
+        decode_ms = timed(lambda: decode(message), args.repeat)
+        print(f"{name:>24} {len(message):>11} {encode_ms:>12.3f} {decode_ms:>12.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Load test: p50/p99 latency and throughput of emotion inference with and
+without the MicroBatcher, under N concurrent closed-loop clients.
+
+Each client sends its next text as soon as the previous answer arrives, like a
+busy /ws/emotion connection. The result cache is disabled so every request
+reaches the model.
+
+Run from backend_ml/:
+    python benchmarks/load_test_emotion_batcher.py --clients 200 --requests 20
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import model_utils  # noqa: E402
+from batching_utils import MicroBatcher  # noqa: E402
+
+CONFIGS = [(1, 0.0), (8, 2.0), (32, 2.0), (32, 5.0), (64, 10.0)]
+
+async def run(submit, clients: int, requests: int, texts):
+    latencies = []
+
+    async def client(seed: int):
+        rng = random.Random(seed)
+        for _ in range(requests):
+            start = time.perf_counter()
+            await submit(rng.choice(texts))
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(clients)))
+    elapsed = time.perf_counter() - start
+    ms = np.array(latencies) * 1000.0
+    return np.percentile(ms, 50), np.percentile(ms, 99), len(latencies) / elapsed
+
+async def main_async(args):
+    texts = [f"{t} {w}" for t in model_utils.train_emotion_model()[1]["text"] for w in ("", "now", "again", "today")]
+
+    async def unbatched(text):
+        # One model call per message, as /ws/emotion did before batching
+        result = model_utils.detect_emotion(text)
+        await asyncio.sleep(0)
+        return result
+
+    print(f"{args.clients} clients x {args.requests} requests")
+    print(f"{'mode':>22} {'p50 (ms)':>9} {'p99 (ms)':>9} {'req/s':>9}")
+    p50, p99, rps = await run(unbatched, args.clients, args.requests, texts)
+    print(f"{'unbatched':>22} {p50:>9.2f} {p99:>9.2f} {rps:>9.0f}")
+
+    for max_batch, max_wait in CONFIGS:
+        batcher = MicroBatcher(model_utils.detect_emotions, max_batch_size=max_batch, max_wait_ms=max_wait)
+        p50, p99, rps = await run(batcher.submit, args.clients, args.requests, texts)
+        stats = batcher.stats()
+        await batcher.close()
+        label = f"batch={max_batch} wait={max_wait:g}ms"
+        print(f"{label:>22} {p50:>9.2f} {p99:>9.2f} {rps:>9.0f}   avg batch {stats['avg_batch_size']}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+
+    model_utils.initialize_emotion_model()
+    model_utils.emotion_cache.max_size = 0
+    asyncio.run(main_async(args))
+
+if __name__ == "__main__":
+    main()
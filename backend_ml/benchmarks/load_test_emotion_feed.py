@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Load test: cost of /stream-emotion-feed with N connected dashboards, comparing
+the old per-client loop (summary recomputed and serialized every second by
+every client) with the shared SnapshotFeed (one snapshot per change, fanned out).
+
+Emotions are logged at --rate per second for --seconds; reported are the
+snapshot computations, CPU time spent and frames delivered.
+
+Run from backend_ml/:
+    python benchmarks/load_test_emotion_feed.py --clients 1 50 500 --seconds 5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import logger_utils  # noqa: E402
+from feed_utils import SnapshotFeed  # noqa: E402
+from store_utils import SqliteEmotionStore  # noqa: E402
+
+class CountingSummary:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return logger_utils.get_emotion_summary()
+
+async def produce(rate: float, seconds: float):
+    for i in range(int(rate * seconds)):
+        logger_utils.log_emotion(f"message {i}", "calm", 0.8)
+        await asyncio.sleep(1.0 / rate)
+
+async def legacy(clients: int, rate: float, seconds: float):
+    summary = CountingSummary()
+    frames = 0
+
+    async def client():
+        nonlocal frames
+        while True:
+            f"data: {json.dumps(summary())}\n\n"
+            frames += 1
+            await asyncio.sleep(1)
+
+    tasks = [asyncio.create_task(client()) for _ in range(clients)]
+    await produce(rate, seconds)
+    for task in tasks:
+        task.cancel()
+    return summary.calls, frames
+
+async def shared(clients: int, rate: float, seconds: float):
+    summary = CountingSummary()
+    feed = SnapshotFeed(summary)
+    logger_utils.add_log_listener(feed.notify)
+    frames = 0
+
+    async def client():
+        nonlocal frames
+        async for _ in feed.stream():
+            frames += 1
+
+    tasks = [asyncio.create_task(client()) for _ in range(clients)]
+    await produce(rate, seconds)
+    logger_utils.remove_log_listener(feed.notify)
+    await feed.close()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return summary.calls, frames
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 50, 500])
+    parser.add_argument("--rate", type=float, default=20.0, help="emotions logged per second")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        logger_utils.emotion_log = logger_utils.EmotionLogWriter(
+            SqliteEmotionStore(os.path.join(tmp, "emotion_logs.db"), migrate_from=None))
+        print(f"{args.rate:g} emotions/s for {args.seconds:g}s")
+        print(f"{'clients':>8} {'mode':>8} {'snapshots':>10} {'cpu (ms)':>9} {'frames':>8}")
+        for clients in args.clients:
+            for name, run in (("legacy", legacy), ("shared", shared)):
+                start = time.process_time()
+                snapshots, frames = asyncio.run(run(clients, args.rate, args.seconds))
+                cpu = (time.process_time() - start) * 1000.0
+                print(f"{clients:>8} {name:>8} {snapshots:>10} {cpu:>9.0f} {frames:>8}")
+        logger_utils.emotion_log.close()
+
+if __name__ == "__main__":
+    main()
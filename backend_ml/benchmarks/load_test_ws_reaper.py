@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Load test: WebSocket liveness under ConnectionManager's reaper, with short
+heartbeat / idle timeouts so a run takes seconds.
+
+Three kinds of simulated client stay connected for several idle timeouts:
+
+  listen-only   receives pushes but never sends anything, not even a pong
+                (the dashboard and caregiver listeners)
+  answering     replies {"type": "pong"} to every ping
+  dead          the peer is gone: every send stalls until WS_SEND_TIMEOUT
+
+Reported per kind: still connected at the end, closed as idle (1001),
+evicted (1008) and pings delivered. Listen-only and answering clients must
+all survive; dead ones must all be evicted.
+
+Run from backend_ml/:
+    python benchmarks/load_test_ws_reaper.py --clients 50 --idle-timeout 0.6 --seconds 3
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from connection_utils import CLOSE_EVICTED, CLOSE_IDLE, ConnectionManager  # noqa: E402
+
+class SimulatedSocket:
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.inbox: asyncio.Queue = asyncio.Queue()
+        self.close_code = None
+        self.pings = 0
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message: str):
+        if self.kind == "dead":
+            await asyncio.sleep(3600)
+        if json.loads(message).get("type") == "ping":
+            self.pings += 1
+            if self.kind == "answering":
+                self.inbox.put_nowait({"type": "websocket.receive", "text": json.dumps({"type": "pong"})})
+
+    async def receive(self) -> dict:
+        return await self.inbox.get()
+
+    async def close(self, code: int = 1000, reason: str = ""):
+        self.close_code = code
+        self.inbox.put_nowait({"type": "websocket.disconnect", "code": code})
+
+async def serve(manager: ConnectionManager, socket: SimulatedSocket):
+    """What an endpoint does: connect, then read requests until the socket goes away."""
+    if not await manager.connect(socket, topics=("alerts",)):  # type: ignore
+        return
+    try:
+        while True:
+            await manager.receive(socket)  # type: ignore
+    except Exception:
+        pass
+    finally:
+        manager.disconnect(socket)  # type: ignore
+
+async def run(clients: int, heartbeat: float, idle_timeout: float, send_timeout: float, seconds: float):
+    manager = ConnectionManager(max_connections=3 * clients, heartbeat_interval=heartbeat,
+                                idle_timeout=idle_timeout, send_timeout=send_timeout)
+    sockets = [SimulatedSocket(kind) for kind in ("listen-only", "answering", "dead") for _ in range(clients)]
+    tasks = [asyncio.create_task(serve(manager, socket)) for socket in sockets]
+    await asyncio.sleep(seconds)
+    connected = set(manager.active_connections)
+    results = {}
+    for kind in ("listen-only", "answering", "dead"):
+        group = [s for s in sockets if s.kind == kind]
+        results[kind] = {
+            "connected": sum(1 for s in group if s in connected),
+            "idle_closed": sum(1 for s in group if s.close_code == CLOSE_IDLE),
+            "evicted": sum(1 for s in group if s.close_code == CLOSE_EVICTED),
+            "pings": sum(s.pings for s in group)
+        }
+    await manager.close()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=50, help="clients of each kind")
+    parser.add_argument("--heartbeat", type=float, default=0.2, help="seconds idle before a ping")
+    parser.add_argument("--idle-timeout", type=float, default=0.6)
+    parser.add_argument("--send-timeout", type=float, default=0.3)
+    parser.add_argument("--seconds", type=float, default=3.0, help="how long the clients stay connected")
+    args = parser.parse_args()
+
+    print(f"{args.clients} clients of each kind for {args.seconds:g}s, heartbeat {args.heartbeat:g}s, "
+          f"idle timeout {args.idle_timeout:g}s, send timeout {args.send_timeout:g}s")
+    results = asyncio.run(run(args.clients, args.heartbeat, args.idle_timeout, args.send_timeout, args.seconds))
+    print(f"{'client':>12} {'connected':>10} {'idle closed':>12} {'evicted':>8} {'pings':>7}")
+    for kind, r in results.items():
+        print(f"{kind:>12} {r['connected']:>10} {r['idle_closed']:>12} {r['evicted']:>8} {r['pings']:>7}")
+    ok = (results["listen-only"]["connected"] == args.clients and results["answering"]["connected"] == args.clients
+          and results["dead"]["connected"] == 0)
+    print("OK" if ok else "FAILED: listen-only / answering clients must stay connected, dead ones must go")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Dict, Iterable, Optional, Set, Union
+from fastapi import WebSocket, WebSocketDisconnect
+
+logger = logging.getLogger(__name__)
+
+# ---------------- CONFIG ---------------- #
+
+WS_MAX_CONNECTIONS = int(os.environ.get("WS_MAX_CONNECTIONS", 100))
+# Idle connections (nothing received or delivered) are pinged this often ...
+WS_HEARTBEAT_INTERVAL = float(os.environ.get("WS_HEARTBEAT_INTERVAL", 30))
+# ... and closed once idle this long
+WS_IDLE_TIMEOUT = float(os.environ.get("WS_IDLE_TIMEOUT", 3 * WS_HEARTBEAT_INTERVAL))
+# Outgoing messages buffered per connection; a consumer this far behind is evicted
+WS_SEND_QUEUE = int(os.environ.get("WS_SEND_QUEUE", 64))
+# A single send taking longer than this evicts the connection
+WS_SEND_TIMEOUT = float(os.environ.get("WS_SEND_TIMEOUT", 10))
+
+TOPICS = ("emotion", "face", "audio", "nudges", "alerts")
+
+# Close codes: 1008 policy violation (fell behind), 1001 going away (idle), 1013 try again later (full)
+CLOSE_EVICTED, CLOSE_IDLE, CLOSE_FULL = 1008, 1001, 1013
+
+# ---------------- CONNECTION MANAGER ---------------- #
+
+class Connection:
+    """One WebSocket with its own bounded send queue drained by a writer task."""
+
+    def __init__(self, websocket: WebSocket, topics: Set[str], queue_size: int):
+        self.websocket = websocket
+        self.topics = topics
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+        self.writer: Optional[asyncio.Task] = None
+        self.connected_at = time.monotonic()
+        self.last_seen = self.connected_at  # last message received from, or delivered to, the client
+        self.sent = 0
+        self.dropped = 0
+
+class ConnectionManager:
+    """
+    Tracks WebSocket connections by topic. Sending only enqueues; every
+    connection has a writer task, so a broadcast never waits on a slow socket.
+    Consumers that fall behind are evicted. A connection is idle when nothing
+    has been received from it or delivered to it; idle ones are pinged, and
+    closed after idle_timeout. A delivered ping keeps a listen-only client (one
+    that never answers) connected, while a dead peer stalls the send and is evicted.
+    """
+
+    def __init__(self, max_connections: int = WS_MAX_CONNECTIONS, queue_size: int = WS_SEND_QUEUE,
+                 heartbeat_interval: float = WS_HEARTBEAT_INTERVAL, idle_timeout: float = WS_IDLE_TIMEOUT,
+                 send_timeout: float = WS_SEND_TIMEOUT):
+        self.active_connections: Dict[WebSocket, Connection] = {}
+        self.max_connections = max_connections
+        self.queue_size = queue_size
+        self.heartbeat_interval = heartbeat_interval
+        self.idle_timeout = idle_timeout
+        self.send_timeout = send_timeout
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._reaper: Optional[asyncio.Task] = None
+        self.sent = 0
+        self.broadcasts = 0
+        self.dropped = 0
+        self.evicted = 0
+        self.reaped = 0
+        self.rejected = 0
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._reaper is None or self._reaper.done():
+            self._loop = loop
+            self._reaper = loop.create_task(self._reap())
+
+    async def connect(self, websocket: WebSocket, topics: Iterable[str] = ()) -> bool:
+        """Accept and register a socket; returns False (and closes it) when the server is full."""
+        self._ensure_started()
+        await websocket.accept()
+        if len(self.active_connections) >= self.max_connections:
+            self.rejected += 1
+            await websocket.close(code=CLOSE_FULL)
+            logger.warning(f"WebSocket rejected, {self.max_connections} connections open")
+            return False
+        connection = Connection(websocket, {t for t in topics if t in TOPICS}, self.queue_size)
+        connection.writer = asyncio.get_running_loop().create_task(self._write(connection))
+        self.active_connections[websocket] = connection
+        logger.info(f"WebSocket connected. Total connections: {len(self.active_connections)}")
+        return True
+
+    def disconnect(self, websocket: WebSocket):
+        connection = self.active_connections.pop(websocket, None)
+        if connection is not None:
+            if connection.writer is not None:
+                connection.writer.cancel()
+            logger.info(f"WebSocket disconnected. Total connections: {len(self.active_connections)}")
+
+    async def _close(self, connection: Connection, code: int, reason: str):
+        self.disconnect(connection.websocket)
+        try:
+            await connection.websocket.close(code=code, reason=reason)
+        except Exception:
+            pass  # already gone
+
+    def _evict(self, connection: Connection, reason: str):
+        if connection.websocket not in self.active_connections:
+            return
+        self.evicted += 1
+        logger.warning(f"Evicting WebSocket consumer: {reason}")
+        # Unregister now so later broadcasts skip it; the close handshake runs in the background
+        self.disconnect(connection.websocket)
+        asyncio.get_running_loop().create_task(self._close(connection, CLOSE_EVICTED, reason))
+
+    async def _write(self, connection: Connection):
+        while True:
+            message = await connection.queue.get()
+            try:
+                await asyncio.wait_for(connection.websocket.send_text(message), self.send_timeout)
+                connection.last_seen = time.monotonic()
+                connection.sent += 1
+                self.sent += 1
+            except asyncio.TimeoutError:
+                self._evict(connection, f"send took longer than {self.send_timeout:g}s")
+                return
+            except Exception:
+                self.disconnect(connection.websocket)
+                return
+
+    def _offer(self, connection: Connection, message: str) -> bool:
+        try:
+            connection.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            connection.dropped += 1
+            self.dropped += 1
+            self._evict(connection, f"{connection.queue.maxsize} messages behind")
+            return False
+
+    async def receive(self, websocket: WebSocket) -> Union[dict, bytes]:
+        """
+        Next request from the client: a parsed JSON text frame or the raw bytes
+        of a binary frame. Pongs and subscribe/unsubscribe messages are handled
+        here; every message counts as activity.
+        """
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(code=message.get("code", 1000))
+            connection = self.active_connections.get(websocket)
+            if connection is None:
+                raise WebSocketDisconnect(code=CLOSE_EVICTED)
+            connection.last_seen = time.monotonic()
+            if message.get("bytes") is not None:
+                return message["bytes"]
+            request = json.loads(message.get("text") or "null")
+            kind = request.get("type") if isinstance(request, dict) else None
+            if kind == "pong":
+                continue
+            if kind in ("subscribe", "unsubscribe"):
+                topics = {t for t in request.get("topics", []) if t in TOPICS}
+                if kind == "subscribe":
+                    connection.topics |= topics
+                else:
+                    connection.topics -= topics
+                self._offer(connection, json.dumps({"type": "subscribed", "topics": sorted(connection.topics)}))
+                continue
+            return request
+
+    async def receive_json(self, websocket: WebSocket) -> dict:
+        """receive() for endpoints that only speak JSON; binary frames are answered with an error."""
+        while True:
+            request = await self.receive(websocket)
+            if not isinstance(request, bytes):
+                return request
+            await self.send_personal_message(json.dumps({
+                "type": "error",
+                "message": "This endpoint does not accept binary frames.",
+                "timestamp": asyncio.get_event_loop().time()
+            }), websocket)
+
+    async def send_personal_message(self, message: str, websocket: WebSocket):
+        connection = self.active_connections.get(websocket)
+        if connection is not None:
+            self._offer(connection, message)
+
+    async def broadcast(self, message: str, topic: Optional[str] = None):
+        """Queue a message for every connection (or every subscriber of topic)."""
+        self.broadcasts += 1
+        for connection in list(self.active_connections.values()):
+            if topic is None or topic in connection.topics:
+                self._offer(connection, message)
+
+    def broadcast_threadsafe(self, message: str, topic: Optional[str] = None):
+        """broadcast() from a non-async thread (e.g. the scheduler); a no-op before the first connection."""
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            asyncio.run_coroutine_threadsafe(self.broadcast(message, topic), loop)
+
+    async def _reap(self):
+        ping = json.dumps({"type": "ping"})
+        while True:
+            await asyncio.sleep(min(self.heartbeat_interval, self.idle_timeout) / 2)
+            now = time.monotonic()
+            for connection in list(self.active_connections.values()):
+                idle = now - connection.last_seen
+                if idle >= self.idle_timeout:
+                    self.reaped += 1
+                    await self._close(connection, CLOSE_IDLE, f"idle for {idle:.0f}s")
+                elif idle >= self.heartbeat_interval:
+                    self._offer(connection, ping)
+
+    def stats(self) -> dict:
+        connections = list(self.active_connections.values())
+        depths = [c.queue.qsize() for c in connections]
+        return {
+            "connections": len(connections),
+            "max_connections": self.max_connections,
+            "topics": {topic: sum(1 for c in connections if topic in c.topics) for topic in TOPICS},
+            "queue_depth": sum(depths),
+            "max_queue_depth": max(depths, default=0),
+            "queue_size": self.queue_size,
+            "sent": self.sent,
+            "broadcasts": self.broadcasts,
+            "dropped": self.dropped,
+            "evicted": self.evicted,
+            "reaped": self.reaped,
+            "rejected": self.rejected
+        }
+
+    async def close(self):
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        for connection in list(self.active_connections.values()):
+            await self._close(connection, CLOSE_IDLE, "server shutting down")
@@ -0,0 +1,111 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+# ---------------- CONFIG ---------------- #
+
+# CPU-heavy model inference (emotion, face detection/embedding)
+INFERENCE_WORKERS = int(os.environ.get("INFERENCE_WORKERS", os.cpu_count() or 4))
+INFERENCE_MAX_QUEUE = int(os.environ.get("INFERENCE_MAX_QUEUE", 64))
+# Blocking network ASR round trips
+ASR_WORKERS = int(os.environ.get("ASR_WORKERS", 8))
+ASR_MAX_QUEUE = int(os.environ.get("ASR_MAX_QUEUE", 32))
+# The ASR fallback engine and audio decoding, kept apart so stalled network calls cannot starve them
+ASR_FALLBACK_WORKERS = int(os.environ.get("ASR_FALLBACK_WORKERS", 2))
+ASR_FALLBACK_MAX_QUEUE = int(os.environ.get("ASR_FALLBACK_MAX_QUEUE", 16))
+
+# ---------------- BOUNDED EXECUTOR ---------------- #
+
+class BoundedExecutor(Executor):
+    """
+    Thread pool for blocking calls made from async handlers. At most
+    max_workers calls run and max_queue wait inside the pool; further async
+    callers wait their turn on the event loop without blocking it.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.waiting = 0
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+
+    def submit(self, fn: Callable, /, *args, **kwargs) -> Future:
+        """Submit from any thread; counted but not admission-limited."""
+        with self._lock:
+            self.queued += 1
+
+        def call():
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException:
+                with self._lock:
+                    self.running -= 1
+                    self.failed += 1
+                raise
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+            return result
+
+        return self._pool.submit(call)
+
+    def _async_slots(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.max_workers + self.max_queue)
+        return self._slots  # type: ignore
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking call in the pool and await its result."""
+        slots = self._async_slots()
+        self.waiting += 1
+        try:
+            await slots.acquire()
+        finally:
+            self.waiting -= 1
+        try:
+            return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+        finally:
+            slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self.running,
+                "queued": self.queued,
+                "waiting": self.waiting,
+                "queue_depth": self.queued + self.waiting,
+                "completed": self.completed,
+                "failed": self.failed
+            }
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        self._pool.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+inference_pool = BoundedExecutor("inference", INFERENCE_WORKERS, INFERENCE_MAX_QUEUE)
+asr_pool = BoundedExecutor("asr", ASR_WORKERS, ASR_MAX_QUEUE)
+asr_fallback_pool = BoundedExecutor("asr_fallback", ASR_FALLBACK_WORKERS, ASR_FALLBACK_MAX_QUEUE)
+
+def executor_stats() -> Dict[str, Dict[str, Any]]:
+    """Queue depth and counters for every pool."""
+    return {pool.name: pool.stats() for pool in (inference_pool, asr_pool, asr_fallback_pool)}
+
+def shutdown_executors(wait: bool = False):
+    for pool in (inference_pool, asr_pool, asr_fallback_pool):
+        pool.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,219 @@
+import asyncio
+import logging
+import multiprocessing as mp
+import os
+import queue
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# ---------------- CONFIG ---------------- #
+
+# Worker processes for face inference; 0 keeps inference in the API process
+FACE_WORKERS = int(os.environ.get("FACE_WORKERS", 0))
+# Ring slots shared with the workers (frames in flight); default 2 per worker
+FACE_WORKER_SLOTS = int(os.environ.get("FACE_WORKER_SLOTS", 0))
+# Largest frame a slot can hold without falling back to pickling (1080p BGR)
+FACE_SLOT_BYTES = int(os.environ.get("FACE_SLOT_BYTES", 1920 * 1080 * 3))
+
+# ---------------- WORKER SIDE ---------------- #
+
+_worker_shm: Optional[shared_memory.SharedMemory] = None
+_worker_slot_bytes = 0
+_worker_gallery_mtime: Optional[float] = None
+
+def _worker_init(shm_name: str, slot_bytes: int):
+    """Attach to the frame ring and warm the Facenet model once per worker process."""
+    global _worker_shm, _worker_slot_bytes
+    # Spawned workers share the parent's resource tracker, so attaching does not take ownership
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_slot_bytes = slot_bytes
+
+    import model_utils
+    model_utils.get_embedding_engine()
+    model_utils.get_face_detector()
+    _refresh_gallery()
+
+def _refresh_gallery():
+    """Reload the gallery when the API process has enrolled new faces since the last task."""
+    global _worker_gallery_mtime
+    import model_utils
+    try:
+        mtime = os.path.getmtime(model_utils.ENCODINGS_FILE)
+    except OSError:
+        mtime = None
+    if mtime != _worker_gallery_mtime:
+        model_utils._gallery = None
+        model_utils.get_gallery()
+        _worker_gallery_mtime = mtime
+
+def _run_task(task: str, frame: np.ndarray, boxes: Optional[List[dict]]):
+    import model_utils
+    _refresh_gallery()
+    if task == "detect":
+        return model_utils.detect_face_boxes([frame])[0]
+    if task == "recognize_boxes":
+        return model_utils.recognize_face_boxes([(frame, box) for box in boxes or []])
+    return model_utils.recognize_faces(frame)
+
+def _run_slot(task: str, slot: int, shape: Tuple[int, ...], dtype: str, boxes: Optional[List[dict]] = None):
+    frame = np.ndarray(shape, dtype=np.dtype(dtype), buffer=_worker_shm.buf,  # type: ignore
+                       offset=slot * _worker_slot_bytes)
+    return _run_task(task, frame, boxes)
+
+def _run_array(task: str, frame: np.ndarray, boxes: Optional[List[dict]] = None):
+    return _run_task(task, frame, boxes)
+
+def _recognize_video_segment(file_path: str, interval_s: float, start_s: float, end_s: Optional[float]):
+    import video_face_utils
+    _refresh_gallery()
+    return video_face_utils.recognize_video_faces(file_path, interval_s, start_s, end_s)
+
+# ---------------- API SIDE ---------------- #
+
+class FaceWorkerPool:
+    """
+    Pool of worker processes, each with a warm Facenet model. Frames are copied
+    into shared-memory ring slots and only (slot, shape, dtype) crosses the
+    process boundary; a slot is recycled as soon as its result arrives.
+    """
+
+    def __init__(self, workers: int = FACE_WORKERS, slots: int = FACE_WORKER_SLOTS,
+                 slot_bytes: int = FACE_SLOT_BYTES):
+        self.workers = max(1, workers)
+        self.slot_count = slots or 2 * self.workers
+        self.slot_bytes = slot_bytes
+        self._shm = shared_memory.SharedMemory(create=True, size=self.slot_count * slot_bytes)
+        self._free: "queue.Queue[int]" = queue.Queue()
+        for slot in range(self.slot_count):
+            self._free.put(slot)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=mp.get_context("spawn"),
+            initializer=_worker_init,
+            initargs=(self._shm.name, slot_bytes)
+        )
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.dropped = 0
+        self.oversized = 0
+        self.video_segments = 0
+
+    def submit(self, frame: np.ndarray, block: bool = True) -> Optional[Future]:
+        """
+        Queue a frame for recognition. Waits for a free slot when block is True;
+        otherwise returns None (and counts a drop) if every slot is in flight.
+        """
+        return self._submit("recognize", frame, None, block)
+
+    def _submit(self, task: str, frame: np.ndarray, boxes: Optional[List[dict]], block: bool) -> Optional[Future]:
+        frame = np.ascontiguousarray(frame)
+        with self._lock:
+            self.submitted += 1
+        if frame.nbytes > self.slot_bytes:
+            with self._lock:
+                self.oversized += 1
+            return self._executor.submit(_run_array, task, frame, boxes)
+
+        try:
+            slot = self._free.get(block=block)
+        except queue.Empty:
+            with self._lock:
+                self.dropped += 1
+            return None
+
+        view = np.ndarray(frame.shape, dtype=frame.dtype, buffer=self._shm.buf, offset=slot * self.slot_bytes)
+        view[...] = frame
+        del view
+        try:
+            future = self._executor.submit(_run_slot, task, slot, frame.shape, frame.dtype.str, boxes)
+        except Exception:
+            self._free.put(slot)
+            raise
+        future.add_done_callback(lambda _: self._free.put(slot))
+        return future
+
+    async def recognize(self, frame: np.ndarray) -> List[dict]:
+        """Recognize one frame from async code without blocking the event loop."""
+        future = await asyncio.get_running_loop().run_in_executor(None, self.submit, frame)
+        return await asyncio.wrap_future(future)
+
+    def recognize_many(self, frames: List[np.ndarray]) -> List[List[dict]]:
+        """Recognize frames across all workers; results come back in input order."""
+        futures = [self.submit(frame) for frame in frames]
+        return [future.result() for future in futures]  # type: ignore
+
+    def detect_face_boxes(self, frames: List[np.ndarray]) -> List[List[dict]]:
+        """Drop-in for model_utils.detect_face_boxes that runs the detector in the workers."""
+        futures = [self._submit("detect", frame, None, True) for frame in frames]
+        return [future.result() for future in futures]  # type: ignore
+
+    def recognize_face_boxes(self, faces: List[Tuple[np.ndarray, dict]]) -> List[Tuple[Optional[str], float]]:
+        """
+        Drop-in for model_utils.recognize_face_boxes that embeds in the workers.
+        Boxes of the same frame share one slot and one task.
+        """
+        frames: Dict[int, Tuple[np.ndarray, List[int]]] = {}
+        for i, (frame, _) in enumerate(faces):
+            frames.setdefault(id(frame), (frame, []))[1].append(i)
+        results: List[Tuple[Optional[str], float]] = [(None, 0.0)] * len(faces)
+        futures = [(indices, self._submit("recognize_boxes", frame, [faces[i][1] for i in indices], True))
+                   for frame, indices in frames.values()]
+        for indices, future in futures:
+            for i, (label, score) in zip(indices, future.result()):  # type: ignore
+                results[i] = (label, score)
+        return results
+
+    def recognize_video_segment(self, file_path: str, interval_s: float, start_s: float,
+                                end_s: Optional[float]) -> Future:
+        """
+        Recognize faces in one time segment of a video file in a worker, which
+        seeks to start_s and decodes only its own segment. The future resolves to
+        a video_face_utils.SegmentResult.
+        """
+        with self._lock:
+            self.video_segments += 1
+        return self._executor.submit(_recognize_video_segment, os.path.abspath(file_path), interval_s, start_s, end_s)
+
+    def frame_callback(self, on_result: Callable[[List[dict], Dict[str, Any]], None]):
+        """
+        Build a RealTimeVideoProcessor frame callback that submits frames without
+        blocking the capture thread. Frames arriving while every slot is busy are dropped.
+        """
+        def callback(frame: np.ndarray, frame_data: Dict[str, Any]):
+            future = self.submit(frame, block=False)
+            if future is None:
+                return
+
+            def deliver(done: Future):
+                try:
+                    on_result(done.result(), frame_data)
+                except Exception as e:
+                    logger.error(f"Face worker callback failed: {e}")
+
+            future.add_done_callback(deliver)
+        return callback
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "slots": self.slot_count,
+                "slots_free": self._free.qsize(),
+                "submitted": self.submitted,
+                "dropped": self.dropped,
+                "oversized": self.oversized,
+                "video_segments": self.video_segments
+            }
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._shm.close()
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,166 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, AsyncIterator, Callable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# ---------------- CONFIG ---------------- #
+
+# Comment frame sent to every subscriber this often so proxies keep the stream open
+SSE_HEARTBEAT_S = float(os.environ.get("SSE_HEARTBEAT_S", 15))
+# Frames buffered per subscriber; a subscriber whose buffer fills up is disconnected
+SSE_SUBSCRIBER_QUEUE = int(os.environ.get("SSE_SUBSCRIBER_QUEUE", 16))
+# Changes closer together than this are published as one snapshot
+SSE_MIN_INTERVAL_MS = float(os.environ.get("SSE_MIN_INTERVAL_MS", 250))
+# EventSource reconnect delay advertised to clients
+SSE_RETRY_MS = int(os.environ.get("SSE_RETRY_MS", 3000))
+
+# ---------------- SNAPSHOT FEED ---------------- #
+
+class _Subscriber:
+    def __init__(self, size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, size))
+
+    def offer(self, frame: str) -> bool:
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def end(self):
+        """Discard pending frames and tell the stream to finish."""
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+class SnapshotFeed:
+    """
+    Server-Sent Events feed of a state snapshot. notify() marks the state as
+    changed (from any thread); one publisher task then computes the snapshot
+    once, serializes it once and fans the same frame out to every subscriber.
+    """
+
+    def __init__(self, snapshot_fn: Callable[[], Any], heartbeat_s: float = SSE_HEARTBEAT_S,
+                 queue_size: int = SSE_SUBSCRIBER_QUEUE, min_interval_ms: float = SSE_MIN_INTERVAL_MS,
+                 retry_ms: int = SSE_RETRY_MS):
+        self.snapshot_fn = snapshot_fn
+        self.heartbeat_s = heartbeat_s
+        self.queue_size = queue_size
+        self.min_interval = max(0.0, min_interval_ms) / 1000.0
+        self.retry_ms = retry_ms
+        # Event ids are unique across restarts, so a stale Last-Event-ID never matches
+        self._epoch = format(int(time.time()), "x")
+        self._seq = 0
+        self._last_id: Optional[str] = None
+        self._last_data: Optional[str] = None
+        self._last_frame: Optional[str] = None
+        self._subscribers: Set[_Subscriber] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._changed: Optional[asyncio.Event] = None
+        self._tasks: list = []
+        self.published = 0
+        self.heartbeats = 0
+        self.dropped = 0
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._changed = asyncio.Event()
+            self._changed.set()  # publish the current state on start
+            self._tasks = [loop.create_task(self._publish_loop()), loop.create_task(self._heartbeat_loop())]
+
+    def notify(self, *_):
+        """Mark the snapshot as stale; safe to call from any thread."""
+        loop, changed = self._loop, self._changed
+        if loop is None or changed is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(changed.set)
+        except RuntimeError:
+            pass  # loop shut down
+
+    def _fan_out(self, frame: str):
+        for subscriber in list(self._subscribers):
+            if not subscriber.offer(frame):
+                # Slow reader: cut it loose instead of buffering without bound;
+                # EventSource reconnects and resumes with the latest snapshot
+                self._subscribers.discard(subscriber)
+                subscriber.end()
+                self.dropped += 1
+
+    async def _publish_loop(self):
+        while True:
+            await self._changed.wait()  # type: ignore
+            self._changed.clear()  # type: ignore
+            try:
+                data = json.dumps(self.snapshot_fn(), default=str)
+            except Exception as e:
+                logger.warning(f"Feed snapshot failed: {e}")
+            else:
+                if data != self._last_data:
+                    self._seq += 1
+                    self._last_id = f"{self._epoch}-{self._seq}"
+                    self._last_data = data
+                    self._last_frame = f"id: {self._last_id}\ndata: {data}\n\n"
+                    self._fan_out(self._last_frame)
+                    self.published += 1
+            # Coalesce bursts of changes into one snapshot per interval
+            await asyncio.sleep(self.min_interval)
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_s)
+            self._fan_out(": heartbeat\n\n")
+            self.heartbeats += 1
+
+    async def stream(self, last_event_id: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Frames for one client. The latest snapshot is sent on connect unless the
+        client's Last-Event-ID shows it already has it.
+        """
+        self._ensure_started()
+        subscriber = _Subscriber(self.queue_size)
+        # Taken together with subscribing, so a snapshot is never sent twice or skipped
+        first = f"retry: {self.retry_ms}\n\n"
+        if self._last_frame is not None and last_event_id != self._last_id:
+            first += self._last_frame
+        self._subscribers.add(subscriber)
+        try:
+            yield first
+            while True:
+                frame = await subscriber.queue.get()
+                if frame is None:
+                    break
+                yield frame
+        finally:
+            self._subscribers.discard(subscriber)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "last_event_id": self._last_id,
+            "published": self.published,
+            "heartbeats": self.heartbeats,
+            "dropped": self.dropped
+        }
+
+    async def close(self):
+        """End every stream and stop the background tasks."""
+        for subscriber in list(self._subscribers):
+            subscriber.end()
+        self._subscribers.clear()
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        self._loop = None
+        self._changed = None
@@ -0,0 +1,209 @@
+import os
+import threading
+import numpy as np
+from typing import List, Optional, Tuple
+
+# ---------------- CONFIG ---------------- #
+
+# Minimum cosine similarity for a gallery entry to count as a match
+RECOGNITION_THRESHOLD = float(os.environ.get("FACE_RECOGNITION_THRESHOLD", 0.75))
+
+# Search backend for the gallery: "exact" (brute-force scan) or "ivf" (approximate)
+FACE_INDEX = os.environ.get("FACE_INDEX", "exact").lower()
+# Below this size an exact scan is as fast as probing the IVF lists
+IVF_MIN_SIZE = int(os.environ.get("FACE_INDEX_MIN_SIZE", 2000))
+IVF_NPROBE = int(os.environ.get("FACE_INDEX_NPROBE", 8))
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize each row, leaving zero vectors as zeros."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+# ---------------- IVF INDEX ---------------- #
+
+class IVFIndex:
+    """
+    Inverted-file index over normalized embeddings: a spherical k-means coarse
+    quantizer whose lists hold gallery row ids. Search probes the n_probe
+    closest lists and returns their ids for exact re-ranking.
+    """
+
+    def __init__(self, n_lists: Optional[int] = None, n_probe: int = IVF_NPROBE, seed: int = 0):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.seed = seed
+        self.centroids: Optional[np.ndarray] = None
+        self.assignments = np.empty(0, dtype=np.int32)
+        self.lists: List[np.ndarray] = []
+        self.trained_size = 0
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    def __len__(self) -> int:
+        return len(self.assignments)
+
+    def _assign(self, embeddings: np.ndarray, chunk: int = 16384) -> np.ndarray:
+        """Nearest centroid (max cosine) for each row, in chunks to bound memory."""
+        out = np.empty(len(embeddings), dtype=np.int32)
+        for start in range(0, len(embeddings), chunk):
+            block = embeddings[start:start + chunk]
+            out[start:start + chunk] = np.argmax(block @ self.centroids.T, axis=1)
+        return out
+
+    def _rebuild_lists(self):
+        order = np.argsort(self.assignments, kind="stable")
+        bounds = np.searchsorted(self.assignments[order], np.arange(len(self.centroids) + 1))
+        self.lists = [order[bounds[i]:bounds[i + 1]].astype(np.int64) for i in range(len(self.centroids))]
+
+    def build(self, embeddings: np.ndarray, iterations: int = 10):
+        """Train the coarse quantizer on the gallery and assign every row."""
+        n = len(embeddings)
+        n_lists = self.n_lists or max(1, int(np.sqrt(n)))
+        n_lists = min(n_lists, n)
+        rng = np.random.default_rng(self.seed)
+
+        sample_size = min(n, 64 * n_lists)
+        sample = embeddings[rng.choice(n, sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            empty = np.bincount(labels, minlength=n_lists) == 0
+            sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            centroids = _normalize_rows(sums)
+
+        self.centroids = centroids.astype(np.float32)
+        self.assignments = self._assign(embeddings)
+        self.trained_size = n
+        self._rebuild_lists()
+
+    def add(self, vector: np.ndarray, row_id: int):
+        """Assign one new normalized row to its nearest list."""
+        list_id = int(np.argmax(self.centroids @ vector.reshape(-1)))
+        self.assignments = np.append(self.assignments, np.int32(list_id))
+        self.lists[list_id] = np.append(self.lists[list_id], np.int64(row_id))
+
+    def needs_retrain(self, size: int) -> bool:
+        """Retrain once the gallery has doubled since the centroids were fitted."""
+        return not self.is_trained or size > 2 * self.trained_size
+
+    def candidates(self, query: np.ndarray) -> np.ndarray:
+        """Row ids stored in the n_probe lists closest to the (normalized) query."""
+        n_probe = min(self.n_probe, len(self.centroids))
+        centroid_scores = self.centroids @ query
+        probe = np.argpartition(-centroid_scores, n_probe - 1)[:n_probe]
+        return np.concatenate([self.lists[i] for i in probe])
+
+    def save(self, path: str):
+        """Write the index atomically, so a process loading it never sees a partial file."""
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                np.savez(f, centroids=self.centroids, assignments=self.assignments,
+                         trained_size=self.trained_size, n_probe=self.n_probe)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @classmethod
+    def load(cls, path: str) -> "IVFIndex":
+        with np.load(path) as data:
+            index = cls(n_lists=len(data["centroids"]), n_probe=int(data["n_probe"]))
+            index.centroids = data["centroids"]
+            index.assignments = data["assignments"]
+            index.trained_size = int(data["trained_size"])
+        index._rebuild_lists()
+        return index
+
+# ---------------- FACE GALLERY ---------------- #
+
+class FaceGallery:
+    """Resident gallery of pre-normalized face embeddings and their labels."""
+
+    def __init__(self, dim: int = 128):
+        self.dim = dim
+        self.embeddings = np.empty((0, dim), dtype=np.float32)
+        self.labels = np.empty(0, dtype=object)
+        self.index: Optional[IVFIndex] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_encodings(cls, data: dict) -> "FaceGallery":
+        """Build a gallery from the {"embeddings": [...], "labels": [...]} dict stored on disk."""
+        embeddings = data.get("embeddings", [])
+        dim = len(embeddings[0]) if len(embeddings) else 128
+        gallery = cls(dim=dim)
+        if len(embeddings):
+            matrix = np.asarray(embeddings, dtype=np.float32).reshape(-1, dim)
+            gallery.embeddings = _normalize_rows(matrix)
+            gallery.labels = np.asarray(data.get("labels", []), dtype=object)
+        return gallery
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def add(self, embedding, label: str):
+        """Append a single embedding in place."""
+        vector = _normalize_rows(np.asarray(embedding, dtype=np.float32).reshape(1, self.dim))
+        with self._lock:
+            self.embeddings = np.vstack([self.embeddings, vector])
+            self.labels = np.append(self.labels, np.array([label], dtype=object))
+            if self.index is not None:
+                if self.index.needs_retrain(len(self)):
+                    self.index.build(self.embeddings)
+                else:
+                    self.index.add(vector, len(self) - 1)
+
+    def attach_index(self, index: IVFIndex) -> bool:
+        """
+        Use an IVF index for candidate selection, (re)building it if it does not
+        cover the gallery. Returns whether it was (re)built and needs saving.
+        """
+        with self._lock:
+            rebuilt = bool(len(self)) and (len(index) != len(self) or index.needs_retrain(len(self)))
+            if rebuilt:
+                index.build(self.embeddings)
+            self.index = index
+        return rebuilt
+
+    def match(self, embedding, top_k: int = 5,
+              threshold: float = RECOGNITION_THRESHOLD) -> Tuple[Optional[str], List[Tuple[str, float]]]:
+        """
+        Return the best label (or None if below threshold) and the top-k (label, score) pairs.
+        """
+        query = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        query_norm = np.linalg.norm(query)
+        if query_norm == 0:
+            return None, []
+        query = query / query_norm
+
+        with self._lock:
+            embeddings, labels = self.embeddings, self.labels
+            # add() updates the index lists in place, so probe them before another enrollment can
+            rows = self.index.candidates(query) if self.index is not None and len(labels) >= IVF_MIN_SIZE else None
+        if not len(labels):
+            return None, []
+
+        if rows is not None:
+            labels = labels[rows]
+            scores = embeddings[rows] @ query
+        else:
+            scores = embeddings @ query
+        if not len(scores):
+            return None, []
+
+        k = min(top_k, len(scores))
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        ranked = [(labels[i], round(float(scores[i]), 4)) for i in top]
+
+        best = top[0]
+        return (labels[best] if scores[best] > threshold else None), ranked
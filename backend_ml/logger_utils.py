@@ -1,54 +1,287 @@
-import csv
+import atexit
+import logging
 import os
+import queue
+import threading
+import time
+from collections import deque
 from datetime import datetime
-import pandas as pd
+from itertools import islice
+from typing import Callable, Deque, Dict, List, Optional
+from store_utils import EmotionStore, create_emotion_store, LOG_FILE, LOG_HEADER  # noqa: F401
 
-LOG_FILE = "logs/emotion_logs.csv"
+logger = logging.getLogger(__name__)
 
-def log_emotion(text: str, emotion: str, confidence: float):
-    os.makedirs("logs", exist_ok=True)
-    file_exists = os.path.isfile(LOG_FILE)
+# ---------------- CONFIG ---------------- #
 
-    with open(LOG_FILE, "a", newline="", encoding="utf-8") as csvfile:
-        writer = csv.writer(csvfile)
-        if not file_exists:
-            writer.writerow(["timestamp", "input_text", "emotion", "confidence"])
-        writer.writerow([datetime.now().isoformat(), text, emotion, round(confidence, 2)])
+# Rows waiting for the writer thread; callers block only when this is full
+EMOTION_LOG_QUEUE_SIZE = int(os.environ.get("EMOTION_LOG_QUEUE_SIZE", 10000))
+# A batch is written once this many rows are waiting ...
+EMOTION_LOG_FLUSH_ROWS = int(os.environ.get("EMOTION_LOG_FLUSH_ROWS", 256))
+# ... or this long after the first row of the batch arrived
+EMOTION_LOG_FLUSH_INTERVAL_MS = float(os.environ.get("EMOTION_LOG_FLUSH_INTERVAL_MS", 200))
+# fsync after every batch (durable across power loss, slower)
+EMOTION_LOG_FSYNC = os.environ.get("EMOTION_LOG_FSYNC", "0").lower() in ("1", "true", "yes")
+# Most recent events kept in memory for the streak and caregiver checks
+EMOTION_RECENT_WINDOW = int(os.environ.get("EMOTION_RECENT_WINDOW", 50))
 
+# ---------------- BUFFERED WRITER ---------------- #
 
-def get_emotion_summary():
-    if not os.path.exists(LOG_FILE):
-        return {
-            "total": 0,
-            "emotions": {},
-            "most_recent": None,
-            "average_confidence": None
-        }
+class EmotionLogWriter:
+    """
+    Appends emotion rows to the configured EmotionStore from a background
+    thread. Callers only enqueue; the thread writes them in batches.
+    """
 
-    df = pd.read_csv(LOG_FILE)
+    def __init__(self, store: Optional[EmotionStore] = None, max_queue: int = EMOTION_LOG_QUEUE_SIZE,
+                 flush_rows: int = EMOTION_LOG_FLUSH_ROWS, flush_interval_ms: float = EMOTION_LOG_FLUSH_INTERVAL_MS,
+                 fsync: bool = EMOTION_LOG_FSYNC):
+        self.store = store if store is not None else create_emotion_store(fsync=fsync)
+        self.flush_rows = max(1, flush_rows)
+        self.flush_interval = max(0.0, flush_interval_ms) / 1000.0
+        self.fsync = fsync
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(0, max_queue))
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.written = 0
+        self.batches = 0
+        self.failed = 0
+        self.full_waits = 0
 
-    emotion_counts = df["emotion"].value_counts().to_dict()
-    most_recent = df.iloc[-1]["emotion"]
-    avg_confidence = round(df["confidence"].mean(), 2)
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="emotion-log-writer", daemon=True)
+                self._thread.start()
 
-    return {
-        "total": len(df),
-        "emotions": emotion_counts,
-        "most_recent": most_recent,
-        "average_confidence": avg_confidence
-    }
+    def write(self, text: str, emotion: str, confidence: float) -> list:
+        """Queue one row and return it; the timestamp is taken now, not when the row hits disk."""
+        self._ensure_started()
+        row = [datetime.now().isoformat(), text, emotion, round(confidence, 2)]
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            with self._lock:
+                self.full_waits += 1
+            self._queue.put(row)
+        return row
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every row queued before this call is on disk."""
+        if self._thread is None or not self._thread.is_alive():
+            return self._queue.empty()
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        """Write everything still queued and release the store; a later write reopens it."""
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            self._queue.put(None)
+            thread.join()
+        self._thread = None
+
+    def _write_batch(self, rows: List[list]):
+        try:
+            self.store.append(rows)
+            with self._lock:
+                self.written += len(rows)
+                self.batches += 1
+        except Exception as e:
+            logger.error(f"Failed to write {len(rows)} emotion log rows: {e}")
+            with self._lock:
+                self.failed += len(rows)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            rows: List[list] = []
+            waiters: List[threading.Event] = []
+            item = self._queue.get()
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is None:
+                    stopping = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    rows.append(item)
+                # Flush requests and shutdown write the batch immediately
+                if stopping or waiters or len(rows) >= self.flush_rows:
+                    break
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if rows:
+                self._write_batch(rows)
+            for waiter in waiters:
+                waiter.set()
+        self.store.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queued": self._queue.qsize(),
+                "written": self.written,
+                "batches": self.batches,
+                "failed": self.failed,
+                "full_waits": self.full_waits,
+                "fsync": self.fsync,
+                "store": type(self.store).__name__
+            }
+
+# ---------------- RUNNING STATISTICS ---------------- #
+
+class EmotionStats:
+    """
+    Running totals behind get_emotion_summary. Seeded from the store once,
+    then updated as each row is logged, so a summary never rereads the log.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.loaded = False
+        self.total = 0
+        self.counts: Dict[str, int] = {}
+        self.confidence_sum = 0.0
+        self.most_recent: Optional[list] = None
+
+    def _add(self, timestamp: str, text: str, emotion: str, confidence: float):
+        self.total += 1
+        self.counts[emotion] = self.counts.get(emotion, 0) + 1
+        self.confidence_sum += confidence
+        self.most_recent = [timestamp, text, emotion, confidence]
+
+    def ensure_loaded(self, store: EmotionStore):
+        """Seed the totals from the store once."""
+        if self.loaded:
+            return
+        with self._lock:
+            if self.loaded:
+                return
+            totals = store.aggregate()
+            self.total = totals["total"]
+            self.counts = dict(totals["counts"])
+            self.confidence_sum = totals["confidence_sum"]
+            self.most_recent = totals["most_recent"]
+            self.loaded = True
+
+    def add(self, row: list):
+        with self._lock:
+            self._add(*row)
+
+    def summary(self) -> dict:
+        with self._lock:
+            if not self.total:
+                return {
+                    "total": 0,
+                    "emotions": {},
+                    "most_recent": None,
+                    "average_confidence": None
+                }
+            # Most frequent first, ties in order of first appearance (as value_counts did)
+            emotions = dict(sorted(self.counts.items(), key=lambda item: -item[1]))
+            return {
+                "total": self.total,
+                "emotions": emotions,
+                "most_recent": self.most_recent[2],  # type: ignore
+                "average_confidence": round(self.confidence_sum / self.total, 2)
+            }
+
+# ---------------- RECENT EVENTS ---------------- #
+
+class RecentEmotions:
+    """
+    Fixed-size ring of the latest emotion events, fed by log_emotion, so the
+    streak and caregiver checks never touch the store.
+    """
+
+    def __init__(self, size: int = EMOTION_RECENT_WINDOW):
+        self._lock = threading.Lock()
+        self.loaded = False
+        self.events: Deque[list] = deque(maxlen=max(1, size))
+
+    def ensure_loaded(self, store: EmotionStore):
+        if self.loaded:
+            return
+        with self._lock:
+            if self.loaded:
+                return
+            self.events.extend(store.tail(self.events.maxlen))  # type: ignore
+            self.loaded = True
+
+    def add(self, row: list):
+        with self._lock:
+            self.events.append(row)
+
+    def last(self, n: int) -> Optional[List[str]]:
+        """Emotions of the last n events, oldest first; None if n exceeds the ring size."""
+        if n > self.events.maxlen:  # type: ignore
+            return None
+        with self._lock:
+            return [row[2] for row in islice(reversed(self.events), n)][::-1]
+
+emotion_log = EmotionLogWriter()
+emotion_stats = EmotionStats()
+recent_emotions = RecentEmotions()
+atexit.register(emotion_log.close)
+
+def _ensure_loaded():
+    # Seed from the file before any new row is queued, so no row is counted twice
+    if not (emotion_stats.loaded and recent_emotions.loaded):
+        emotion_log.flush()
+        emotion_stats.ensure_loaded(emotion_log.store)
+        recent_emotions.ensure_loaded(emotion_log.store)
+
+def _recent(n: int) -> List[str]:
+    _ensure_loaded()
+    recent = recent_emotions.last(n)
+    if recent is None:
+        # Window larger than the ring: read the tail from the store
+        emotion_log.flush()
+        recent = [row[2] for row in emotion_log.store.tail(n)]
+    return recent
+
+# Called with each logged row (from whichever thread logged it); must not block
+_log_listeners: List[Callable[[list], None]] = []
+
+def add_log_listener(callback: Callable[[list], None]):
+    if callback not in _log_listeners:
+        _log_listeners.append(callback)
+
+def remove_log_listener(callback: Callable[[list], None]):
+    if callback in _log_listeners:
+        _log_listeners.remove(callback)
+
+def log_emotion(text: str, emotion: str, confidence: float):
+    _ensure_loaded()
+    row = emotion_log.write(text, emotion, confidence)
+    emotion_stats.add(row)
+    recent_emotions.add(row)
+    for callback in list(_log_listeners):
+        try:
+            callback(row)
+        except Exception as e:
+            logger.warning(f"Emotion log listener failed: {e}")
+
+
+def get_emotion_summary():
+    _ensure_loaded()
+    return emotion_stats.summary()
 
 
 def check_emotion_streak(target_emotion="anxious", streak_length=3):
-    if not os.path.exists(LOG_FILE):
+    recent = _recent(streak_length)
+    if not emotion_stats.total:
         return {
             "streak_detected": False,
             "recent_emotions": [],
             "count": 0
         }
 
-    df = pd.read_csv(LOG_FILE)
-    recent = df["emotion"].tail(streak_length).tolist()
     count = recent.count(target_emotion)
 
     return {
@@ -59,7 +292,8 @@ def check_emotion_streak(target_emotion="anxious", streak_length=3):
 
 
 def check_caregiver_alert(lookback: int = 5, threshold: int = 3):
-    if not os.path.exists(LOG_FILE):
+    recent = _recent(lookback)
+    if not emotion_stats.total:
         return {
             "should_alert": False,
             "distress_count": 0,
@@ -67,8 +301,6 @@ def check_caregiver_alert(lookback: int = 5, threshold: int = 3):
             "recent_emotions": []
         }
 
-    df = pd.read_csv(LOG_FILE)
-    recent = df["emotion"].tail(lookback).tolist()
     distress_emotions = ["anxious", "frustrated", "disoriented"]
 
     distress_count = sum(1 for e in recent if e in distress_emotions)
@@ -79,3 +311,24 @@ def check_caregiver_alert(lookback: int = 5, threshold: int = 3):
         "distress_emotions": distress_emotions,
         "recent_emotions": recent
     }
+
+
+def query_emotion_logs(start: Optional[str] = None, end: Optional[str] = None, emotion: Optional[str] = None,
+                       limit: int = 100, offset: int = 0, newest_first: bool = True) -> dict:
+    """
+    Page through logged events in the half-open window [start, end), optionally
+    for one emotion. start/end are ISO dates or datetimes; raises ValueError otherwise.
+    """
+    start = datetime.fromisoformat(start).isoformat() if start else None
+    end = datetime.fromisoformat(end).isoformat() if end else None
+    limit = max(0, min(limit, 1000))
+    offset = max(0, offset)
+    emotion_log.flush()
+    store = emotion_log.store
+    rows = store.query(start, end, emotion, limit=limit, offset=offset, newest_first=newest_first)
+    return {
+        "total": store.count(start, end, emotion),
+        "limit": limit,
+        "offset": offset,
+        "items": [dict(zip(LOG_HEADER, row)) for row in rows]
+    }
@@ -1,58 +1,406 @@
 import os
+import hashlib
 import pickle
+import threading
+from collections import OrderedDict
+import joblib
+import sklearn
+import cv2
+import numpy as np
 import pandas as pd
 from sklearn.pipeline import make_pipeline
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.linear_model import LogisticRegression
 from deepface import DeepFace
-from numpy import dot
-from numpy.linalg import norm
-from typing import Tuple, Optional
+from deepface.modules import preprocessing
+from typing import List, Tuple, Optional, Union
+from gallery_utils import FaceGallery, IVFIndex, FACE_INDEX, RECOGNITION_THRESHOLD
 
 # ---------------- EMOTION DETECTION ---------------- #
 
 # Global variables
 ML_DATA_FILE = "ml_data.csv"
+# Fitted pipelines are cached here, keyed by training data hash and sklearn version
+EMOTION_MODEL_CACHE_DIR = os.environ.get("EMOTION_MODEL_CACHE_DIR", "model_cache")
 model = None
 df = None
+# Fingerprint of the data/sklearn combination the current model was fitted on
+model_version: Optional[str] = None
+# Max cached emotion results; 0 disables the cache
+EMOTION_CACHE_SIZE = int(os.environ.get("EMOTION_CACHE_SIZE", 1024))
+
+class EmotionCache:
+    """Thread-safe bounded LRU of (normalized text, model version) -> (emotion, confidence)."""
+
+    def __init__(self, max_size: int = EMOTION_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple[str, Optional[str]], Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        # TfidfVectorizer lowercases and ignores extra whitespace, so this never changes a prediction
+        return " ".join(text.lower().split())
+
+    def get(self, key: Tuple[str, Optional[str]]) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Tuple[str, Optional[str]], value: Tuple[str, float]):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "model_version": model_version
+            }
+
+emotion_cache = EmotionCache()
+
+def emotion_model_fingerprint(data_file: str = ML_DATA_FILE) -> str:
+    """Content hash of the training CSV combined with the sklearn version."""
+    digest = hashlib.sha256()
+    with open(data_file, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    digest.update(f"sklearn={sklearn.__version__}".encode())
+    return digest.hexdigest()[:16]
+
+def emotion_model_artifact(fingerprint: str) -> str:
+    return os.path.join(EMOTION_MODEL_CACHE_DIR, f"emotion_model_{fingerprint}.joblib")
+
+def train_emotion_model(data_file: str = ML_DATA_FILE):
+    """Fit the TF-IDF + LogisticRegression pipeline on the emotion dataset."""
+    data = pd.read_csv(data_file)
+    pipeline = make_pipeline(
+        TfidfVectorizer(),
+        LogisticRegression()
+    )
+    pipeline.fit(data["text"], data["emotion"])
+    return pipeline, data
 
 def initialize_emotion_model():
-    """Initialize the emotion detection model."""
-    global model, df
+    """
+    Initialize the emotion detection model, loading the cached artifact when the
+    training data and sklearn version are unchanged and retraining otherwise.
+    """
+    global model, df, model_version
     
+    # Results from a previous model must never be served for the new one
+    emotion_cache.clear()
+
     if not os.path.exists(ML_DATA_FILE):
         raise FileNotFoundError(f"{ML_DATA_FILE} not found. Please provide the emotion dataset.")
 
     try:
-        df = pd.read_csv(ML_DATA_FILE)
-        
-        # Create and train pipeline
-        model = make_pipeline(
-            TfidfVectorizer(),
-            LogisticRegression()
-        )
-        model.fit(df["text"], df["emotion"])
+        fingerprint = emotion_model_fingerprint(ML_DATA_FILE)
+        artifact = emotion_model_artifact(fingerprint)
+
+        if os.path.exists(artifact):
+            try:
+                model = joblib.load(artifact)
+                df = None
+                model_version = fingerprint
+                print(f"Emotion detection model loaded from cache ({fingerprint})")
+                return
+            except Exception as e:
+                print(f"Cached emotion model unreadable, retraining: {e}")
+
+        model, df = train_emotion_model(ML_DATA_FILE)
+        model_version = fingerprint
+
+        try:
+            os.makedirs(EMOTION_MODEL_CACHE_DIR, exist_ok=True)
+            tmp_path = f"{artifact}.{os.getpid()}.tmp"
+            joblib.dump(model, tmp_path)
+            # Atomic so concurrent workers never load a half-written artifact
+            os.replace(tmp_path, artifact)
+        except Exception as e:
+            print(f"Could not cache emotion model: {e}")
         print("Emotion detection model initialized successfully!")
         
     except Exception as e:
         print(f"Error initializing emotion model: {e}")
         raise
 
-def detect_emotion(text: str) -> Tuple[str, float]:
-    """Predict emotion from text input."""
+def _require_model():
     if model is None:
         raise RuntimeError("Emotion model not initialized. Call initialize_emotion_model() first.")
+    return model
+
+def detect_emotions(texts: List[str]) -> List[Tuple[str, float]]:
+    """
+    Predict emotions for many texts with one TF-IDF transform and one predict_proba call.
+    The label is the argmax of the probabilities, so each text is scored only once.
+    Cached results are reused; only cache misses reach the model.
+    """
+    pipeline = _require_model()
+    if not texts:
+        return []
+
+    results: List[Optional[Tuple[str, float]]] = [None] * len(texts)
+    keys = [(emotion_cache.normalize(text), model_version) for text in texts]
+    pending = []
+    for i, key in enumerate(keys):
+        cached = emotion_cache.get(key) if emotion_cache.enabled else None
+        if cached is None:
+            pending.append(i)
+        else:
+            results[i] = cached
+    if not pending:
+        return results  # type: ignore
     
     try:
-        pred = model.predict([text])[0]
-        prob = max(model.predict_proba([text])[0])
-        return pred, round(prob, 2)
+        probabilities = pipeline.predict_proba([texts[i] for i in pending])
+        best = probabilities.argmax(axis=1)
+        classes = pipeline.classes_
+        for i, label_index, row in zip(pending, best, probabilities):
+            results[i] = (str(classes[label_index]), round(float(row[label_index]), 2))
+            emotion_cache.put(keys[i], results[i])  # type: ignore
+        return results  # type: ignore
     except Exception as e:
         raise RuntimeError(f"Error predicting emotion: {e}")
 
+def detect_emotion(text: str) -> Tuple[str, float]:
+    """Predict emotion from text input."""
+    return detect_emotions([text])[0]
+
+# ---------------- EMBEDDING ENGINE ---------------- #
+
+FACE_MODEL_NAME = "Facenet"
+FACE_DETECTOR_BACKEND = os.environ.get("FACE_DETECTOR_BACKEND", "opencv")
+# Face crops per forward pass in batched embedding
+FACE_BATCH_SIZE = int(os.environ.get("FACE_BATCH_SIZE", 16))
+
+# An image source: a file path, an in-memory BGR frame, or encoded image bytes
+ImageSource = Union[str, np.ndarray, bytes, bytearray, memoryview]
+
+def decode_image(data: Union[bytes, bytearray, memoryview]) -> np.ndarray:
+    """Decode encoded image bytes (JPEG/PNG/...) into a BGR frame."""
+    frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if frame is None:
+        raise ValueError("Could not decode image data.")
+    return frame
+
+class FaceEmbeddingEngine:
+    """Keeps one warm Facenet model and embeds in-memory frames without temp files."""
+
+    def __init__(self, model_name: str = FACE_MODEL_NAME, detector_backend: str = FACE_DETECTOR_BACKEND):
+        self.model_name = model_name
+        self.detector_backend = detector_backend
+        self.model = DeepFace.build_model(model_name=model_name)
+        self.input_shape = tuple(self.model.input_shape)
+        # First forward pass traces the graph; pay it here instead of on the first request
+        self.model.forward(np.zeros((1, self.input_shape[1], self.input_shape[0], 3), dtype=np.float32))
+
+    def to_frame(self, image: ImageSource) -> np.ndarray:
+        """Normalize any supported image source to a BGR frame."""
+        if isinstance(image, np.ndarray):
+            return image
+        if isinstance(image, (bytes, bytearray, memoryview)):
+            return decode_image(image)
+        if not os.path.exists(image):
+            raise FileNotFoundError(f"Image file not found: {image}")
+        frame = cv2.imread(image)
+        if frame is None:
+            raise ValueError(f"Could not read image: {image}")
+        return frame
+
+    def extract_faces(self, frame: np.ndarray, enforce_detection: bool = True) -> List[dict]:
+        """Detect and align faces; each result holds an RGB "face" crop and its "facial_area"."""
+        return DeepFace.extract_faces(
+            img_path=frame,
+            detector_backend=self.detector_backend,
+            enforce_detection=enforce_detection,
+            align=True
+        )
+
+    def preprocess(self, face_rgb: np.ndarray) -> np.ndarray:
+        """Resize and normalize an aligned RGB crop exactly as DeepFace.represent does."""
+        face = preprocessing.resize_image(
+            img=face_rgb[:, :, ::-1],
+            target_size=(self.input_shape[1], self.input_shape[0])
+        )
+        return preprocessing.normalize_input(img=face, normalization="base")
+
+    def embed_crops(self, faces: List[np.ndarray]) -> np.ndarray:
+        """Embed aligned RGB crops in a single forward pass; returns an (N, dim) array."""
+        if not faces:
+            return np.empty((0, 128), dtype=np.float32)
+        batch = np.concatenate([self.preprocess(face) for face in faces], axis=0)
+        return np.asarray(self.model.forward(batch), dtype=np.float32).reshape(len(faces), -1)
+
+    def embed(self, image: ImageSource, enforce_detection: bool = True) -> Optional[np.ndarray]:
+        """Embedding of the first detected face, or None if no face was found."""
+        faces = self.extract_faces(self.to_frame(image), enforce_detection=enforce_detection)
+        if not faces:
+            return None
+        return self.embed_crops([faces[0]["face"]])[0]
+
+    def align_face(self, frame: np.ndarray, box: dict, margin: float = 0.2) -> np.ndarray:
+        """
+        Aligned RGB crop for a detector box, re-detected on a slightly expanded region
+        so it matches how enrolled faces were cropped. Falls back to the raw box.
+        """
+        h, w = frame.shape[:2]
+        dx, dy = int(box["w"] * margin), int(box["h"] * margin)
+        x1, y1 = max(0, box["x"] - dx), max(0, box["y"] - dy)
+        x2, y2 = min(w, box["x"] + box["w"] + dx), min(h, box["y"] + box["h"] + dy)
+        region = frame[y1:y2, x1:x2]
+        try:
+            faces = self.extract_faces(region, enforce_detection=False)
+            faces = [face for face in faces if face.get("confidence", 0) > 0]
+        except ValueError:
+            faces = []
+        if faces:
+            largest = max(faces, key=lambda f: f["facial_area"]["w"] * f["facial_area"]["h"])
+            return largest["face"]
+        crop = frame[box["y"]:box["y"] + box["h"], box["x"]:box["x"] + box["w"]]
+        return crop[:, :, ::-1].astype(np.float32) / 255.0
+
+    def embed_batch(self, images: List[ImageSource], batch_size: int = FACE_BATCH_SIZE) -> List[Optional[np.ndarray]]:
+        """
+        Embed the first face of each image, stacking crops into forward passes of
+        up to batch_size. Images without a detectable face map to None.
+        """
+        crops, owners = [], []
+        for i, image in enumerate(images):
+            try:
+                faces = self.extract_faces(self.to_frame(image), enforce_detection=True)
+            except ValueError:
+                continue
+            if faces:
+                crops.append(faces[0]["face"])
+                owners.append(i)
+
+        results: List[Optional[np.ndarray]] = [None] * len(images)
+        for start in range(0, len(crops), batch_size):
+            embeddings = self.embed_crops(crops[start:start + batch_size])
+            for owner, embedding in zip(owners[start:start + batch_size], embeddings):
+                results[owner] = embedding
+        return results
+
+# ---------------- FACE DETECTION ---------------- #
+
+FACE_DETECTOR_PROTOTXT = "deploy.prototxt"
+FACE_DETECTOR_MODEL = "res10_300x300_ssd_iter_140000.caffemodel"
+FACE_DETECTION_CONFIDENCE = float(os.environ.get("FACE_DETECTION_CONFIDENCE", 0.5))
+
+class FaceDetector:
+    """Cheap OpenCV DNN SSD face detector used to gate the Facenet path."""
+
+    def __init__(self, prototxt: str = FACE_DETECTOR_PROTOTXT, model_file: str = FACE_DETECTOR_MODEL,
+                 confidence: float = FACE_DETECTION_CONFIDENCE):
+        self.net = cv2.dnn.readNetFromCaffe(prototxt, model_file)
+        self.confidence = confidence
+        # cv2.dnn.Net is not safe to share between threads
+        self._lock = threading.Lock()
+
+    def detect_batch(self, frames: List[np.ndarray]) -> List[List[dict]]:
+        """Face boxes ({"x", "y", "w", "h", "confidence"}) for each frame, from one forward pass."""
+        if not frames:
+            return []
+        blob = cv2.dnn.blobFromImages(
+            [cv2.resize(frame, (300, 300)) for frame in frames],
+            1.0, (300, 300), (104.0, 177.0, 123.0)
+        )
+        with self._lock:
+            self.net.setInput(blob)
+            detections = self.net.forward()
+
+        results: List[List[dict]] = [[] for _ in frames]
+        for image_id, _, confidence, x1, y1, x2, y2 in detections[0, 0]:
+            if confidence < self.confidence:
+                continue
+            index = int(image_id)
+            h, w = frames[index].shape[:2]
+            left, top = max(0, int(x1 * w)), max(0, int(y1 * h))
+            right, bottom = min(w, int(x2 * w)), min(h, int(y2 * h))
+            if right <= left or bottom <= top:
+                continue
+            results[index].append({
+                "x": left, "y": top, "w": right - left, "h": bottom - top,
+                "confidence": round(float(confidence), 4)
+            })
+        return results
+
+    def detect(self, frame: np.ndarray) -> List[dict]:
+        return self.detect_batch([frame])[0]
+
+_detector: Optional[FaceDetector] = None
+_detector_loaded = False
+_detector_lock = threading.Lock()
+
+def get_face_detector() -> Optional[FaceDetector]:
+    """Return the SSD face detector, or None if its model files are unavailable."""
+    global _detector, _detector_loaded
+    if not _detector_loaded:
+        with _detector_lock:
+            if not _detector_loaded:
+                try:
+                    _detector = FaceDetector()
+                except Exception as e:
+                    print(f"SSD face detector unavailable, using DeepFace detection: {e}")
+                    _detector = None
+                # Only now, so no other thread sees "loaded" while the detector is still being built
+                _detector_loaded = True
+    return _detector
+
+_engine: Optional[FaceEmbeddingEngine] = None
+_engine_lock = threading.Lock()
+
+def get_embedding_engine() -> FaceEmbeddingEngine:
+    """Return the process-wide embedding engine, loading the model the first time."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = FaceEmbeddingEngine()
+    return _engine
+
 # ---------------- FACE RECOGNITION ---------------- #
 
 ENCODINGS_FILE = "face_encodings.pkl"
+# Persisted IVF index, used when FACE_INDEX=ivf
+INDEX_FILE = os.path.splitext(ENCODINGS_FILE)[0] + ".ivf.npz"
+
+# Resident gallery, loaded once from ENCODINGS_FILE on first use
+_gallery: Optional[FaceGallery] = None
+_gallery_lock = threading.Lock()
+# Enrollment rewrites ENCODINGS_FILE and INDEX_FILE; uploads run on a thread pool, one at a time here
+_enrollment_lock = threading.Lock()
 
 def load_encodings():
     """Load stored face embeddings."""
@@ -73,83 +421,199 @@ def save_encodings(data):
     except Exception as e:
         raise RuntimeError(f"Error saving encodings: {e}")
 
-def save_labelled_face(image_path: str, label: str):
+def get_gallery() -> FaceGallery:
+    """Return the resident face gallery, loading it from disk the first time."""
+    global _gallery
+    if _gallery is None:
+        with _gallery_lock:
+            if _gallery is None:
+                gallery = FaceGallery.from_encodings(load_encodings())
+                # Loads happen in every face worker too; only a rebuilt index is written back
+                if FACE_INDEX == "ivf" and gallery.attach_index(load_index()):
+                    save_index(gallery)
+                _gallery = gallery
+    return _gallery
+
+def load_index() -> IVFIndex:
+    """Load the persisted IVF index, or return an untrained one."""
+    if os.path.exists(INDEX_FILE):
+        try:
+            return IVFIndex.load(INDEX_FILE)
+        except Exception as e:
+            print(f"Error loading face index, rebuilding: {e}")
+    return IVFIndex()
+
+def save_index(gallery: FaceGallery):
+    """Persist the gallery's IVF index next to ENCODINGS_FILE."""
+    if gallery.index is None or not gallery.index.is_trained:
+        return
+    try:
+        gallery.index.save(INDEX_FILE)
+    except Exception as e:
+        print(f"Error saving face index: {e}")
+
+def save_labelled_face(image: ImageSource, label: str):
     """
-    Detect face, extract embedding using DeepFace, and save it with label.
+    Detect face, extract embedding with the warm engine, and save it with label.
     """
-    if not os.path.exists(image_path):
-        raise FileNotFoundError(f"Image file not found: {image_path}")
+    if isinstance(image, str) and not os.path.exists(image):
+        raise FileNotFoundError(f"Image file not found: {image}")
     
-    data = load_encodings()
+    gallery = get_gallery()
 
     try:
-        embedding_obj = DeepFace.represent(
-            img_path=image_path,
-            model_name="Facenet",
-            enforce_detection=True
-        )
+        embedding = get_embedding_engine().embed(image, enforce_detection=True)
 
-        if not embedding_obj or "embedding" not in embedding_obj[0]:
+        if embedding is None:
             raise ValueError("No face detected in the image.")
 
-        embedding = embedding_obj[0]["embedding"]
-        data["embeddings"].append(embedding)
-        data["labels"].append(label)
+        embedding = embedding.tolist()
+        # Read-append-write of the encodings file, so concurrent uploads must not interleave
+        with _enrollment_lock:
+            data = load_encodings()
+            data["embeddings"].append(embedding)
+            data["labels"].append(label)
 
-        save_encodings(data)
+            save_encodings(data)
+            gallery.add(embedding, label)
+            save_index(gallery)
         print(f"Face embedding saved successfully for label: {label}")
 
     except Exception as e:
         raise ValueError(f"Error processing image: {e}")
 
-def recognize_face(image_path: str) -> Optional[str]:
+def recognize_face_topk(image: ImageSource, top_k: int = 5) -> Tuple[Optional[str], List[Tuple[str, float]]]:
     """
-    Compare a given face with stored embeddings and return matched label.
+    Compare a given face with the resident gallery and return the matched label
+    along with the top-k (label, score) candidates.
+    Accepts a file path, a BGR frame, or encoded image bytes.
     """
-    if not os.path.exists(image_path):
-        raise FileNotFoundError(f"Image file not found: {image_path}")
-    
-    data = load_encodings()
-    if not data["embeddings"]:
-        return None
+    if isinstance(image, str) and not os.path.exists(image):
+        raise FileNotFoundError(f"Image file not found: {image}")
+
+    gallery = get_gallery()
+    if not len(gallery):
+        return None, []
 
     try:
-        embedding_obj = DeepFace.represent(
-            img_path=image_path,
-            model_name="Facenet",
-            enforce_detection=True
-        )
+        embedding = get_embedding_engine().embed(image, enforce_detection=True)
 
-        if not embedding_obj or "embedding" not in embedding_obj[0]:
-            return None
+        if embedding is None:
+            return None, []
 
-        embedding = embedding_obj[0]["embedding"]
+        return gallery.match(embedding, top_k=top_k, threshold=RECOGNITION_THRESHOLD)
 
-        def cosine_similarity(a, b):
-            """Calculate cosine similarity between two vectors."""
-            norm_a = norm(a)
-            norm_b = norm(b)
-            
-            # Check for zero vectors
-            if norm_a == 0 or norm_b == 0:
-                return 0.0
-                
-            return dot(a, b) / (norm_a * norm_b)
+    except Exception as e:
+        print(f"Error recognizing face: {e}")
+        return None, []
 
-        best_match = None
-        best_score = 0.0
+def recognize_face(image: ImageSource) -> Optional[str]:
+    """
+    Compare a given face with stored embeddings and return matched label.
+    """
+    label, _ = recognize_face_topk(image, top_k=1)
+    return label
 
-        for stored_embedding, label in zip(data["embeddings"], data["labels"]):
-            score = cosine_similarity(embedding, stored_embedding)
-            if score > best_score:
-                best_score = score
-                best_match = label
+def recognize_faces_batch(frames: List[ImageSource], batch_size: int = FACE_BATCH_SIZE) -> List[Optional[str]]:
+    """
+    Recognize many frames at once, embedding their face crops in batched forward passes.
+    Returns one label (or None) per input frame, in order.
+    """
+    gallery = get_gallery()
+    if not len(gallery) or not frames:
+        return [None] * len(frames)
 
-        return best_match if best_score > 0.75 else None
+    embeddings = get_embedding_engine().embed_batch(frames, batch_size=batch_size)
+    return [
+        gallery.match(embedding, top_k=1, threshold=RECOGNITION_THRESHOLD)[0] if embedding is not None else None
+        for embedding in embeddings
+    ]
 
-    except Exception as e:
-        print(f"Error recognizing face: {e}")
-        return None
+def _detect_faces(frames: List[np.ndarray], batch_size: int) -> List[List[Tuple[dict, np.ndarray]]]:
+    """(box, aligned RGB crop) pairs per frame, gated by the SSD detector when available."""
+    engine = get_embedding_engine()
+    detector = get_face_detector()
+    detected: List[List[Tuple[dict, np.ndarray]]] = []
+
+    if detector is not None:
+        for start in range(0, len(frames), batch_size):
+            chunk = frames[start:start + batch_size]
+            for frame, boxes in zip(chunk, detector.detect_batch(chunk)):
+                detected.append([(box, engine.align_face(frame, box)) for box in boxes])
+        return detected
+
+    for frame in frames:
+        faces = engine.extract_faces(frame, enforce_detection=False)
+        detected.append([
+            ({**face["facial_area"], "confidence": round(float(face["confidence"]), 4)}, face["face"])
+            for face in faces if face.get("confidence", 0) > 0
+        ])
+    return detected
+
+def recognize_faces_in_frames(frames: List[ImageSource], batch_size: int = FACE_BATCH_SIZE) -> List[List[dict]]:
+    """
+    Detect every face in each frame and recognize them, skipping embedding entirely
+    on frames with no face. Returns, per frame, a list of
+    {"bbox": [x, y, w, h], "detection_confidence", "label", "score"}.
+    """
+    engine = get_embedding_engine()
+    gallery = get_gallery()
+    detected = _detect_faces([engine.to_frame(frame) for frame in frames], batch_size)
+
+    results = [
+        [{
+            "bbox": [box["x"], box["y"], box["w"], box["h"]],
+            "detection_confidence": box["confidence"],
+            "label": None,
+            "score": 0.0
+        } for box, _ in faces]
+        for faces in detected
+    ]
+    if not len(gallery):
+        return results
+
+    crops = [(i, j, crop) for i, faces in enumerate(detected) for j, (_, crop) in enumerate(faces)]
+    for start in range(0, len(crops), batch_size):
+        chunk = crops[start:start + batch_size]
+        embeddings = engine.embed_crops([crop for _, _, crop in chunk])
+        for (i, j, _), embedding in zip(chunk, embeddings):
+            label, ranked = gallery.match(embedding, top_k=1, threshold=RECOGNITION_THRESHOLD)
+            results[i][j]["label"] = label
+            results[i][j]["score"] = ranked[0][1] if ranked else 0.0
+    return results
+
+def detect_face_boxes(frames: List[np.ndarray], batch_size: int = FACE_BATCH_SIZE) -> List[List[dict]]:
+    """
+    Face boxes ({"x", "y", "w", "h", "confidence"}) per frame without embedding
+    anything, for trackers that recognize only some of them.
+    """
+    detector = get_face_detector()
+    if detector is not None:
+        boxes: List[List[dict]] = []
+        for start in range(0, len(frames), batch_size):
+            boxes.extend(detector.detect_batch(frames[start:start + batch_size]))
+        return boxes
+    return [[box for box, _ in faces] for faces in _detect_faces(frames, batch_size)]
+
+def recognize_face_boxes(faces: List[Tuple[np.ndarray, dict]],
+                         batch_size: int = FACE_BATCH_SIZE) -> List[Tuple[Optional[str], float]]:
+    """(label, score) for each (frame, detector box), embedding the crops in batched forward passes."""
+    gallery = get_gallery()
+    if not len(gallery) or not faces:
+        return [(None, 0.0)] * len(faces)
+    engine = get_embedding_engine()
+    results: List[Tuple[Optional[str], float]] = []
+    for start in range(0, len(faces), batch_size):
+        chunk = faces[start:start + batch_size]
+        embeddings = engine.embed_crops([engine.align_face(frame, box) for frame, box in chunk])
+        for embedding in embeddings:
+            label, ranked = gallery.match(embedding, top_k=1, threshold=RECOGNITION_THRESHOLD)
+            results.append((label, ranked[0][1] if ranked else 0.0))
+    return results
+
+def recognize_faces(image: ImageSource) -> List[dict]:
+    """Detector-gated, multi-face recognition of a single image (see recognize_faces_in_frames)."""
+    return recognize_faces_in_frames([image], batch_size=FACE_BATCH_SIZE)[0]
 
 # ---------------- MAIN EXECUTION ---------------- #
 
@@ -0,0 +1,87 @@
+import io
+import struct
+import wave
+from typing import NamedTuple, Union
+import numpy as np
+
+# ---------------- BINARY FRAMES ---------------- #
+#
+# Binary WebSocket frames carry a fixed 16-byte header followed by the raw
+# payload, so images and audio travel without base64 or JSON parsing:
+#
+#   magic "EB" | version u8 | content type u8 | request id u32 |
+#   width u16 | height u16 | sample rate u32            (network byte order)
+#
+# width/height describe raw image payloads; sample_rate describes raw PCM.
+# Unused fields are zero. Text frames keep the original JSON protocol.
+
+FRAME_MAGIC = b"EB"
+FRAME_VERSION = 1
+FRAME_HEADER = struct.Struct("!2sBBIHHI")
+
+CONTENT_IMAGE = 1   # encoded image file (JPEG, PNG, ...)
+CONTENT_BGR = 2     # raw 8-bit BGR pixels, height x width x 3
+CONTENT_WAV = 3     # complete WAV file
+CONTENT_PCM16 = 4   # raw mono 16-bit little-endian PCM at sample_rate
+
+IMAGE_CONTENT = (CONTENT_IMAGE, CONTENT_BGR)
+AUDIO_CONTENT = (CONTENT_WAV, CONTENT_PCM16)
+
+class BinaryFrame(NamedTuple):
+    content_type: int
+    request_id: int
+    width: int
+    height: int
+    sample_rate: int
+    payload: memoryview
+
+def encode_frame(content_type: int, payload: Union[bytes, bytearray, memoryview], request_id: int = 0,
+                 width: int = 0, height: int = 0, sample_rate: int = 0) -> bytes:
+    """Header + payload as one binary WebSocket message."""
+    header = FRAME_HEADER.pack(FRAME_MAGIC, FRAME_VERSION, content_type, request_id, width, height, sample_rate)
+    return b"".join((header, payload))
+
+def decode_frame(data: Union[bytes, bytearray, memoryview]) -> BinaryFrame:
+    """Parse a binary message; the payload is a view into data, not a copy."""
+    if len(data) < FRAME_HEADER.size:
+        raise ValueError(f"Binary frame shorter than its {FRAME_HEADER.size}-byte header.")
+    magic, version, content_type, request_id, width, height, sample_rate = FRAME_HEADER.unpack_from(data)
+    if magic != FRAME_MAGIC:
+        raise ValueError("Binary frame has an unknown magic number.")
+    if version != FRAME_VERSION:
+        raise ValueError(f"Unsupported binary frame version {version}.")
+    return BinaryFrame(content_type, request_id, width, height, sample_rate,
+                       memoryview(data)[FRAME_HEADER.size:])
+
+def encode_bgr_frame(frame: np.ndarray, request_id: int = 0) -> bytes:
+    """Binary message for a raw BGR frame (e.g. straight from cv2.VideoCapture)."""
+    height, width = frame.shape[:2]
+    return encode_frame(CONTENT_BGR, np.ascontiguousarray(frame, dtype=np.uint8).data, request_id, width, height)
+
+def frame_image(frame: BinaryFrame) -> Union[np.ndarray, memoryview]:
+    """Image carried by a frame: a BGR array for raw pixels, else the encoded bytes."""
+    if frame.content_type == CONTENT_IMAGE:
+        return frame.payload
+    if frame.content_type == CONTENT_BGR:
+        expected = frame.width * frame.height * 3
+        if not expected or len(frame.payload) != expected:
+            raise ValueError(f"Raw BGR frame of {frame.width}x{frame.height} needs {expected} bytes, "
+                             f"got {len(frame.payload)}.")
+        return np.frombuffer(frame.payload, dtype=np.uint8).reshape(frame.height, frame.width, 3)
+    raise ValueError(f"Content type {frame.content_type} is not an image.")
+
+def frame_wav(frame: BinaryFrame) -> bytes:
+    """Audio carried by a frame as WAV file bytes; raw PCM gets a WAV header."""
+    if frame.content_type == CONTENT_WAV:
+        return bytes(frame.payload)
+    if frame.content_type == CONTENT_PCM16:
+        if not frame.sample_rate:
+            raise ValueError("Raw PCM frame needs a sample rate.")
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(frame.sample_rate)
+            wav.writeframes(frame.payload)
+        return buffer.getvalue()
+    raise ValueError(f"Content type {frame.content_type} is not audio.")
@@ -16,10 +16,12 @@ import cv2
 import numpy as np
 import time
 import threading
+import wave
 from typing import Optional, Dict, Any
 import logging
 from PIL import Image
 from io import BytesIO
+from protocol_utils import encode_frame, encode_bgr_frame, CONTENT_IMAGE, CONTENT_WAV, CONTENT_PCM16
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -28,8 +30,11 @@ logger = logging.getLogger(__name__)
 class RealTimeMLClient:
     """Client for real-time ML processing via WebSockets and HTTP"""
     
-    def __init__(self, server_url: str = "ws://localhost:8000"):
+    def __init__(self, server_url: str = "ws://localhost:8000", binary: bool = False):
         self.server_url = server_url
+        # Send images and audio as binary frames instead of base64 inside JSON
+        self.binary = binary
+        self.request_id = 0
         self.websockets = {}
         self.is_connected = False
         self.camera = None
@@ -81,6 +86,18 @@ class RealTimeMLClient:
                 logger.error(f"Error disconnecting from {name} WebSocket: {e}")
         self.websockets.clear()
         
+    async def receive_reply(self, websocket):
+        """Wait for the reply to a request, answering pings and logging pushed nudges/alerts on the way"""
+        while True:
+            message = json.loads(await websocket.recv())
+            kind = message.get("type")
+            if kind == "ping":
+                await websocket.send(json.dumps({"type": "pong"}))
+            elif kind in ("nudge", "alert"):
+                logger.info(f"{message.get('title')}: {message.get('message')}")
+            elif kind != "subscribed":
+                return message
+
     async def send_emotion_text(self, text: str, user_id: Optional[str] = None):
         """Send text for real-time emotion detection"""
         if 'emotion' not in self.websockets:
@@ -95,13 +112,16 @@ class RealTimeMLClient:
             await self.websockets['emotion'].send(json.dumps(message))
             
             # Wait for response
-            response = await self.websockets['emotion'].recv()
-            return json.loads(response)
+            return await self.receive_reply(self.websockets['emotion'])
             
         except Exception as e:
             logger.error(f"Error sending emotion text: {e}")
             return None
             
+    def next_request_id(self) -> int:
+        self.request_id = (self.request_id + 1) % 2**32
+        return self.request_id
+
     async def send_face_image(self, image_path: str):
         """Send image for real-time face recognition"""
         if 'face' not in self.websockets:
@@ -109,41 +129,66 @@ class RealTimeMLClient:
             return None
             
         try:
-            # Load and encode image
             with open(image_path, "rb") as f:
                 image_data = f.read()
-            image_base64 = base64.b64encode(image_data).decode()
-            
-            message = {
-                "image": image_base64
-            }
-            await self.websockets['face'].send(json.dumps(message))
+            if self.binary:
+                message = encode_frame(CONTENT_IMAGE, image_data, self.next_request_id())
+            else:
+                message = json.dumps({
+                    "image": base64.b64encode(image_data).decode()
+                })
+            await self.websockets['face'].send(message)
             
             # Wait for response
-            response = await self.websockets['face'].recv()
-            return json.loads(response)
+            return await self.receive_reply(self.websockets['face'])
             
         except Exception as e:
             logger.error(f"Error sending face image: {e}")
             return None
+
+    async def send_face_frame(self, frame: np.ndarray, jpeg_quality: int = 90):
+        """Send a camera frame for face recognition without writing it to disk"""
+        if 'face' not in self.websockets:
+            logger.error("Not connected to face recognition WebSocket")
+            return None
+
+        try:
+            if self.binary and jpeg_quality <= 0:
+                # Raw pixels: no encode cost on either side, at the price of bandwidth
+                message = encode_bgr_frame(frame, self.next_request_id())
+            else:
+                ok, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, max(jpeg_quality, 1)])
+                if not ok:
+                    logger.error("Could not encode camera frame")
+                    return None
+                if self.binary:
+                    message = encode_frame(CONTENT_IMAGE, encoded.data, self.next_request_id())
+                else:
+                    message = json.dumps({"image": base64.b64encode(encoded.data).decode()})
+            await self.websockets['face'].send(message)
+            return await self.receive_reply(self.websockets['face'])
+
+        except Exception as e:
+            logger.error(f"Error sending camera frame: {e}")
+            return None
             
     async def send_audio_chunk(self, audio_data: bytes):
-        """Send audio chunk for real-time processing"""
+        """Send a complete WAV clip for processing (use stream_audio_file for live audio)"""
         if 'audio' not in self.websockets:
             logger.error("Not connected to audio WebSocket")
             return None
             
         try:
-            audio_base64 = base64.b64encode(audio_data).decode()
-            
-            message = {
-                "audio": audio_base64
-            }
-            await self.websockets['audio'].send(json.dumps(message))
+            if self.binary:
+                message = encode_frame(CONTENT_WAV, audio_data, self.next_request_id())
+            else:
+                message = json.dumps({
+                    "audio": base64.b64encode(audio_data).decode()
+                })
+            await self.websockets['audio'].send(message)
             
             # Wait for response
-            response = await self.websockets['audio'].recv()
-            return json.loads(response)
+            return await self.receive_reply(self.websockets['audio'])
             
         except Exception as e:
             logger.error(f"Error sending audio chunk: {e}")
@@ -190,20 +235,10 @@ class RealTimeMLClient:
         while self.camera and self.camera.isOpened():
             frame = self.capture_frame()
             if frame is not None:
-                # Save frame temporarily
-                temp_path = f"temp_frame_{int(time.time())}.jpg"
-                cv2.imwrite(temp_path, frame)
-                
-                # Send for face recognition
-                result = await self.send_face_image(temp_path)
+                result = await self.send_face_frame(frame)
                 if result:
                     logger.info(f"Face recognition result: {result}")
                     
-                # Cleanup
-                import os
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
-                    
             await asyncio.sleep(interval)
             
     async def stream_emotions(self, texts: list, interval: float = 2.0):
@@ -214,23 +249,61 @@ class RealTimeMLClient:
                 logger.info(f"Emotion for '{text}': {result}")
             await asyncio.sleep(interval)
             
-    async def stream_audio_file(self, audio_file_path: str, chunk_size: int = 1024):
-        """Stream audio file in chunks for real-time processing"""
+    async def stream_audio_file(self, audio_file_path: str, chunk_ms: int = 100, realtime: bool = True):
+        """
+        Stream a mono 16-bit WAV file as raw PCM chunks, the way a microphone would.
+        The server cuts utterances at silence; returns the final result of each one.
+        """
+        if 'audio' not in self.websockets:
+            logger.error("Not connected to audio WebSocket")
+            return []
+
+        websocket = self.websockets['audio']
+        results = []
+
+        async def read_results():
+            while True:
+                message = await self.receive_reply(websocket)
+                kind = message.get("type")
+                if kind == "end_of_speech":
+                    return
+                if kind == "audio_processing_result":
+                    results.append(message)
+                    logger.info(f"Utterance {message.get('utterance')}: {message.get('text')} ({message.get('emotion')})")
+                elif kind == "audio_interim":
+                    logger.info(f"Speaking... {message.get('duration_ms')} ms")
+                elif kind == "error":
+                    logger.error(f"Audio stream error: {message.get('message')}")
+
         try:
-            with open(audio_file_path, "rb") as f:
+            with wave.open(audio_file_path, "rb") as wav:
+                if wav.getnchannels() != 1 or wav.getsampwidth() != 2:
+                    logger.error("Streaming needs a mono 16-bit WAV file")
+                    return []
+                sample_rate = wav.getframerate()
+                frames_per_chunk = sample_rate * chunk_ms // 1000
+                reader = asyncio.create_task(read_results())
                 while True:
-                    chunk = f.read(chunk_size)
+                    chunk = wav.readframes(frames_per_chunk)
                     if not chunk:
                         break
-                        
-                    result = await self.send_audio_chunk(chunk)
-                    if result:
-                        logger.info(f"Audio processing result: {result}")
-                        
-                    await asyncio.sleep(0.1)  # Small delay between chunks
-                    
+                    if self.binary:
+                        message = encode_frame(CONTENT_PCM16, chunk, self.next_request_id(), sample_rate=sample_rate)
+                    else:
+                        message = json.dumps({
+                            "type": "audio_chunk",
+                            "pcm": base64.b64encode(chunk).decode(),
+                            "sample_rate": sample_rate
+                        })
+                    await websocket.send(message)
+                    if realtime:
+                        await asyncio.sleep(chunk_ms / 1000.0)
+            await websocket.send(json.dumps({"type": "end_of_speech"}))
+            await reader
+
         except Exception as e:
             logger.error(f"Error streaming audio file: {e}")
+        return results
 
 # Example usage functions
 async def demo_emotion_detection():
@@ -258,7 +331,7 @@ async def demo_emotion_detection():
 
 async def demo_face_recognition():
     """Demonstrate real-time face recognition"""
-    client = RealTimeMLClient()
+    client = RealTimeMLClient(binary=True)
     
     try:
         # Connect to face recognition WebSocket
@@ -3,13 +3,12 @@ import numpy as np
 import asyncio
 import threading
 import time
-from typing import Optional, Callable, Dict, Any
+from typing import Optional, Callable, Dict, Any, List, Tuple
 import logging
 from collections import deque
 import json
+from tracking_utils import FaceTrack, FaceTracker
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class RealTimeVideoProcessor:
@@ -215,13 +214,83 @@ class RealTimeEmotionTracker:
         }
 
 class RealTimeFaceTracker:
-    """Track faces in real-time with recognition history"""
+    """
+    Track faces in real-time with recognition history.
+
+    With detect and recognize callables, process_frames() runs track-then-recognize:
+    every frame is only run through the (cheap) detector, boxes are followed across
+    frames by a FaceTracker which assigns stable face_ids, and faces are embedded
+    and matched only when their track is new or its identity has gone stale.
+    """
     
-    def __init__(self, max_faces: int = 10):
+    def __init__(self, max_faces: int = 10,
+                 detect: Optional[Callable[[List[np.ndarray]], List[List[dict]]]] = None,
+                 recognize: Optional[Callable[[List[Tuple[np.ndarray, dict]]], List[Tuple[Optional[str], float]]]] = None,
+                 tracker: Optional[FaceTracker] = None):
         self.max_faces = max_faces
         self.face_history = deque(maxlen=max_faces * 10)  # Store more history for faces
         self.known_faces = {}  # face_id -> label mapping
         self.face_counter = 0
+        self.detect = detect
+        self.recognize = recognize
+        self.tracker = tracker or FaceTracker()
+        
+    def process_frames(self, frames: List[np.ndarray], timestamps: List[float],
+                       boxes: Optional[List[List[dict]]] = None) -> List[List[Tuple[FaceTrack, dict]]]:
+        """
+        Track and recognize faces in consecutive frames (in time order). Detector
+        boxes are computed with detect unless given; if detection fails the
+        frames count as having no faces. Returns, per frame, a (track, box) pair
+        for each face; describe() turns one into a result. All recognitions
+        needed by the batch go to recognize in a single call.
+        """
+        if boxes is None:
+            try:
+                boxes = self.detect(frames) if frames else []  # type: ignore
+            except Exception as e:
+                logger.warning(f"Face detection failed for {len(frames)} frames: {e}")
+                boxes = [[] for _ in frames]
+        per_frame: List[List[Tuple[FaceTrack, dict]]] = []
+        wanted: List[Tuple[np.ndarray, dict]] = []
+        wanted_tracks: List[Tuple[FaceTrack, float]] = []
+        for frame, frame_boxes, timestamp in zip(frames, boxes, timestamps):
+            tracks = self.tracker.update([(b["x"], b["y"], b["w"], b["h"]) for b in frame_boxes], timestamp)
+            for track, box in zip(tracks, frame_boxes):
+                if self.recognize is not None and self.tracker.needs_recognition(track, timestamp):
+                    self.tracker.request(track)
+                    wanted.append((frame, box))
+                    wanted_tracks.append((track, timestamp))
+            per_frame.append(list(zip(tracks, frame_boxes)))
+
+        if wanted:
+            try:
+                matches = self.recognize(wanted)  # type: ignore
+            except Exception as e:
+                logger.warning(f"Face recognition failed for tracked faces: {e}")
+                for track, _ in wanted_tracks:
+                    track.pending = False  # retried on the next frame
+            else:
+                for (track, timestamp), (label, score) in zip(wanted_tracks, matches):
+                    self.tracker.assign(track, label, score, timestamp)
+
+        self.face_counter = self.tracker.created
+        for faces, timestamp in zip(per_frame, timestamps):
+            for track, box in faces:
+                self.add_face_detection(track.track_id, track.label, track.score,
+                                        (box["x"], box["y"], box["w"], box["h"]), timestamp)
+        return per_frame
+
+    @staticmethod
+    def describe(track: FaceTrack, box: dict, timestamp: float) -> Dict[str, Any]:
+        """Result for one tracked face, labelled with the identity its track had (or got) at timestamp."""
+        identity = track.identity_at(timestamp)
+        return {
+            "face_id": track.track_id,
+            "bbox": [box["x"], box["y"], box["w"], box["h"]],
+            "detection_confidence": box.get("confidence"),
+            "label": identity.label if identity else None,
+            "score": identity.score if identity else 0.0
+        }
         
     def add_face_detection(self, face_id: str, label: Optional[str], confidence: float, 
                           bbox: tuple, timestamp: float = None):
@@ -262,7 +331,8 @@ class RealTimeFaceTracker:
             "known_faces": len(face_labels),
             "unknown_faces": len(unique_faces) - len(face_labels),
             "recent_detections": recent_faces[-5:],
-            "face_labels": face_labels
+            "face_labels": face_labels,
+            "tracking": self.tracker.stats()
         }
         
     def get_face_timeline(self, face_id: str, window_minutes: int = 5) -> list:
@@ -336,6 +406,7 @@ def decode_base64_to_frame(base64_string: str) -> np.ndarray:
 
 # Example usage and testing
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     # Test the real-time processors
     print("Real-time utilities loaded successfully!")
     print("Available classes:")
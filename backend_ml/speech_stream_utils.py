@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import os
+from typing import Awaitable, Callable, Optional
+from vad_utils import AUDIO_SAMPLE_RATE, SpeechStarted, Utterance, UtteranceSegmenter, check_sample_rate
+
+logger = logging.getLogger(__name__)
+
+# ---------------- CONFIG ---------------- #
+
+# Interim progress is sent at most this often while someone is speaking (0 = never)
+AUDIO_INTERIM_MS = int(os.environ.get("AUDIO_INTERIM_MS", 1000))
+# Also transcribe the partial utterance for interim results (one extra ASR call per interim)
+AUDIO_INTERIM_ASR = os.environ.get("AUDIO_INTERIM_ASR", "0").lower() in ("1", "true", "yes")
+# Finished utterances waiting for ASR; when full, reading from the socket pauses
+AUDIO_STREAM_QUEUE = int(os.environ.get("AUDIO_STREAM_QUEUE", 4))
+
+# ---------------- SPEECH STREAM ---------------- #
+
+class SpeechStream:
+    """
+    Per-connection streaming speech pipeline. Raw PCM chunks go through the
+    VAD segmenter; each finished utterance is transcribed once, from memory,
+    by a background task so the socket keeps reading meanwhile. Results are
+    delivered in utterance order (indices of utterances dropped as noise are
+    skipped):
+
+      {"type": "speech_start", "utterance": n, "start_ms": ...}
+      {"type": "audio_interim", "utterance": n, "duration_ms": ..., ["text": ...]}
+      {"type": "audio_processing_result", "final": true, "utterance": n, "text": ..., **analyze(text)}
+      {"type": "end_of_speech", "utterances": total}   (after flush(acknowledge=True))
+    """
+
+    def __init__(self, send: Callable[[dict], Awaitable[None]],
+                 transcribe: Callable[[bytes, int], Awaitable[str]],
+                 analyze: Callable[[str], Awaitable[dict]],
+                 interim_ms: int = AUDIO_INTERIM_MS, interim_asr: bool = AUDIO_INTERIM_ASR,
+                 queue_size: int = AUDIO_STREAM_QUEUE):
+        self.send = send
+        self.transcribe = transcribe
+        self.analyze = analyze
+        self.interim_ms = interim_ms
+        self.interim_asr = interim_asr
+        self.segmenter: Optional[UtteranceSegmenter] = None
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+        self._worker: Optional[asyncio.Task] = None
+        self._interim_task: Optional[asyncio.Task] = None
+        self._last_interim_ms = 0
+        self.request_id = None
+        self.asr_calls = 0
+
+    def _ensure_started(self):
+        if self._worker is None:
+            self._worker = asyncio.get_running_loop().create_task(self._work())
+
+    async def feed(self, pcm: bytes, sample_rate: int = AUDIO_SAMPLE_RATE, request_id=None):
+        """Add a chunk of raw mono 16-bit PCM. Raises ValueError for an unsupported sample rate."""
+        check_sample_rate(sample_rate)
+        self._ensure_started()
+        self.request_id = request_id
+        if self.segmenter is not None and self.segmenter.sample_rate != sample_rate:
+            await self.flush()
+            self.segmenter = None
+        if self.segmenter is None:
+            self.segmenter = UtteranceSegmenter(sample_rate)
+        for event in self.segmenter.feed(pcm):
+            if isinstance(event, SpeechStarted):
+                self._last_interim_ms = 0
+                await self.send({"type": "speech_start", "utterance": event.index, "start_ms": event.start_ms,
+                                 "request_id": request_id})
+            else:
+                await self._queue.put(event)
+        await self._maybe_interim()
+
+    async def flush(self, acknowledge: bool = False):
+        """
+        End of speech from the client: finish the utterance in progress now. With
+        acknowledge, {"type": "end_of_speech"} follows the last final result.
+        """
+        self._ensure_started()
+        if self.segmenter is not None:
+            utterance = self.segmenter.flush()
+            if utterance is not None:
+                await self._queue.put(utterance)
+        if acknowledge:
+            await self._queue.put(None)
+
+    async def _maybe_interim(self):
+        segmenter = self.segmenter
+        if not self.interim_ms or segmenter is None or not segmenter.in_speech:
+            return
+        duration = segmenter.current_ms
+        if duration - self._last_interim_ms < self.interim_ms:
+            return
+        self._last_interim_ms = duration
+        message = {"type": "audio_interim", "utterance": segmenter.index, "duration_ms": duration,
+                   "request_id": self.request_id}
+        if not self.interim_asr:
+            await self.send(message)
+        elif self._interim_task is None or self._interim_task.done():
+            # At most one partial transcription in flight; skipped interims are simply not sent
+            self._interim_task = asyncio.get_running_loop().create_task(
+                self._interim(message, segmenter.partial(), segmenter.sample_rate))
+
+    async def _interim(self, message: dict, pcm: bytes, sample_rate: int):
+        try:
+            self.asr_calls += 1
+            message["text"] = await self.transcribe(pcm, sample_rate)
+            await self.send(message)
+        except Exception as e:
+            logger.warning(f"Interim transcription failed: {e}")
+
+    async def _work(self):
+        while True:
+            utterance: Optional[Utterance] = await self._queue.get()
+            if utterance is None:
+                utterances = self.segmenter.utterances if self.segmenter is not None else 0
+                await self.send({"type": "end_of_speech", "utterances": utterances, "request_id": self.request_id})
+                continue
+            try:
+                self.asr_calls += 1
+                text = await self.transcribe(utterance.pcm, utterance.sample_rate)
+                result = await self.analyze(text)
+                await self.send({
+                    "type": "audio_processing_result",
+                    "final": True,
+                    "utterance": utterance.index,
+                    "start_ms": utterance.start_ms,
+                    "end_ms": utterance.end_ms,
+                    "text": text,
+                    **result,
+                    "request_id": self.request_id
+                })
+            except Exception as e:
+                await self.send({"type": "error", "message": str(e), "utterance": utterance.index,
+                                 "request_id": self.request_id})
+
+    async def close(self):
+        for task in (self._worker, self._interim_task):
+            if task is not None:
+                task.cancel()
+        self._worker = self._interim_task = None
@@ -0,0 +1,318 @@
+import csv
+import io
+import logging
+import os
+import re
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+LOG_FILE = "logs/emotion_logs.csv"
+LOG_HEADER = ["timestamp", "input_text", "emotion", "confidence"]
+
+# ---------------- CONFIG ---------------- #
+
+# Emotion log backend: "sqlite" (indexed, default) or "csv" (flat file, full scans)
+EMOTION_STORE = os.environ.get("EMOTION_STORE", "sqlite").lower()
+EMOTION_DB_FILE = os.environ.get("EMOTION_DB_FILE", "logs/emotion_logs.db")
+
+# Rows start with an ISO timestamp; used to resync when a tail read starts inside a quoted newline
+_ROW_START = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}")
+
+def _parse_row(row: List[str]) -> Optional[list]:
+    """CSV fields -> [timestamp, text, emotion, confidence], or None if malformed."""
+    if len(row) != len(LOG_HEADER):
+        return None
+    try:
+        return [row[0], row[1], row[2], float(row[3])]
+    except ValueError:
+        return None
+
+def _in_range(row: list, start: Optional[str], end: Optional[str], emotion: Optional[str]) -> bool:
+    return ((start is None or row[0] >= start) and (end is None or row[0] < end)
+            and (emotion is None or row[2] == emotion))
+
+def tail_rows(path: str, n: int, block_size: int = 8192) -> List[list]:
+    """
+    Last n rows of a CSV log, read backwards from the end of the file in
+    growing blocks so the cost depends on n rather than the file size.
+    """
+    if n <= 0 or not os.path.exists(path):
+        return []
+    with open(path, "rb") as f:
+        end = f.seek(0, os.SEEK_END)
+        size = block_size
+        while True:
+            start = max(0, end - size)
+            f.seek(start)
+            data = f.read(end - start).decode("utf-8", errors="replace")
+            lines = data.splitlines(keepends=True)
+            if start > 0:
+                lines = lines[1:]  # first line is probably cut in half
+            first = next((i for i, line in enumerate(lines) if _ROW_START.match(line)), len(lines))
+            rows = []
+            for fields in csv.reader(io.StringIO("".join(lines[first:]), newline="")):
+                row = _parse_row(fields)
+                if row is not None and _ROW_START.match(row[0]):
+                    rows.append(row)
+            if len(rows) >= n or start == 0:
+                return rows[-n:]
+            size *= 2
+
+# ---------------- STORES ---------------- #
+
+class EmotionStore(ABC):
+    """
+    Storage backend for emotion events. Rows are [timestamp, input_text,
+    emotion, confidence] with ISO timestamps. append() and close() are only
+    called from the log writer thread; reads may come from any thread.
+    Time ranges are half-open: start <= timestamp < end.
+    """
+
+    @abstractmethod
+    def append(self, rows: List[list]):
+        ...
+
+    def close(self):
+        pass
+
+    @abstractmethod
+    def tail(self, n: int) -> List[list]:
+        ...
+
+    @abstractmethod
+    def aggregate(self) -> dict:
+        """total, counts (in order of first appearance), confidence_sum and the most recent row."""
+
+    @abstractmethod
+    def query(self, start: Optional[str] = None, end: Optional[str] = None, emotion: Optional[str] = None,
+              limit: int = 100, offset: int = 0, newest_first: bool = True) -> List[list]:
+        ...
+
+    @abstractmethod
+    def count(self, start: Optional[str] = None, end: Optional[str] = None, emotion: Optional[str] = None) -> int:
+        ...
+
+class CsvEmotionStore(EmotionStore):
+    """The original append-only CSV file. Tail reads are cheap, queries scan the whole file."""
+
+    def __init__(self, path: str = LOG_FILE, fsync: bool = False):
+        self.path = path
+        self.fsync = fsync
+        self._file = None
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, "a", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        if self._file.tell() == 0:
+            self._writer.writerow(LOG_HEADER)
+
+    def append(self, rows: List[list]):
+        try:
+            if self._file is None:
+                self._open()
+            self._writer.writerows(rows)
+            self._file.flush()  # type: ignore
+            if self.fsync:
+                os.fsync(self._file.fileno())  # type: ignore
+        except OSError:
+            self.close()
+            raise
+
+    def close(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+
+    def _rows(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for fields in reader:
+                row = _parse_row(fields)
+                if row is not None:
+                    yield row
+
+    def tail(self, n: int) -> List[list]:
+        return tail_rows(self.path, n)
+
+    def aggregate(self) -> dict:
+        total, counts, confidence_sum, most_recent = 0, {}, 0.0, None  # type: ignore
+        for row in self._rows():
+            total += 1
+            counts[row[2]] = counts.get(row[2], 0) + 1
+            confidence_sum += row[3]
+            most_recent = row
+        return {"total": total, "counts": counts, "confidence_sum": confidence_sum, "most_recent": most_recent}
+
+    def query(self, start=None, end=None, emotion=None, limit=100, offset=0, newest_first=True) -> List[list]:
+        matches = [row for row in self._rows() if _in_range(row, start, end, emotion)]
+        matches.sort(key=lambda row: row[0])
+        if newest_first:
+            matches.reverse()
+        return matches[offset:offset + limit]
+
+    def count(self, start=None, end=None, emotion=None) -> int:
+        return sum(1 for row in self._rows() if _in_range(row, start, end, emotion))
+
+class SqliteEmotionStore(EmotionStore):
+    """
+    SQLite database in WAL mode with indexes on timestamp and (emotion,
+    timestamp), so time-window and per-emotion queries stay fast over months
+    of history. Each thread gets its own connection; WAL lets readers run
+    while the writer thread commits. close() closes every thread's connection.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS emotion_events (
+            id INTEGER PRIMARY KEY,
+            timestamp TEXT NOT NULL,
+            input_text TEXT,
+            emotion TEXT NOT NULL,
+            confidence REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_emotion_events_timestamp ON emotion_events (timestamp);
+        CREATE INDEX IF NOT EXISTS idx_emotion_events_emotion ON emotion_events (emotion, timestamp);
+    """
+    _INSERT = "INSERT INTO emotion_events (timestamp, input_text, emotion, confidence) VALUES (?, ?, ?, ?)"
+
+    def __init__(self, path: str = EMOTION_DB_FILE, fsync: bool = False, migrate_from: Optional[str] = LOG_FILE):
+        self.path = path
+        self.fsync = fsync
+        self.migrate_from = migrate_from
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        # Every connection opened, so close() can reach other threads' too
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._generation = 0  # bumped by close(); older thread-local connections are closed
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "generation", None) != self._generation:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Only ever used by this thread, but close() may close it from another one
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA synchronous={'FULL' if self.fsync else 'NORMAL'}")
+            with self._connections_lock:
+                self._connections.append(conn)
+                self._local.generation = self._generation
+            self._local.conn = conn
+            self._ensure_schema(conn)
+        return conn
+
+    def _ensure_schema(self, conn: sqlite3.Connection):
+        if self._initialized:
+            return
+        with self._init_lock:
+            if self._initialized:
+                return
+            conn.executescript(self.SCHEMA)
+            empty = conn.execute("SELECT 1 FROM emotion_events LIMIT 1").fetchone() is None
+            if empty and self.migrate_from and os.path.exists(self.migrate_from):
+                imported = self.import_csv(self.migrate_from, conn)
+                logger.info(f"Imported {imported} emotion log rows from {self.migrate_from} into {self.path}")
+            self._initialized = True
+
+    def import_csv(self, csv_path: str, conn: Optional[sqlite3.Connection] = None, chunk_size: int = 5000) -> int:
+        """Copy every parseable row of a CSV emotion log into the database; returns the row count."""
+        conn = conn or self._connect()
+        source = CsvEmotionStore(csv_path)
+        imported = 0
+        chunk: List[list] = []
+        with conn:
+            for row in source._rows():
+                chunk.append(row)
+                if len(chunk) >= chunk_size:
+                    conn.executemany(self._INSERT, chunk)
+                    imported += len(chunk)
+                    chunk = []
+            if chunk:
+                conn.executemany(self._INSERT, chunk)
+                imported += len(chunk)
+        return imported
+
+    def append(self, rows: List[list]):
+        conn = self._connect()
+        with conn:
+            conn.executemany(self._INSERT, rows)
+
+    def close(self):
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+            self._generation += 1
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logger.warning(f"Error closing emotion store connection: {e}")
+        self._local.conn = None
+
+    def tail(self, n: int) -> List[list]:
+        rows = self._connect().execute(
+            "SELECT timestamp, input_text, emotion, confidence FROM emotion_events ORDER BY id DESC LIMIT ?", (n,)
+        ).fetchall()
+        return [list(row) for row in reversed(rows)]
+
+    def aggregate(self) -> dict:
+        conn = self._connect()
+        counts: Dict[str, int] = {}
+        total, confidence_sum = 0, 0.0
+        for emotion, count, conf in conn.execute(
+                "SELECT emotion, COUNT(*), TOTAL(confidence) FROM emotion_events GROUP BY emotion ORDER BY MIN(id)"):
+            counts[emotion] = count
+            total += count
+            confidence_sum += conf
+        tail = self.tail(1)
+        return {"total": total, "counts": counts, "confidence_sum": confidence_sum,
+                "most_recent": tail[0] if tail else None}
+
+    @staticmethod
+    def _where(start, end, emotion):
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("timestamp < ?")
+            params.append(end)
+        if emotion is not None:
+            clauses.append("emotion = ?")
+            params.append(emotion)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, start=None, end=None, emotion=None, limit=100, offset=0, newest_first=True) -> List[list]:
+        where, params = self._where(start, end, emotion)
+        order = "DESC" if newest_first else "ASC"
+        rows = self._connect().execute(
+            f"SELECT timestamp, input_text, emotion, confidence FROM emotion_events{where} "
+            f"ORDER BY timestamp {order}, id {order} LIMIT ? OFFSET ?", params + [limit, offset]
+        ).fetchall()
+        return [list(row) for row in rows]
+
+    def count(self, start=None, end=None, emotion=None) -> int:
+        where, params = self._where(start, end, emotion)
+        return self._connect().execute(f"SELECT COUNT(*) FROM emotion_events{where}", params).fetchone()[0]
+
+def create_emotion_store(backend: str = EMOTION_STORE, fsync: bool = False) -> EmotionStore:
+    """Build the configured backend; unknown names fall back to SQLite."""
+    if backend == "csv":
+        return CsvEmotionStore(LOG_FILE, fsync=fsync)
+    if backend != "sqlite":
+        logger.warning(f"Unknown EMOTION_STORE '{backend}', using sqlite")
+    return SqliteEmotionStore(EMOTION_DB_FILE, fsync=fsync)
@@ -0,0 +1,229 @@
+import math
+import os
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+# ---------------- CONFIG ---------------- #
+
+# Video endpoints track faces between samples and embed only new or stale tracks
+FACE_TRACKING = os.environ.get("FACE_TRACKING", "1").lower() in ("1", "true", "yes")
+# A detection continues a track when their boxes overlap at least this much (IoU)...
+TRACK_IOU_THRESHOLD = float(os.environ.get("TRACK_IOU_THRESHOLD", 0.3))
+# ...or, failing that, when its centre is within this fraction of the track's box size
+TRACK_MAX_CENTER_SHIFT = float(os.environ.get("TRACK_MAX_CENTER_SHIFT", 0.6))
+# Tracks not matched for this long are dropped; a face seen again later starts a new track
+TRACK_MAX_AGE_S = float(os.environ.get("TRACK_MAX_AGE_S", 1.5))
+# Identity confidence halves every this many seconds since the last recognition...
+TRACK_IDENTITY_HALF_LIFE_S = float(os.environ.get("TRACK_IDENTITY_HALF_LIFE_S", 20))
+# ...and the face is recognized again once it falls below this
+TRACK_MIN_IDENTITY = float(os.environ.get("TRACK_MIN_IDENTITY", 0.4))
+# Unrecognized tracks are retried this often (the face may have turned towards the camera)
+TRACK_UNKNOWN_RETRY_S = float(os.environ.get("TRACK_UNKNOWN_RETRY_S", 2.0))
+
+# Fixed gains of the constant-velocity (alpha-beta) filter on box centre and size
+_ALPHA = 0.6
+_BETA = 0.2
+
+# ---------------- GEOMETRY ---------------- #
+
+Box = Tuple[float, float, float, float]  # x, y, w, h
+
+def iou(a: Box, b: Box) -> float:
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    iw = min(ax + aw, bx + bw) - max(ax, bx)
+    ih = min(ay + ah, by + bh) - max(ay, by)
+    if iw <= 0 or ih <= 0:
+        return 0.0
+    inter = iw * ih
+    return inter / (aw * ah + bw * bh - inter)
+
+def center_shift(a: Box, b: Box) -> float:
+    """Distance between box centres relative to the size of a."""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    dx = (ax + aw / 2) - (bx + bw / 2)
+    dy = (ay + ah / 2) - (by + bh / 2)
+    return math.hypot(dx, dy) / max(1.0, max(aw, ah))
+
+# ---------------- FACE TRACKS ---------------- #
+
+class Identity(NamedTuple):
+    timestamp: float
+    label: Optional[str]
+    score: float
+
+class FaceTrack:
+    """
+    One face followed across frames. Position is filtered with a constant-velocity
+    model so that the next frame's box can be predicted before association; the
+    identities list records every recognition of the track, oldest first.
+    """
+
+    def __init__(self, track_id: str, box: Box, timestamp: float):
+        self.track_id = track_id
+        # centre x, centre y, width, height and their velocities per second
+        x, y, w, h = box
+        self.state = [x + w / 2, y + h / 2, w, h]
+        self.velocity = [0.0, 0.0, 0.0, 0.0]
+        self.first_seen = timestamp
+        self.last_seen = timestamp
+        self.hits = 1
+        self.identities: List[Identity] = []
+        self.pending = False  # recognition requested but not yet assigned
+        self.overlapping = False  # box overlaps another face in the current frame
+        self.crossed = False  # overlapped another face since the last recognition
+
+    @staticmethod
+    def _to_box(state: Sequence[float]) -> Box:
+        cx, cy, w, h = state
+        return (cx - w / 2, cy - h / 2, w, h)
+
+    @property
+    def box(self) -> Box:
+        return self._to_box(self.state)
+
+    def predict(self, timestamp: float) -> Box:
+        dt = max(0.0, timestamp - self.last_seen)
+        return self._to_box([s + v * dt for s, v in zip(self.state, self.velocity)])
+
+    def correct(self, box: Box, timestamp: float):
+        dt = timestamp - self.last_seen
+        x, y, w, h = box
+        measured = [x + w / 2, y + h / 2, w, h]
+        if dt <= 0:
+            self.state = measured
+        else:
+            predicted = [s + v * dt for s, v in zip(self.state, self.velocity)]
+            residual = [m - p for m, p in zip(measured, predicted)]
+            self.state = [p + _ALPHA * r for p, r in zip(predicted, residual)]
+            self.velocity = [v + _BETA * r / dt for v, r in zip(self.velocity, residual)]
+        self.last_seen = timestamp
+        self.hits += 1
+
+    @property
+    def label(self) -> Optional[str]:
+        return self.identities[-1].label if self.identities else None
+
+    @property
+    def score(self) -> float:
+        return self.identities[-1].score if self.identities else 0.0
+
+    def identity_at(self, timestamp: float) -> Optional[Identity]:
+        """
+        The recognition in force at timestamp. Until the track is first matched to
+        a label, frames take that first match, so a label propagates back over
+        the frames seen (or not recognized) before it.
+        """
+        current = None
+        for identity in self.identities:
+            if identity.timestamp > timestamp:
+                break
+            if identity.label is not None or (current is not None and current.label is not None):
+                current = identity
+        if current is None:
+            current = next((i for i in self.identities if i.label is not None), None)
+        return current or (self.identities[0] if self.identities else None)
+
+    def confidence(self, timestamp: float, half_life_s: float = TRACK_IDENTITY_HALF_LIFE_S) -> float:
+        """Last match score, halved for every half_life_s seconds since it was made."""
+        if not self.identities:
+            return 0.0
+        last = self.identities[-1]
+        if half_life_s <= 0:
+            return last.score
+        return last.score * 0.5 ** (max(0.0, timestamp - last.timestamp) / half_life_s)
+
+class FaceTracker:
+    """
+    Lightweight multi-face tracker: each frame's detector boxes are associated
+    greedily with the predicted positions of live tracks (best IoU first, then
+    nearest centre), unmatched boxes start new tracks, and tracks unseen for
+    max_age_s are dropped. needs_recognition() says which tracks are worth an
+    embedding: new ones; unknown ones, and ones that have come apart from another
+    face, every unknown_retry_s; and known ones once their identity confidence
+    has decayed below min_identity.
+    """
+
+    def __init__(self, iou_threshold: float = TRACK_IOU_THRESHOLD, max_center_shift: float = TRACK_MAX_CENTER_SHIFT,
+                 max_age_s: float = TRACK_MAX_AGE_S, half_life_s: float = TRACK_IDENTITY_HALF_LIFE_S,
+                 min_identity: float = TRACK_MIN_IDENTITY, unknown_retry_s: float = TRACK_UNKNOWN_RETRY_S):
+        self.iou_threshold = iou_threshold
+        self.max_center_shift = max_center_shift
+        self.max_age_s = max_age_s
+        self.half_life_s = half_life_s
+        self.min_identity = min_identity
+        self.unknown_retry_s = unknown_retry_s
+        self.tracks: Dict[str, FaceTrack] = {}
+        self.created = 0
+        self.detections = 0
+        self.recognitions = 0
+
+    def update(self, boxes: Sequence[Box], timestamp: float) -> List[FaceTrack]:
+        """Associate one frame's boxes with tracks; returns the track of each box, in order."""
+        self.detections += len(boxes)
+        for track_id in [t.track_id for t in self.tracks.values() if timestamp - t.last_seen > self.max_age_s]:
+            del self.tracks[track_id]
+
+        live = list(self.tracks.values())
+        predicted = [track.predict(timestamp) for track in live]
+        candidates = []
+        for i, box in enumerate(boxes):
+            for j, guess in enumerate(predicted):
+                overlap = iou(box, guess)
+                if overlap >= self.iou_threshold:
+                    candidates.append((0, -overlap, i, j))
+                else:
+                    shift = center_shift(guess, box)
+                    if shift <= self.max_center_shift:
+                        candidates.append((1, shift, i, j))
+        candidates.sort()
+
+        assigned: List[Optional[FaceTrack]] = [None] * len(boxes)
+        taken = set()
+        for _, _, i, j in candidates:
+            if assigned[i] is not None or j in taken:
+                continue
+            assigned[i] = live[j]
+            taken.add(j)
+            live[j].correct(boxes[i], timestamp)
+
+        for i, box in enumerate(boxes):
+            if assigned[i] is None:
+                self.created += 1
+                track = FaceTrack(f"face_{self.created}", box, timestamp)
+                self.tracks[track.track_id] = track
+                assigned[i] = track
+
+        # Faces that pass in front of each other may have swapped tracks
+        for i, track in enumerate(assigned):
+            track.overlapping = any(iou(boxes[i], other) > 0 for k, other in enumerate(boxes) if k != i)  # type: ignore
+            track.crossed = track.crossed or track.overlapping  # type: ignore
+        return assigned  # type: ignore
+
+    def needs_recognition(self, track: FaceTrack, timestamp: float) -> bool:
+        if track.pending:
+            return False
+        if not track.identities:
+            return True
+        since = timestamp - track.identities[-1].timestamp
+        if track.label is None or (track.crossed and not track.overlapping):
+            return since >= self.unknown_retry_s
+        return track.confidence(timestamp, self.half_life_s) < self.min_identity
+
+    def request(self, track: FaceTrack):
+        """Mark a track as waiting for recognition so it is not requested twice."""
+        track.pending = True
+
+    def assign(self, track: FaceTrack, label: Optional[str], score: float, timestamp: float):
+        track.pending = False
+        track.crossed = track.overlapping
+        track.identities.append(Identity(timestamp, label, score))
+        self.recognitions += 1
+
+    def stats(self) -> dict:
+        return {
+            "live_tracks": len(self.tracks),
+            "tracks_created": self.created,
+            "detections": self.detections,
+            "recognitions": self.recognitions
+        }
@@ -0,0 +1,280 @@
+import hashlib
+import io
+import logging
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# ---------------- CONFIG ---------------- #
+
+# "auto" (pyttsx3, else gTTS), "pyttsx3" (offline) or "gtts" (online)
+TTS_BACKEND = os.environ.get("TTS_BACKEND", "auto").lower()
+TTS_RATE = int(os.environ.get("TTS_RATE", 0))  # pyttsx3 words per minute, 0 = engine default
+TTS_VOICE = os.environ.get("TTS_VOICE", "")    # pyttsx3 voice id, "" = engine default
+TTS_LANGUAGE = os.environ.get("TTS_LANGUAGE", "en")  # gTTS
+# Rendered phrases are kept on disk (across restarts) and the most recent in memory
+TTS_CACHE_DIR = os.environ.get("TTS_CACHE_DIR", "tts_cache")
+TTS_MEMORY_CACHE = int(os.environ.get("TTS_MEMORY_CACHE", 64))
+# Phrases waiting to be spoken; when full, new ones are dropped rather than blocking the caller
+TTS_QUEUE_SIZE = int(os.environ.get("TTS_QUEUE_SIZE", 16))
+# Playback command override, e.g. "mpv --really-quiet {path}"; without {path} audio goes to stdin
+TTS_PLAYER = os.environ.get("TTS_PLAYER", "")
+
+# ---------------- SPEECH WORKER ---------------- #
+
+class Clip(NamedTuple):
+    path: str
+    data: bytes
+    format: str  # "wav" or "mp3"
+
+class SpeechWorker:
+    """
+    One long-lived thread that owns the TTS engine and plays phrases in order,
+    so speak() returns at once. Each phrase is rendered to audio once and
+    cached on disk and in memory; repeats skip synthesis and go straight to
+    playback. Falls back to speaking through the engine directly when it
+    cannot render to a file.
+    """
+
+    def __init__(self, backend: str = TTS_BACKEND, cache_dir: str = TTS_CACHE_DIR,
+                 memory_items: int = TTS_MEMORY_CACHE, queue_size: int = TTS_QUEUE_SIZE,
+                 player: str = TTS_PLAYER):
+        self.backend = backend
+        self.cache_dir = cache_dir
+        self.memory_items = max(0, memory_items)
+        self.player = player
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+        self._memory: "OrderedDict[str, Clip]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._engine = None
+        self._engine_name: Optional[str] = None
+        self.spoken = 0
+        self.rendered = 0
+        self.render_ms = 0.0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="tts", daemon=True)
+                self._thread.start()
+
+    def speak(self, text: str) -> bool:
+        """Queue a phrase for playback; returns False if the queue is full and it was dropped."""
+        return self._submit([text], play=True)
+
+    def prerender(self, phrases: Iterable[str]) -> bool:
+        """Render phrases into the cache in the background, without playing them."""
+        phrases = [text for text in phrases if text]
+        return self._submit(phrases, play=False) if phrases else True
+
+    def _submit(self, phrases: List[str], play: bool) -> bool:
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((phrases, play))
+            return True
+        except queue.Full:
+            self.dropped += len(phrases)
+            logger.warning(f"TTS queue full, dropping: {phrases[0]}")
+            return False
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            phrases, play = job
+            text = phrases[0]
+            try:
+                clip = self._clip(text)
+                if play:
+                    if clip is not None:
+                        self._play(clip)
+                    else:
+                        self._say(text)
+                    self.spoken += 1
+            except Exception as e:
+                self.failed += 1
+                logger.warning(f"Text-to-speech failed: {e}")
+            if len(phrases) > 1:
+                # Requeue the rest so phrases spoken meanwhile do not wait for a long prerender
+                try:
+                    self._queue.put_nowait((phrases[1:], play))
+                except queue.Full:
+                    self.dropped += len(phrases) - 1
+        self._stop_engine()
+
+    # ---- engine (worker thread only) ----
+
+    def _load_engine(self):
+        if self._engine_name is not None:
+            return
+        if self.backend in ("auto", "pyttsx3"):
+            try:
+                import pyttsx3
+                self._engine = pyttsx3.init()
+                if TTS_RATE:
+                    self._engine.setProperty("rate", TTS_RATE)
+                if TTS_VOICE:
+                    self._engine.setProperty("voice", TTS_VOICE)
+                self._engine_name = "pyttsx3"
+                return
+            except Exception as e:
+                if self.backend == "pyttsx3":
+                    raise
+                logger.info(f"pyttsx3 unavailable ({e}), trying gTTS")
+        try:
+            import gtts  # noqa: F401
+            self._engine_name = "gtts"
+        except ImportError:
+            self._engine_name = "none"
+            logger.warning("Text-to-speech not available. Install pyttsx3 or gTTS.")
+
+    def _stop_engine(self):
+        if self._engine is not None:
+            try:
+                self._engine.stop()
+            except Exception:
+                pass
+            self._engine = None
+
+    def _key(self, text: str) -> str:
+        settings = f"{self._engine_name}|{TTS_RATE}|{TTS_VOICE}|{TTS_LANGUAGE}|{text}"
+        return hashlib.sha1(settings.encode("utf-8")).hexdigest()
+
+    def _clip(self, text: str) -> Optional[Clip]:
+        """Rendered audio for text: memory, then disk, then synthesis. None if it cannot be rendered."""
+        self._load_engine()
+        if self._engine_name == "none":
+            return None
+        key = self._key(text)
+        clip = self._memory.get(key)
+        if clip is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return clip
+        fmt = "mp3" if self._engine_name == "gtts" else "wav"
+        path = os.path.join(self.cache_dir, f"{key}.{fmt}")
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            self.disk_hits += 1
+        else:
+            start = time.perf_counter()
+            if not self._render(text, path):
+                return None
+            self.rendered += 1
+            self.render_ms += (time.perf_counter() - start) * 1000.0
+        with open(path, "rb") as f:
+            clip = Clip(path, f.read(), fmt)
+        if self.memory_items:
+            self._memory[key] = clip
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+        return clip
+
+    def _render(self, text: str, path: str) -> bool:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Engines pick the file format from the extension, so keep it on the partial file
+        root, ext = os.path.splitext(path)
+        tmp_path = f"{root}.part{ext}"
+        try:
+            if self._engine_name == "gtts":
+                from gtts import gTTS
+                buffer = io.BytesIO()
+                gTTS(text=text, lang=TTS_LANGUAGE).write_to_fp(buffer)
+                with open(tmp_path, "wb") as f:
+                    f.write(buffer.getvalue())
+            else:
+                self._engine.save_to_file(text, tmp_path)  # type: ignore
+                self._engine.runAndWait()  # type: ignore
+            if not os.path.exists(tmp_path) or os.path.getsize(tmp_path) == 0:
+                return False
+            os.replace(tmp_path, path)
+            return True
+        except Exception as e:
+            logger.warning(f"Could not render speech to a file, speaking directly: {e}")
+            return False
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _say(self, text: str):
+        if self._engine_name == "pyttsx3":
+            self._engine.say(text)  # type: ignore
+            self._engine.runAndWait()  # type: ignore
+        else:
+            print(f"Text-to-speech not available. Install pyttsx3 or gTTS. Text: {text}")
+
+    # ---- playback ----
+
+    def _player(self, clip: Clip) -> Optional[Tuple[List[str], bool]]:
+        """(command, audio piped to stdin) that plays the clip, or None without a player."""
+        if self.player:
+            return [part.replace("{path}", clip.path) for part in self.player.split()], "{path}" not in self.player
+        if sys.platform == "darwin":
+            return ["afplay", clip.path], False
+        if clip.format == "wav":
+            candidates = [["aplay", "-q", "-"], ["paplay"]]
+        else:
+            candidates = [["mpg123", "-q", "-"]]
+        candidates.append(["ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet", "-"])
+        for command in candidates:
+            if shutil.which(command[0]):
+                return command, True
+        if shutil.which("xdg-open"):
+            return ["xdg-open", clip.path], False
+        return None
+
+    def _play(self, clip: Clip):
+        if os.name == "nt":
+            if clip.format == "wav":
+                import winsound
+                winsound.PlaySound(clip.data, winsound.SND_MEMORY)
+            else:
+                os.startfile(clip.path)  # type: ignore
+            return
+        player = self._player(clip)
+        if player is None:
+            logger.warning("No audio player found (set TTS_PLAYER)")
+            return
+        command, piped = player
+        subprocess.run(command, input=clip.data if piped else None,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+
+    def stats(self) -> dict:
+        return {
+            "engine": self._engine_name,
+            "queued": self._queue.qsize(),
+            "spoken": self.spoken,
+            "rendered": self.rendered,
+            "avg_render_ms": round(self.render_ms / self.rendered, 1) if self.rendered else 0.0,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "memory_items": len(self._memory),
+            "dropped": self.dropped,
+            "failed": self.failed
+        }
+
+    def close(self, timeout: float = 5.0):
+        """Finish what is queued (up to timeout) and stop the worker."""
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        thread.join(timeout)
+
+speech_worker = SpeechWorker()
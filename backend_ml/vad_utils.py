@@ -0,0 +1,205 @@
+import logging
+import math
+import os
+from collections import deque
+from typing import List, NamedTuple, Optional, Union
+import numpy as np
+
+# Optional: WebRTC voice activity detector
+try:
+    import webrtcvad
+    WEBRTCVAD_AVAILABLE = True
+except Exception:
+    WEBRTCVAD_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# ---------------- CONFIG ---------------- #
+
+AUDIO_SAMPLE_RATE = int(os.environ.get("AUDIO_SAMPLE_RATE", 16000))
+# Client-declared sample rates outside this range are rejected
+AUDIO_MIN_SAMPLE_RATE = 8000
+AUDIO_MAX_SAMPLE_RATE = 48000
+# "energy" (built in) or "webrtc" (needs the webrtcvad package)
+VAD_BACKEND = os.environ.get("VAD_BACKEND", "energy").lower()
+VAD_AGGRESSIVENESS = int(os.environ.get("VAD_AGGRESSIVENESS", 2))  # webrtc only, 0-3
+VAD_FRAME_MS = int(os.environ.get("VAD_FRAME_MS", 30))
+# Energy VAD: a frame is speech when louder than this and VAD_NOISE_MARGIN_DB above the noise floor
+VAD_ENERGY_DB = float(os.environ.get("VAD_ENERGY_DB", -45))
+VAD_NOISE_MARGIN_DB = float(os.environ.get("VAD_NOISE_MARGIN_DB", 10))
+# Voiced audio needed to open an utterance, and silence that closes it
+VAD_START_MS = int(os.environ.get("VAD_START_MS", 90))
+VAD_SILENCE_MS = int(os.environ.get("VAD_SILENCE_MS", 600))
+# Audio kept from before the onset so the first syllable is not clipped
+VAD_PREROLL_MS = int(os.environ.get("VAD_PREROLL_MS", 300))
+# Utterances with less speech than this are dropped as noise; longer ones are cut here
+VAD_MIN_SPEECH_MS = int(os.environ.get("VAD_MIN_SPEECH_MS", 250))
+VAD_MAX_UTTERANCE_S = float(os.environ.get("VAD_MAX_UTTERANCE_S", 15))
+
+# ---------------- VOICE ACTIVITY ---------------- #
+
+class EnergyVAD:
+    """Frame loudness against a fixed threshold and a slowly adapting noise floor."""
+
+    def __init__(self, threshold_db: float = VAD_ENERGY_DB, margin_db: float = VAD_NOISE_MARGIN_DB):
+        self.threshold_db = threshold_db
+        self.margin_db = margin_db
+        self.noise_db = -90.0
+
+    def is_speech(self, frame: bytes, sample_rate: int) -> bool:
+        samples = np.frombuffer(frame, dtype="<i2").astype(np.float32)
+        rms = math.sqrt(float(np.mean(samples * samples))) if samples.size else 0.0
+        level = 20.0 * math.log10(rms / 32768.0 + 1e-9)
+        speech = level > max(self.threshold_db, self.noise_db + self.margin_db)
+        if not speech:
+            self.noise_db = 0.95 * self.noise_db + 0.05 * level
+        return speech
+
+class WebRtcVAD:
+    def __init__(self, aggressiveness: int = VAD_AGGRESSIVENESS):
+        self.vad = webrtcvad.Vad(aggressiveness)
+
+    def is_speech(self, frame: bytes, sample_rate: int) -> bool:
+        return self.vad.is_speech(frame, sample_rate)
+
+def create_vad(sample_rate: int, frame_ms: int, backend: str = VAD_BACKEND):
+    if backend == "webrtc":
+        if not WEBRTCVAD_AVAILABLE:
+            logger.warning("VAD_BACKEND=webrtc but webrtcvad is not installed, using energy VAD")
+        elif sample_rate not in (8000, 16000, 32000, 48000) or frame_ms not in (10, 20, 30):
+            logger.warning(f"webrtcvad cannot handle {sample_rate} Hz / {frame_ms} ms frames, using energy VAD")
+        else:
+            return WebRtcVAD()
+    return EnergyVAD()
+
+# ---------------- SEGMENTATION ---------------- #
+
+def check_sample_rate(sample_rate: int) -> int:
+    """Raise ValueError unless sample_rate is one the segmenter can frame audio at."""
+    if not AUDIO_MIN_SAMPLE_RATE <= sample_rate <= AUDIO_MAX_SAMPLE_RATE:
+        raise ValueError(f"Unsupported sample rate {sample_rate} Hz "
+                         f"(expected {AUDIO_MIN_SAMPLE_RATE}-{AUDIO_MAX_SAMPLE_RATE})")
+    return sample_rate
+
+class SpeechStarted(NamedTuple):
+    index: int
+    start_ms: int
+
+class Utterance(NamedTuple):
+    index: int
+    pcm: bytes  # mono 16-bit little-endian PCM
+    sample_rate: int
+    start_ms: int
+    end_ms: int
+
+class UtteranceSegmenter:
+    """
+    Cuts a stream of raw mono 16-bit PCM chunks into utterances. Chunks may be
+    any size; audio is judged in fixed frames and an utterance ends after
+    VAD_SILENCE_MS of silence (or at VAD_MAX_UTTERANCE_S). Every onset takes
+    the next index, so the index of an utterance dropped as noise is skipped
+    rather than reused.
+    """
+
+    def __init__(self, sample_rate: int = AUDIO_SAMPLE_RATE, frame_ms: int = VAD_FRAME_MS, vad=None,
+                 start_ms: int = VAD_START_MS, silence_ms: int = VAD_SILENCE_MS,
+                 preroll_ms: int = VAD_PREROLL_MS, min_speech_ms: int = VAD_MIN_SPEECH_MS,
+                 max_utterance_s: float = VAD_MAX_UTTERANCE_S):
+        if frame_ms <= 0:
+            raise ValueError(f"Frame length must be positive, got {frame_ms} ms")
+        self.sample_rate = check_sample_rate(sample_rate)
+        self.frame_ms = frame_ms
+        self.frame_bytes = sample_rate * frame_ms // 1000 * 2
+        self.vad = vad if vad is not None else create_vad(sample_rate, frame_ms)
+        self.start_frames = max(1, start_ms // frame_ms)
+        self.silence_frames = max(1, silence_ms // frame_ms)
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.max_frames = max(self.start_frames + 1, int(max_utterance_s * 1000) // frame_ms)
+        self._preroll: deque = deque(maxlen=max(self.start_frames, preroll_ms // frame_ms))
+        self._pending = bytearray()
+        self._frames_seen = 0
+        self._voiced_run = 0
+        self._silence_run = 0
+        self._speech_frames = 0
+        self._utterance: Optional[bytearray] = None
+        self._utterance_start = 0
+        self._index = 0
+        self.utterances = 0  # completed (not dropped) utterances
+
+    @property
+    def in_speech(self) -> bool:
+        return self._utterance is not None
+
+    @property
+    def index(self) -> int:
+        """Index of the utterance being collected, or of the next one outside speech."""
+        return self._index
+
+    @property
+    def current_ms(self) -> int:
+        """Length of the utterance being collected, 0 outside speech."""
+        return len(self._utterance) // 2 * 1000 // self.sample_rate if self._utterance is not None else 0
+
+    def partial(self) -> bytes:
+        return bytes(self._utterance or b"")
+
+    def feed(self, pcm: Union[bytes, bytearray, memoryview]) -> List[Union[SpeechStarted, Utterance]]:
+        """Add audio; returns speech onsets and completed utterances in order."""
+        self._pending += pcm
+        events: List[Union[SpeechStarted, Utterance]] = []
+        offset = 0
+        while len(self._pending) - offset >= self.frame_bytes:
+            frame = bytes(self._pending[offset:offset + self.frame_bytes])
+            offset += self.frame_bytes
+            event = self._frame(frame, self.vad.is_speech(frame, self.sample_rate))
+            if event is not None:
+                events.append(event)
+        del self._pending[:offset]
+        return events
+
+    def _frame(self, frame: bytes, speech: bool) -> Optional[Union[SpeechStarted, Utterance]]:
+        self._frames_seen += 1
+        if self._utterance is None:
+            self._preroll.append(frame)
+            self._voiced_run = self._voiced_run + 1 if speech else 0
+            if self._voiced_run < self.start_frames:
+                return None
+            self._utterance = bytearray(b"".join(self._preroll))
+            self._utterance_start = self._frames_seen - len(self._preroll)
+            self._speech_frames = self._voiced_run
+            self._preroll.clear()
+            self._voiced_run = self._silence_run = 0
+            return SpeechStarted(self._index, self._utterance_start * self.frame_ms)
+        self._utterance += frame
+        if speech:
+            self._speech_frames += 1
+            self._silence_run = 0
+        else:
+            self._silence_run += 1
+        if self._silence_run >= self.silence_frames or len(self._utterance) >= self.max_frames * self.frame_bytes:
+            return self._finish()
+        return None
+
+    def _finish(self) -> Optional[Utterance]:
+        pcm, start = self._utterance, self._utterance_start
+        speech_frames = self._speech_frames
+        self._utterance = None
+        self._silence_run = self._speech_frames = 0
+        if pcm is None:
+            return None
+        index = self._index
+        self._index += 1
+        if speech_frames < self.min_speech_frames:
+            return None
+        self.utterances += 1
+        end = start + len(pcm) // self.frame_bytes
+        return Utterance(index, bytes(pcm), self.sample_rate, start * self.frame_ms, end * self.frame_ms)
+
+    def flush(self) -> Optional[Utterance]:
+        """End of stream: close the utterance in progress, if it holds enough speech."""
+        if self._utterance is not None and self._pending:
+            self._utterance += self._pending[:len(self._pending) // 2 * 2]  # whole 16-bit samples only
+        self._pending.clear()
+        self._preroll.clear()
+        self._voiced_run = 0
+        return self._finish() if self._utterance is not None else None
@@ -0,0 +1,214 @@
+import logging
+import os
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import cv2
+
+from model_utils import detect_face_boxes, recognize_face_boxes, recognize_faces_in_frames, FACE_BATCH_SIZE
+from realtime_utils import RealTimeFaceTracker
+from tracking_utils import FACE_TRACKING, TRACK_IOU_THRESHOLD, TRACK_MAX_AGE_S, TRACK_MAX_CENTER_SHIFT, center_shift, iou
+from video_utils import VideoSampler, VideoInfo, video_info, VIDEO_SAMPLE_INTERVAL_S
+
+logger = logging.getLogger(__name__)
+
+# ---------------- CONFIG ---------------- #
+
+# Videos at least this long are split into time segments across the face worker processes
+VIDEO_PARALLEL_MIN_S = float(os.environ.get("VIDEO_PARALLEL_MIN_S", 60))
+# Segments per worker; more than one evens out segments that take longer than others
+VIDEO_SEGMENTS_PER_WORKER = int(os.environ.get("VIDEO_SEGMENTS_PER_WORKER", 2))
+# Segments are never shorter than this (each one starts with a seek and fresh face tracks)
+VIDEO_MIN_SEGMENT_S = float(os.environ.get("VIDEO_MIN_SEGMENT_S", 20))
+
+# ---------------- VIDEO FACE RECOGNITION ---------------- #
+
+class SegmentResult(NamedTuple):
+    start_s: float
+    end_s: Optional[float]
+    recognitions: List[dict]       # labelled faces, in frame order
+    tracks: Dict[str, dict]        # face_id -> first/last sighting, for stitching segments
+    summary: dict
+
+def recognize_video_faces(file_path: str, interval_s: float = VIDEO_SAMPLE_INTERVAL_S,
+                          start_s: float = 0.0, end_s: Optional[float] = None,
+                          batch_size: int = FACE_BATCH_SIZE, tracking: bool = FACE_TRACKING) -> SegmentResult:
+    """
+    Recognize every face on one frame per interval_s seconds of video (or of
+    the [start_s, end_s) segment). Frames in between are skipped without being
+    converted (see VideoSampler); frames without a detected face are dropped.
+
+    With tracking, faces are followed from sample to sample and only embedded
+    when a new track appears or its identity goes stale; each recognition labels
+    every frame of its track. Without tracking every face on every sample is
+    embedded in batches. Everything runs in the calling process; to use the
+    face workers, submit the whole call to one (FaceWorkerPool.recognize_video_segment).
+    """
+    sampler = VideoSampler(file_path, interval_s=interval_s, start_s=start_s, end_s=end_s)
+    face_tracker = RealTimeFaceTracker(detect=detect_face_boxes, recognize=recognize_face_boxes) if tracking else None
+    recognitions: List[dict] = []
+    tracks: Dict[str, dict] = {}
+    tracked = []  # (frame index, timestamp, track, box), labelled once the whole segment is tracked
+    pending = []  # sampled frames awaiting a batched forward pass
+
+    def add_recognition(index: int, timestamp: float, face: dict):
+        if face["label"]:
+            recognitions.append({
+                "frame": index,
+                "face_id": face.get("face_id"),
+                "person": face["label"],
+                "bbox": face["bbox"],
+                "score": face["score"],
+                "timestamp": timestamp
+            })
+
+    def flush():
+        if face_tracker is not None:
+            try:
+                per_frame = face_tracker.process_frames([s.frame for s in pending], [s.timestamp for s in pending])
+            except Exception as e:
+                logger.warning(f"Tracked face recognition failed: {e}")
+                per_frame = [[] for _ in pending]
+            for sample, faces in zip(pending, per_frame):
+                for track, box in faces:
+                    tracked.append((sample.index, sample.timestamp, track, box))
+                    bbox = [box["x"], box["y"], box["w"], box["h"]]
+                    seen = tracks.setdefault(track.track_id, {"first_s": sample.timestamp, "first_bbox": bbox})
+                    seen.update(last_s=sample.timestamp, last_bbox=bbox)
+            pending.clear()
+            return
+        try:
+            per_frame = recognize_faces_in_frames([sample.frame for sample in pending], batch_size=batch_size)
+        except Exception as e:
+            logger.warning(f"Batch face recognition failed: {e}")
+            per_frame = [[] for _ in pending]
+        for sample, faces in zip(pending, per_frame):
+            for face in faces:
+                add_recognition(sample.index, sample.timestamp, face)
+        pending.clear()
+
+    for sample in sampler:
+        pending.append(sample)
+        if len(pending) >= batch_size:
+            flush()
+    if pending:
+        flush()
+    for index, timestamp, track, box in tracked:
+        add_recognition(index, timestamp, RealTimeFaceTracker.describe(track, box, timestamp))
+
+    info = sampler.info
+    summary = {
+        "total_frames": info.frame_count if info and info.frame_count else sampler.grabbed,
+        "sampled_frames": sampler.sampled,
+        "fps": round(info.fps, 3) if info else None,
+        "duration_s": round(info.duration_s, 3) if info else None,
+        "sample_interval_s": interval_s
+    }
+    if face_tracker is not None:
+        summary["tracking"] = face_tracker.tracker.stats()
+    return SegmentResult(start_s, end_s, recognitions, tracks, summary)
+
+# ---------------- SEGMENTS ---------------- #
+
+def probe_video(file_path: str) -> VideoInfo:
+    cap = cv2.VideoCapture(file_path)
+    try:
+        if not cap.isOpened():
+            raise ValueError(f"Could not open video: {os.path.basename(file_path)}")
+        return video_info(cap)
+    finally:
+        cap.release()
+
+def plan_segments(info: VideoInfo, workers: int, interval_s: float = VIDEO_SAMPLE_INTERVAL_S,
+                  min_duration_s: float = VIDEO_PARALLEL_MIN_S, per_worker: int = VIDEO_SEGMENTS_PER_WORKER,
+                  min_segment_s: float = VIDEO_MIN_SEGMENT_S) -> List[Tuple[float, Optional[float]]]:
+    """
+    [start_s, end_s) segments covering the video, or a single open segment when
+    it is short or its length is unknown. Boundaries fall on the sampling grid,
+    so the segments take exactly the frames one sequential pass would.
+    """
+    duration = info.duration_s
+    if workers < 2 or not duration or duration < min_duration_s:
+        return [(0.0, None)]
+    count = min(workers * max(1, per_worker), max(1, int(duration // max(min_segment_s, interval_s))))
+    if count < 2:
+        return [(0.0, None)]
+    step = max(interval_s, 1e-3)
+    bounds = [round(round(duration * k / count / step) * step, 6) for k in range(count)]
+    bounds = sorted(set(bounds))
+    return [(start, end) for start, end in zip(bounds, bounds[1:])] + [(bounds[-1], None)]
+
+def _stitch(previous: SegmentResult, current: SegmentResult, max_gap_s: float) -> Dict[str, str]:
+    """Pair tracks cut by the boundary between two segments: current face_id -> previous face_id."""
+    ending = [(fid, t) for fid, t in previous.tracks.items() if current.start_s - t["last_s"] <= max_gap_s]
+    starting = [(fid, t) for fid, t in current.tracks.items() if t["first_s"] - current.start_s <= max_gap_s]
+    candidates = []
+    for i, (_, old) in enumerate(ending):
+        for j, (_, new) in enumerate(starting):
+            overlap = iou(old["last_bbox"], new["first_bbox"])
+            if overlap >= TRACK_IOU_THRESHOLD:
+                candidates.append((0, -overlap, i, j))
+            else:
+                shift = center_shift(old["last_bbox"], new["first_bbox"])
+                if shift <= TRACK_MAX_CENTER_SHIFT:
+                    candidates.append((1, shift, i, j))
+    pairs: Dict[str, str] = {}
+    used = set()
+    for _, _, i, j in sorted(candidates):
+        if i in used or starting[j][0] in pairs:
+            continue
+        used.add(i)
+        pairs[starting[j][0]] = ending[i][0]
+    return pairs
+
+def merge_segments(results: List[SegmentResult], max_gap_s: float = TRACK_MAX_AGE_S) -> Tuple[List[dict], dict]:
+    """
+    One timeline from per-segment results (in time order): recognitions sorted
+    by time, tracks cut at segment boundaries joined back together, and face_ids
+    renumbered face_1, face_2, ... in order of first appearance.
+    """
+    results = sorted(results, key=lambda r: r.start_s)
+    # Per-segment face_id -> track root, following tracks across boundaries
+    root: Dict[Tuple[int, str], Tuple[int, str]] = {}
+    stitched = 0
+    for k, result in enumerate(results):
+        pairs = _stitch(results[k - 1], result, max_gap_s) if k else {}
+        stitched += len(pairs)
+        for fid in result.tracks:
+            root[(k, fid)] = root[(k - 1, pairs[fid])] if fid in pairs else (k, fid)
+
+    timeline = []
+    for k, result in enumerate(results):
+        for recognition in result.recognitions:
+            timeline.append((recognition["timestamp"], k, recognition))
+    timeline.sort(key=lambda item: (item[0], item[2]["frame"]))
+
+    first_s: Dict[Tuple[int, str], float] = {}
+    for (k, fid), key in root.items():
+        seen = results[k].tracks[fid]["first_s"]
+        first_s[key] = min(first_s.get(key, seen), seen)
+    names = {key: f"face_{n}" for n, key in enumerate(sorted(first_s, key=first_s.get), start=1)}  # type: ignore
+    recognitions = []
+    for _, k, recognition in timeline:
+        fid = recognition.get("face_id")
+        if fid is not None:
+            recognition = {**recognition, "face_id": names[root[(k, fid)]]}
+        recognitions.append(recognition)
+
+    first = results[0].summary
+    summary = {
+        "total_frames": first["total_frames"],
+        "sampled_frames": sum(r.summary["sampled_frames"] for r in results),
+        "fps": first["fps"],
+        "duration_s": first["duration_s"],
+        "sample_interval_s": first["sample_interval_s"]
+    }
+    if "tracking" in first:
+        summary["tracking"] = {
+            "tracks_created": len(names),
+            "stitched_tracks": stitched,
+            "detections": sum(r.summary["tracking"]["detections"] for r in results),
+            "recognitions": sum(r.summary["tracking"]["recognitions"] for r in results)
+        }
+    if len(results) > 1:
+        summary["segments"] = len(results)
+    return recognitions, summary
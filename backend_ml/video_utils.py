@@ -0,0 +1,123 @@
+import math
+import os
+from typing import Iterator, NamedTuple, Optional
+
+import cv2
+import numpy as np
+
+# ---------------- CONFIG ---------------- #
+
+# Seconds of video between analysed frames
+VIDEO_SAMPLE_INTERVAL_S = float(os.environ.get("VIDEO_SAMPLE_INTERVAL_S", 0.5))
+# Upper bound on analysed frames per video (0 = no limit); the interval widens to fit
+VIDEO_MAX_SAMPLES = int(os.environ.get("VIDEO_MAX_SAMPLES", 0))
+# Gaps longer than this many frames are crossed by seeking instead of grab()-skipping
+VIDEO_SEEK_FRAMES = int(os.environ.get("VIDEO_SEEK_FRAMES", 90))
+# Assumed only when the container does not report a frame rate
+VIDEO_DEFAULT_FPS = float(os.environ.get("VIDEO_DEFAULT_FPS", 30.0))
+
+# ---------------- VIDEO SAMPLING ---------------- #
+
+class VideoInfo(NamedTuple):
+    fps: float
+    frame_count: int     # 0 when the container does not say
+    duration_s: float    # 0.0 when unknown
+    fps_reported: bool   # False when VIDEO_DEFAULT_FPS was assumed
+
+class SampledFrame(NamedTuple):
+    index: int           # frame number in the video
+    timestamp: float     # seconds from the start, from the decoder when it reports one
+    frame: np.ndarray
+
+def video_info(cap: cv2.VideoCapture) -> VideoInfo:
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    fps_reported = bool(fps) and math.isfinite(fps) and 0 < fps < 1000
+    if not fps_reported:
+        fps = VIDEO_DEFAULT_FPS
+    frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+    frame_count = int(frame_count) if frame_count and math.isfinite(frame_count) and frame_count > 0 else 0
+    duration = frame_count / fps if frame_count else 0.0
+    return VideoInfo(fps, frame_count, duration, fps_reported)
+
+class VideoSampler:
+    """
+    Takes one frame every interval_s seconds of video. Frames in between are
+    skipped with grab(), which demuxes and decodes but never converts or copies
+    the image; gaps of more than seek_frames are crossed by seeking, so sparse
+    sampling of a long video costs roughly one keyframe decode per sample
+    rather than every frame. Timestamps come from the decoder's position, not
+    from an assumed frame rate. start_s / end_s restrict sampling to one time
+    segment of the video, which starts with a seek.
+
+        sampler = VideoSampler(path)
+        for sample in sampler:
+            ...
+        sampler.info, sampler.sampled, sampler.grabbed
+    """
+
+    def __init__(self, path: str, interval_s: float = VIDEO_SAMPLE_INTERVAL_S,
+                 max_samples: int = VIDEO_MAX_SAMPLES, seek_frames: int = VIDEO_SEEK_FRAMES,
+                 start_s: float = 0.0, end_s: Optional[float] = None):
+        self.path = path
+        self.interval_s = max(0.0, interval_s)
+        self.max_samples = max(0, max_samples)
+        self.seek_frames = max(0, seek_frames)
+        self.start_s = max(0.0, start_s)
+        self.end_s = end_s
+        self.info: Optional[VideoInfo] = None
+        self.sampled = 0
+        self.grabbed = 0
+        self.seeks = 0
+
+    def _step_frames(self, info: VideoInfo) -> float:
+        step = max(1.0, self.interval_s * info.fps)
+        if self.max_samples and info.frame_count:
+            span = info.frame_count - self.start_s * info.fps
+            if self.end_s is not None:
+                span = min(span, (self.end_s - self.start_s) * info.fps)
+            step = max(step, span / self.max_samples)
+        return step
+
+    def __iter__(self) -> Iterator[SampledFrame]:
+        cap = cv2.VideoCapture(self.path)
+        try:
+            if not cap.isOpened():
+                raise ValueError(f"Could not open video: {os.path.basename(self.path)}")
+            info = self.info = video_info(cap)
+            step = self._step_frames(info)
+            # Seeking needs a known length; live or unindexed streams are grabbed through
+            can_seek = info.frame_count > 0 and self.seek_frames > 0
+            position = 0  # index of the next frame grab() returns
+            target = self.start_s * info.fps
+            end_frame = self.end_s * info.fps if self.end_s is not None else None
+            while not self.max_samples or self.sampled < self.max_samples:
+                index = int(round(target))
+                if info.frame_count and index >= info.frame_count:
+                    break
+                if end_frame is not None and index >= end_frame:
+                    break
+                if can_seek and index - position > self.seek_frames:
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+                    position = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+                    self.seeks += 1
+                    # A seek that lands past the target yields the frame it landed on
+                    index = max(index, position)
+                ok = True
+                while position <= index:
+                    ok = cap.grab()
+                    if not ok:
+                        break
+                    position += 1
+                    self.grabbed += 1
+                if not ok:
+                    break
+                ret, frame = cap.retrieve()
+                if not ret:
+                    break
+                msec = cap.get(cv2.CAP_PROP_POS_MSEC)
+                timestamp = msec / 1000.0 if msec > 0 or index == 0 else index / info.fps
+                self.sampled += 1
+                yield SampledFrame(index, round(timestamp, 3), frame)
+                target += step
+        finally:
+            cap.release()